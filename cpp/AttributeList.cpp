@@ -6,98 +6,173 @@
  */
 
 #include "AttributeList.h"
+#include "Constants.h"
 #include "_Core.h"
 #include <assert.h>
+#include <ctype.h>
 #include <stdio.h>
 #include <stdlib.h>
 #include <string.h>
+#include <atomic>
+#include <mutex>
 
 /**
- * AttributeList.cpp - implements an attribute list, a sequence of name/value
- * pairs attached to another object. Searching by name is supported, as well as
- * iterating over the attributes (get the count, then access by index)
+ * AttributeList.cpp - implements an attribute list, a set of name/value
+ * pairs attached to another object. Names are interned to IDs, which index
+ * the values of each list.
  */
 
-static int findName(const char **names, const char *name, int count)
+//-- The interned names, in an open-addressed hash table. Entries are only ever added, and
+//-- a name is published only after its ID is written, so lookups need no lock; adding a
+//-- name (which happens a few dozen times in a run) does. Models are fit on several threads,
+//-- and this lets each of them set attributes at the same time.
+static const int NAME_TABLE_SIZE = 1024; // a power of 2
+static std::atomic<const char*> nameTable[NAME_TABLE_SIZE];
+static int nameIds[NAME_TABLE_SIZE];
+static int nameCount = 0;
+static std::mutex nameLock;
+
+static int findName(const char *name, int len, unsigned int hash)
+{
+    for (int probe = 0; probe < NAME_TABLE_SIZE; probe++) {
+        int slot = (hash + probe) & (NAME_TABLE_SIZE - 1);
+        const char *entry = nameTable[slot].load(std::memory_order_acquire);
+        if (entry == NULL)
+            return -1 - slot;
+        if (strncasecmp(entry, name, len) == 0 && entry[len] == '\0')
+            return nameIds[slot];
+    }
+    return -1 - NAME_TABLE_SIZE;
+}
+
+
+int AttributeList::getAttributeId(const char *name, bool add)
 {
     //-- if name contains "$", everything after that is formatting info, so don't compare that part.
-    const char *cp = strchr(name, '$');
-    int len = (cp == 0) ? strlen(name) : cp - name;
-    char *name2 = new char[len+1];
-    strncpy(name2, name, len);
-    name2[len] = '\0';
-    int match = -1;
-    for (int i = 0; i < count; i++) {
-	if (strcasecmp(name2, names[i]) == 0) {
-	    match = i;
-	    break;
-	}
+    int len = 0;
+    unsigned int hash = 2166136261U;
+    for (; name[len] != '\0' && name[len] != '$'; len++)
+        hash = (hash ^ (unsigned char) tolower(name[len])) * 16777619U;
+    int id = findName(name, len, hash);
+    if (id >= 0 || !add)
+        return id < 0 ? -1 : id;
+    std::lock_guard<std::mutex> lock(nameLock);
+    id = findName(name, len, hash);
+    if (id >= 0)
+        return id;
+    if (nameCount >= NAME_TABLE_SIZE / 2) {
+        printf("Error: too many attribute names (%d)\n", nameCount);
+        exit(1);
     }
-    delete [] name2;
-    return match;
+    int slot = -1 - id;
+    char *entry = new char[len + 1];
+    strncpy(entry, name, len);
+    entry[len] = '\0';
+    nameIds[slot] = nameCount++;
+    nameTable[slot].store(entry, std::memory_order_release);
+    return nameIds[slot];
 }
 
+//-- relations usually have only these attributes, so they get the first IDs and relations
+//-- need only a few slots
+static struct InitialNames {
+    InitialNames() {
+        AttributeList::getAttributeId(ATTRIBUTE_H);
+        AttributeList::getAttributeId(ATTRIBUTE_DF);
+    }
+} initialNames;
+
 
 AttributeList::AttributeList(int size)
 {
     attrCount = 0;
-    maxAttrCount = size;
-    names = new const char*[maxAttrCount];
-    values = new double[maxAttrCount];
-    memset(names,0,maxAttrCount*sizeof(char));
-    memset(values,0,maxAttrCount*sizeof(double));
+    slotCount = 0;
+    values = NULL;
+    setBits = NULL;
+    if (size > 0)
+        growSlots(size - 1);
 }
 
 
 AttributeList::~AttributeList()
 {
-    if (names) delete [] names;
     if (values) delete [] values;
+    if (setBits) delete [] setBits;
 }
 
 
 long AttributeList::size()
 {
-    return sizeof(AttributeList) * maxAttrCount * (sizeof(char*) + sizeof(double));
+    return sizeof(AttributeList) + slotCount * sizeof(double) + (slotCount + 63) / 64 * sizeof(long long);
 }
 
 
 void AttributeList::reset()
 {
     attrCount = 0;
+    if (setBits)
+        memset(setBits, 0, (slotCount + 63) / 64 * sizeof(long long));
 }
 
 
-void AttributeList::setAttribute(const char *name, double value)
+void AttributeList::growSlots(int id)
 {
     const int FACTOR = 2;
+    int newCount = slotCount * FACTOR;
+    if (newCount <= id)
+        newCount = id + 1;
+    int words = (slotCount + 63) / 64, newWords = (newCount + 63) / 64;
+    double *newValues = new double[newCount];
+    unsigned long long *newBits = new unsigned long long[newWords];
+    if (slotCount > 0)
+        memcpy(newValues, values, slotCount * sizeof(double));
+    if (words > 0)
+        memcpy(newBits, setBits, words * sizeof(long long));
+    memset(newBits + words, 0, (newWords - words) * sizeof(long long));
+    if (values) delete [] values;
+    if (setBits) delete [] setBits;
+    values = newValues;
+    setBits = newBits;
+    slotCount = newCount;
+}
+
 
-    // if this attribute is already in the list, change it;
-    // otherwise, add a new one
-    int index = findName(names, name, attrCount);
-    if (index >= 0) values[index] = value;
-    else {
-	while (attrCount >= maxAttrCount) {
-	    names = (const char **) growStorage(names, maxAttrCount*sizeof(char*), FACTOR);
-	    values = (double*) growStorage(values, maxAttrCount*sizeof(double), FACTOR);
-	    maxAttrCount *=	FACTOR;
-	}
-	names[attrCount] = name;
-	values[attrCount++] = value;
+void AttributeList::setAttribute(int id, double value)
+{
+    if (id < 0)
+        return;
+    if (id >= slotCount)
+        growSlots(id);
+    if (!isSet(id)) {
+        setBits[id >> 6] |= 1ULL << (id & 63);
+        attrCount++;
     }
+    values[id] = value;
+}
+
+
+void AttributeList::setAttribute(const char *name, double value)
+{
+    setAttribute(getAttributeId(name), value);
 }
 
 
 int AttributeList::getAttributeIndex(const char *name)
 {
-    return findName(names, name, attrCount);
+    int id = getAttributeId(name, false);
+    return isSet(id) ? id : -1;
+}
+
+
+double AttributeList::getAttribute(int id)
+{
+    return isSet(id) ? values[id] : -1.0;
 }
 
 
 double AttributeList::getAttribute(const char *name)
 {
-    int index = findName(names, name, attrCount);
-    return (index >= 0) ? values[index] : -1.0;
+    return getAttribute(getAttributeId(name, false));
 }
 
 
@@ -109,16 +184,15 @@ int AttributeList::getAttributeCount()
 
 double AttributeList::getAttributeByIndex(int index)
 {
-    return (index < attrCount) ? values[index] : -1.0;
+    return getAttribute(index);
 }
 
 
 void AttributeList::dump()
 {
     if (attrCount == 0) return;
-    printf("\t\tAttributes: %d/%d", attrCount, maxAttrCount);
+    printf("\t\tAttributes: %d/%d", attrCount, slotCount);
     //for (int i = 0; i < attrCount; i++) {
     //printf("\t%s: %lf", names[i], values[i]);
     //}
 }
-
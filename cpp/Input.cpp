@@ -13,7 +13,14 @@
 #include <stdio.h>
 #include <string.h>
 #include <ctype.h>
+#include <stdint.h>
 #include <stdlib.h>
+#include <sys/stat.h>
+#include <queue>
+#include <string>
+#include <thread>
+#include <utility>
+#include <vector>
 
 struct LostVar {
         int num;
@@ -45,122 +52,340 @@ bool KeepVal(LostVar *lostvarpt, char * var) {
     return false;
 }
 
-/*ReadData - read data tuples, one per line; return number of lines read
+//-- the length of a field of a data line, which ends at whitespace or a comma
+static int fieldLength(const char *cp) {
+    int length = 0;
+    while (cp[length] && !(isspace(cp[length]) || (cp[length] == ',')))
+        length++;
+    return length;
+}
+
+/*
+ * DataLineParser - turns data lines into tuples. Value indices are given to new values as
+ * they are seen, unless addValues is false (as it is on the worker threads of ocReadData);
+ * then a line with a new value, or an error, is left for the main thread. That thread parses
+ * such lines in file order, so the values get the same indices, and the errors the same
+ * messages, as when all lines are read in order.
  */
-long ocReadData(FILE *fin, VariableList *vars, Table *indata, LostVar *lostvarp) {
-    char line[MAXLINE];
-    KeySegment *key = 0;
-    int lineno = 0;
-    double tupleValue;
-    LostVar *lostvarpt;
-    int keysize = vars->getKeySize();
+class DataLineParser {
+    public:
+        DataLineParser(VariableList *vars, LostVar *lostvarp, bool addValues);
+        ~DataLineParser();
+        //-- parse a line, adding its tuple (unless it is discarded) to the table. Returns
+        //-- false if the line was left for the main thread.
+        bool parse(const char *line, int lineno, Table *table);
+
+    private:
+        VariableList *vars;
+        LostVar *lostvarp;
+        bool addValues;
+        int keysize;
+        int varCountDF;
+        int varCount;
+        KeySegment *key;
+        int *values, *indices;
+        //-- each line is split into fields once: one per variable in the file, then the value.
+        //-- Missing fields are empty, at the end of the line.
+        const char **fields;
+        int *fieldLengths;
+        char var[MAXLINE];
+        char newvalue[MAXLINE];
+};
+
+DataLineParser::DataLineParser(VariableList *vars, LostVar *lostvarp, bool addValues) :
+        vars(vars), lostvarp(lostvarp), addValues(addValues) {
+    keysize = vars->getKeySize();
+    varCountDF = vars->getVarCountDF(); //Anjali
+    varCount = vars->getVarCount();
     key = new KeySegment[keysize];
-    int varCountDF = vars->getVarCountDF(); //Anjali
-    int varCount = vars->getVarCount();
-    int *values, *indices;
-    bool gotLine = false;
-    int b_lostvar = 0;
-    int flag = KEEP;
-    char var[MAXLINE];
-    char newvalue[MAXLINE];
-    bool keepval = true;
     values = new int[varCount];
     indices = new int[varCount];
+    fields = new const char *[varCountDF + 1];
+    fieldLengths = new int[varCountDF + 1];
+}
+
+DataLineParser::~DataLineParser() {
+    delete[] fieldLengths;
+    delete[] fields;
+    delete[] indices;
+    delete[] values;
+    delete[] key;
+}
+
+bool DataLineParser::parse(const char *line, int lineno, Table *table) {
+    LostVar *lostvarpt;
+    int flag = KEEP;
     int j = 0;
     int value = 0;
-    int l = 0;
-    gotLine = Options::getLine(fin, line, &lineno);
-    if (!gotLine) {
-        printf("No data\n");
-        return false;
+    const char *cp = line;
+    for (int i = 0; i <= varCountDF; i++) {
+        fields[i] = cp;
+        fieldLengths[i] = fieldLength(cp);
+        cp += fieldLengths[i];
+        while (*cp && (isspace(*cp) || (*cp == ',')))
+            cp++; // now at next value
     }
-    while (gotLine) {
-        char *cp = line;
-        l++;
-        for (int i = 0; i < varCountDF; i++) { //Anjali
-            newvalue[0] = '\0';
-
-            auto checkValue = [&](int resolvedvalue) {
-                if (resolvedvalue < 0) { // cardinality error
-                        printf("Error in data, line %d: new value exceeds cardinality of variable #%d, \"%s\"\n",
-                                lineno, i+1, vars->getVariable(j)->abbrev);
-                        int cardinality = vars->getVariable(j)->cardinality;
-                        printf("Cardinality should be %d. ", cardinality);
-                        printf("Previously seen values: ");
-                        for (int k = 0; k < cardinality; ++k) {
-                            printf("%s ", vars->getVariable(j)->valmap[k]);
-                        }
-                        printf("\nData line: %s\n", line);
-                        exit(1);
-                    } else {
-                        values[j] = resolvedvalue;
-                        indices[j] = j;
-                    }
-            };
-
-            if (vars->isVarInUse(i)) { //Anjali
-                if ((vars->getVariable(j)->rebin == true) || (vars->getVariable(j)->exclude != NULL)) {
-                    vars->getNewValue(j, cp, newvalue);
-                    if (newvalue[0] != '\0') {
-                        value = vars->getVarValueIndex(j, newvalue);
-                        checkValue(value);
-                    } else
-                        flag = DISCARD;
-                } else {
-                    if (cp[0] == '\0') {
+    for (int i = 0; i < varCountDF; i++) { //Anjali
+        cp = fields[i];
+        newvalue[0] = '\0';
 
-                        printf("ERROR: Expected additional input, but line ended prematurely\n");
-                        printf("Line number: %d\n", lineno);
-                        printf("Line so far: %s\n", line);
-                        exit(1);
+        auto checkValue = [&](int resolvedvalue) {
+            if (resolvedvalue < 0) { // cardinality error
+                    printf("Error in data, line %d: new value exceeds cardinality of variable #%d, \"%s\"\n",
+                            lineno, i+1, vars->getVariable(j)->abbrev);
+                    int cardinality = vars->getVariable(j)->cardinality;
+                    printf("Cardinality should be %d. ", cardinality);
+                    printf("Previously seen values: ");
+                    for (int k = 0; k < cardinality; ++k) {
+                        printf("%s ", vars->getVariable(j)->valmap[k]);
                     }
+                    printf("\nData line: %s\n", line);
+                    exit(1);
+                } else {
+                    values[j] = resolvedvalue;
+                    indices[j] = j;
+                }
+        };
 
-                    value = vars->getVarValueIndex(j, cp);
+        if (vars->isVarInUse(i)) { //Anjali
+            if ((vars->getVariable(j)->rebin == true) || (vars->getVariable(j)->exclude != NULL)) {
+                vars->getNewValue(j, cp, newvalue);
+                if (newvalue[0] != '\0') {
+                    if (addValues)
+                        value = vars->getVarValueIndex(j, newvalue);
+                    else if ((value = vars->findVarValueIndex(j, newvalue, fieldLength(newvalue))) < 0)
+                        return false;
                     checkValue(value);
+                } else
+                    flag = DISCARD;
+            } else {
+                if (cp[0] == '\0') {
+                    if (!addValues)
+                        return false;
+                    printf("ERROR: Expected additional input, but line ended prematurely\n");
+                    printf("Line number: %d\n", lineno);
+                    printf("Line so far: %s\n", line);
+                    exit(1);
                 }
-                while (*cp && !(isspace(*cp) || (*cp == ',')))
-                    cp++;
-                while (*cp && (isspace(*cp) || (*cp == ',')))
-                    cp++; // now at next value
-                j++;
-            } else { //Anjali
-                // check if it is in LostVar list, if yes then if all its values are valid then this row of table can go
-                // otherwise mark it for being removed from building a key
-                if (lostvarp != NULL) {
-                    b_lostvar = isLostVar(i, &lostvarpt, lostvarp);
-                    if (b_lostvar) {
-                        int ret = sscanf(cp, "%[^\t, ]", var);
-                        if (ret == 1) {
-                            keepval = KeepVal(lostvarpt, var);
-                            if (!keepval)
-                                flag = DISCARD;
-                        } else {
-                            printf("something went wrong");
-                            exit(1);
-                        }
+
+                if (addValues)
+                    value = vars->getVarValueIndex(j, cp, fieldLengths[i]);
+                else if ((value = vars->findVarValueIndex(j, cp, fieldLengths[i])) < 0)
+                    return false;
+                checkValue(value);
+            }
+            j++;
+        } else { //Anjali
+            // check if it is in LostVar list, if yes then if all its values are valid then this row of table can go
+            // otherwise mark it for being removed from building a key
+            if (lostvarp != NULL) {
+                if (isLostVar(i, &lostvarpt, lostvarp)) {
+                    int ret = sscanf(cp, "%[^\t, ]", var);
+                    if (ret == 1) {
+                        if (!KeepVal(lostvarpt, var))
+                            flag = DISCARD;
+                    } else {
+                        if (!addValues)
+                            return false;
+                        printf("something went wrong");
+                        exit(1);
                     }
                 }
-                while (*cp && !(isspace(*cp) || (*cp == ',')))
-                    cp++;
-                while (*cp && (isspace(*cp) || (*cp == ',')))
-                    cp++; // now at next value
-            } //Anjali
+            }
+        } //Anjali
+    }
+    double tupleValue;
+    cp = fields[varCountDF];
+    if (*cp) { // there is still a tuple value on the line
+        tupleValue = (double) strtod(cp, (char **) NULL);
+    } else {
+        tupleValue = 1;
+    }
+    if (flag == KEEP) {
+        Key::buildKey(key, keysize, vars, indices, values, varCount);
+        //-- duplicates are summed by sortAndMerge once all lines are read
+        table->addTuple(key, tupleValue);
+    }
+    return true;
+}
+
+//-- One worker thread's part of a block of data lines, and what it found there. The worker
+//-- keeps its tuples, from all of its parts, in its own table.
+struct DataPart {
+        DataPart() : table(NULL), mergedCount(0) {}
+        Table *table;
+        long long mergedCount; // tuples in the table after its last sortAndMerge
+        const char *text;
+        long length;
+        long stop; // where reading stopped before the end of the part, or -1
+        int lines; // the lines counted before any stop
+        long dataLines;
+        //-- the lines left for the main thread, with their line numbers in the part
+        std::vector<std::pair<int, std::string> > deferred;
+};
+
+//-- the table is merged when it has at least doubled since the last merge, so merging takes
+//-- time in proportion to the tuples, while keeping it small if lines repeat
+static const long long MIN_MERGE_COUNT = 1024;
+
+static void readDataPart(DataPart *part, VariableList *vars, LostVar *lostvarp) {
+    DataLineParser parser(vars, lostvarp, false);
+    LineReader reader(part->text, part->length);
+    char line[MAXLINE];
+    int lineno = 0;
+    part->stop = -1;
+    part->dataLines = 0;
+    part->deferred.clear();
+    while (true) {
+        long position = reader.getPosition();
+        int lines = lineno;
+        if (!reader.getLine(line, &lineno)) {
+            if (!reader.atEnd()) {
+                //-- a line is too long; stop before it, so the main thread reports it
+                part->stop = position;
+                lineno = lines;
+            }
+            break;
         }
-        j = 0;
-        while (*cp && (isspace(*cp) || (*cp == ',')))
-            cp++;
-        if (*cp) { // there is still a tuple value on the line
-            tupleValue = (double) strtod(cp, (char **) NULL);
-        } else {
-            tupleValue = 1;
+        part->dataLines++;
+        if (!parser.parse(line, lineno, part->table))
+            part->deferred.push_back(std::make_pair(lineno, std::string(line)));
+    }
+    part->lines = lineno;
+    if (part->table->getTupleCount() >= 2 * part->mergedCount + MIN_MERGE_COUNT) {
+        part->table->sortAndMerge();
+        part->mergedCount = part->table->getTupleCount();
+    }
+}
+
+//-- find the start of the first line in the text which is a directive (its first non-blank
+//-- character is ':'), or -1 if there isn't one
+static long findDirective(const char *text, long length) {
+    const char *colon = text;
+    while ((colon = (const char *) memchr(colon, ':', text + length - colon)) != NULL) {
+        const char *start = colon;
+        while (start > text && start[-1] != '\n' && start[-1] != '\r' && isspace((unsigned char) start[-1]))
+            start--;
+        if (start == text || start[-1] == '\n' || start[-1] == '\r')
+            return start - text;
+        colon++;
+    }
+    return -1;
+}
+
+/*
+ * readDataBlocks - read the data lines which follow in the reader's buffer, a block at a
+ * time. Each block is split at line breaks into one part per thread, and the parts are
+ * parsed at the same time; then the lines left by the workers are parsed here, in order,
+ * into lineTable. Stops before a directive, a line which is too long (for the caller to
+ * read and report), or a block without a line break. lineno is advanced past the lines
+ * read. Returns the number of data lines read.
+ */
+static long readDataBlocks(LineReader *reader, VariableList *vars, LostVar *lostvarp, DataLineParser *parser,
+        Table *lineTable, std::vector<DataPart> &parts, int *lineno) {
+    long l = 0;
+    int partCount = parts.size();
+    while (true) {
+        const char *text;
+        long length = reader->getText(&text);
+        long directive = findDirective(text, length);
+        if (directive >= 0)
+            length = directive;
+        if (length == 0)
+            break;
+        long from = 0;
+        for (int t = 0; t < partCount; t++) {
+            long to = (t == partCount - 1) ? length : length / partCount * (t + 1);
+            if (to <= from)
+                to = from;
+            else
+                while (to < length && text[to - 1] != '\n' && text[to - 1] != '\r')
+                    to++;
+            parts[t].text = text + from;
+            parts[t].length = to - from;
+            from = to;
         }
-        if (flag == KEEP) {
-            Key::buildKey(key, keysize, vars, indices, values, varCount);
-            indata->sumTuple(key, tupleValue);
+        std::vector<std::thread> workers;
+        for (int t = 1; t < partCount; t++)
+            workers.push_back(std::thread(readDataPart, &parts[t], vars, lostvarp));
+        readDataPart(&parts[0], vars, lostvarp);
+        for (int t = 0; t < (int) workers.size(); t++)
+            workers[t].join();
+
+        long used = 0;
+        bool stopped = false;
+        for (int t = 0; t < partCount && !stopped; t++) {
+            DataPart &part = parts[t];
+            for (size_t d = 0; d < part.deferred.size(); d++)
+                parser->parse(part.deferred[d].second.c_str(), *lineno + part.deferred[d].first, lineTable);
+            *lineno += part.lines;
+            l += part.dataLines;
+            stopped = part.stop >= 0;
+            used += stopped ? part.stop : part.length;
         }
-        flag = KEEP;
+        reader->skip(used);
+        if (stopped || directive >= 0)
+            break;
+    }
+    return l;
+}
+
+//-- merge sorted tables into one, in key order, summing the values of matching keys
+static void mergeTables(Table *merged, std::vector<Table*> &tables) {
+    int keysize = merged->getKeySize();
+    std::vector<long long> next(tables.size(), 0);
+    //-- the table with the lowest next key is on top of the queue
+    auto later = [&](int t1, int t2) {
+        int compare = Key::compareKeys(tables[t1]->getKey(next[t1]), tables[t2]->getKey(next[t2]), keysize);
+        return compare != 0 ? compare > 0 : t1 > t2;
+    };
+    std::priority_queue<int, std::vector<int>, decltype(later)> queue(later);
+    for (int t = 0; t < (int) tables.size(); t++)
+        if (tables[t]->getTupleCount() > 0)
+            queue.push(t);
+    while (!queue.empty()) {
+        int t = queue.top();
+        queue.pop();
+        KeySegment *key = tables[t]->getKey(next[t]);
+        double value = tables[t]->getValue(next[t]);
+        long long last = merged->getTupleCount() - 1;
+        if (last >= 0 && Key::compareKeys(merged->getKey(last), key, keysize) == 0)
+            merged->setValue(last, merged->getValue(last) + value);
+        else
+            merged->addTuple(key, value);
+        if (++next[t] < tables[t]->getTupleCount())
+            queue.push(t);
+    }
+}
 
-        gotLine = Options::getLine(fin, line, &lineno);
+/*ReadData - read data tuples, one per line; return number of lines read.
+ * With more than one thread, the lines are parsed by the threads into tables of their own,
+ * which are then sorted and merged into indata.
+ */
+long ocReadData(LineReader *reader, VariableList *vars, Table *indata, LostVar *lostvarp, int threadCount) {
+    char line[MAXLINE];
+    int lineno = 0;
+    long l = 0;
+    bool gotLine = reader->getLine(line, &lineno);
+    if (!gotLine) {
+        printf("No data\n");
+        return false;
+    }
+    DataLineParser parser(vars, lostvarp, true);
+    std::vector<DataPart> parts(threadCount > 1 ? threadCount : 0);
+    Table *lineTable = indata;
+    if (!parts.empty()) {
+        lineTable = new Table(vars->getKeySize(), 64);
+        for (int t = 0; t < threadCount; t++)
+            parts[t].table = new Table(vars->getKeySize(), 64);
+    }
+    while (gotLine) {
+        l++;
+        parser.parse(line, lineno, lineTable);
+        if (!parts.empty())
+            l += readDataBlocks(reader, vars, lostvarp, &parser, lineTable, parts, &lineno);
+
+        gotLine = reader->getLine(line, &lineno);
         //-- see if there is test data; if so, stop here
         if (strcmp(line, ":test") == 0)
             break;
@@ -169,9 +394,20 @@ long ocReadData(FILE *fin, VariableList *vars, Table *indata, LostVar *lostvarp)
             break;
         }
     }
-    delete[] indices;
-    delete[] values;
-    delete[] key;
+    if (!parts.empty()) {
+        std::vector<Table*> tables(1, lineTable);
+        for (int t = 0; t < threadCount; t++)
+            tables.push_back(parts[t].table);
+        std::vector<std::thread> sorters;
+        for (int t = 1; t < (int) tables.size(); t++)
+            sorters.push_back(std::thread(&Table::sortAndMerge, tables[t]));
+        tables[0]->sortAndMerge();
+        for (int t = 0; t < (int) sorters.size(); t++)
+            sorters[t].join();
+        mergeTables(indata, tables);
+        for (int t = 0; t < (int) tables.size(); t++)
+            delete tables[t];
+    }
     return l;
 }
 
@@ -618,24 +854,255 @@ int ocReadFile(FILE *fd, Options *options, Table **indata, Table **testdata, Var
     int dataLines = 0;
     int testLines = 0;
     *vars = varp = new VariableList(8);
+    LineReader reader(fd);
     if (fd) {
-        options->readOptions(fd);
+        options->readOptions(&reader);
     }
+    double threads;
+    if (!options->getOptionFloat("read-threads", NULL, &threads))
+        threads = 1.0;
+    int threadCount = (int) threads;
+    if (threadCount <= 0)
+        threadCount = std::thread::hardware_concurrency();
     ocRebinDefineVar(options, varp, &lostvarp);
     //-- If not at end of file, there is data in this file
-    if (!feof(fd)) {
+    if (!reader.atEnd()) {
         *indata = indatap = new Table(varp->getKeySize(), 64);
-        dataLines = ocReadData(fd, varp, indatap, lostvarp);
-        indatap->sort();
+        dataLines = ocReadData(&reader, varp, indatap, lostvarp, threadCount);
+        indatap->sortAndMerge();
     }
     //-- If there's still data, then it must be test data
-    if (!feof(fd)) {
+    if (!reader.atEnd()) {
         *testdata = testdatap = new Table(varp->getKeySize(), 64);
-        testLines = ocReadData(fd, varp, testdatap, lostvarp);
-        testdatap->sort();
+        testLines = ocReadData(&reader, varp, testdatap, lostvarp, threadCount);
+        testdatap->sortAndMerge();
     }
     bool result = varp->checkCardinalities();
     if (result == false)
         exit(1);
     return dataLines;
 }
+
+/*
+ * Binary data files. The file starts with a BinaryHeader, followed by the options and
+ * variable definitions, and then the data and test tuples in the storage layout of
+ * Table, so that they can be mapped directly. Strings are NUL-terminated, and numbers
+ * are in the byte order of the machine which wrote the file.
+ */
+static const char BINARY_MAGIC[8] = { 'O', 'C', 'C', 'A', 'M', 'B', 'I', 'N' };
+const int32_t BINARY_VERSION = 1;
+const int32_t BINARY_BYTE_ORDER = 0x01020304;
+
+struct BinaryHeader {
+        char magic[8];
+        int32_t version;
+        int32_t byteOrder;
+        int32_t keySegmentBytes;
+        int32_t valueBytes;
+        int32_t keysize;
+        int32_t varCount;
+        int32_t optionCount;
+        int32_t dataLines;
+        int64_t metaBytes; // options and variables, following the header
+        int64_t dataOffset;
+        int64_t dataCount;
+        int64_t testOffset; // 0 if there is no test data
+        int64_t testCount;
+};
+
+static void putInt(std::string &buf, int32_t value) {
+    buf.append((const char *) &value, sizeof(value));
+}
+
+static void putString(std::string &buf, const char *value) {
+    buf.append(value, strlen(value) + 1);
+}
+
+static bool getInt(const char **cp, const char *end, int32_t *value) {
+    if (end - *cp < (long) sizeof(*value))
+        return false;
+    memcpy(value, *cp, sizeof(*value));
+    *cp += sizeof(*value);
+    return true;
+}
+
+static bool getString(const char **cp, const char *end, const char **value) {
+    const char *nul = (const char *) memchr(*cp, '\0', end - *cp);
+    if (nul == NULL)
+        return false;
+    *value = *cp;
+    *cp = nul + 1;
+    return true;
+}
+
+static int64_t alignOffset(int64_t offset) {
+    return (offset + 7) & ~(int64_t) 7;
+}
+
+//-- write zeros up to the given (aligned) offset
+static bool padTo(FILE *fd, int64_t offset) {
+    static const char padding[8] = { 0 };
+    size_t count = offset - ftell(fd);
+    return fwrite(padding, 1, count, fd) == count;
+}
+
+bool ocIsBinaryFile(FILE *fd) {
+    char magic[sizeof(BINARY_MAGIC)];
+    bool result = fread(magic, sizeof(magic), 1, fd) == 1 && memcmp(magic, BINARY_MAGIC, sizeof(magic)) == 0;
+    rewind(fd);
+    return result;
+}
+
+bool ocWriteBinaryFile(const char *fname, Options *options, Table *indata, Table *testdata, VariableList *vars,
+        int dataLines) {
+    BinaryHeader header;
+    memset(&header, 0, sizeof(header));
+    memcpy(header.magic, BINARY_MAGIC, sizeof(header.magic));
+    header.version = BINARY_VERSION;
+    header.byteOrder = BINARY_BYTE_ORDER;
+    header.keySegmentBytes = sizeof(KeySegment);
+    header.valueBytes = sizeof(ocTupleValue);
+    header.keysize = vars->getKeySize();
+    header.varCount = vars->getVarCount();
+    header.dataLines = dataLines;
+
+    //-- options, except those which only apply to this run
+    std::string meta;
+    void *next = NULL;
+    const char *name, *value;
+    while (options->getNextOption(&next, &name, &value)) {
+        if (strcmp(name, "datafile") == 0 || strcmp(name, "compile-data") == 0)
+            continue;
+        putString(meta, name);
+        putString(meta, value);
+        header.optionCount++;
+    }
+    //-- variables, with their key layout (the cardinality may have been reduced
+    //-- after the layout was computed, so it can't be recomputed from that)
+    for (int i = 0; i < header.varCount; i++) {
+        Variable *var = vars->getVariable(i);
+        putString(meta, var->name);
+        putString(meta, var->abbrev);
+        putInt(meta, var->cardinality);
+        putInt(meta, var->old_card);
+        putInt(meta, var->dv);
+        putInt(meta, var->rebin);
+        putInt(meta, var->segment);
+        putInt(meta, var->shift);
+        putInt(meta, var->size);
+        meta.append((const char *) &var->mask, sizeof(var->mask));
+        int valueCount = 0;
+        while (valueCount < var->cardinality && var->valmap[valueCount] != NULL)
+            valueCount++;
+        putInt(meta, valueCount);
+        for (int j = 0; j < valueCount; j++)
+            putString(meta, var->valmap[j]);
+    }
+    header.metaBytes = meta.size();
+
+    int64_t tupleBytes = header.keysize * sizeof(KeySegment) + sizeof(ocTupleValue);
+    header.dataOffset = alignOffset(sizeof(header) + header.metaBytes);
+    header.dataCount = indata->getTupleCount();
+    if (testdata) {
+        header.testOffset = alignOffset(header.dataOffset + tupleBytes * header.dataCount);
+        header.testCount = testdata->getTupleCount();
+    }
+
+    FILE *fd = fopen(fname, "wb");
+    if (fd == NULL) {
+        printf("ERROR: couldn't open %s\n", fname);
+        return false;
+    }
+    bool ok = fwrite(&header, sizeof(header), 1, fd) == 1 && fwrite(meta.data(), 1, meta.size(), fd) == meta.size();
+    ok = ok && padTo(fd, header.dataOffset);
+    ok = ok && indata->writeTuples(fd);
+    if (testdata) {
+        ok = ok && padTo(fd, header.testOffset);
+        ok = ok && testdata->writeTuples(fd);
+    }
+    ok = (fclose(fd) == 0) && ok;
+    if (!ok)
+        printf("ERROR: couldn't write %s\n", fname);
+    return ok;
+}
+
+int ocReadBinaryFile(FILE *fd, Options *options, Table **indata, Table **testdata, VariableList **vars) {
+    BinaryHeader header;
+    if (fread(&header, sizeof(header), 1, fd) != 1 || memcmp(header.magic, BINARY_MAGIC, sizeof(header.magic)) != 0) {
+        printf("ERROR: not an OCCAM binary data file\n");
+        return 0;
+    }
+    if (header.version != BINARY_VERSION || header.byteOrder != BINARY_BYTE_ORDER
+            || header.keySegmentBytes != sizeof(KeySegment) || header.valueBytes != sizeof(ocTupleValue)) {
+        printf("ERROR: binary data file is from another version of OCCAM or another kind of machine.\n");
+        printf("It must be recreated from the original data file.\n");
+        return 0;
+    }
+    int64_t tupleBytes = header.keysize * sizeof(KeySegment) + sizeof(ocTupleValue);
+    int64_t fileBytes = header.testOffset ? header.testOffset + tupleBytes * header.testCount
+            : header.dataOffset + tupleBytes * header.dataCount;
+    struct stat status;
+    if (fstat(fileno(fd), &status) != 0 || status.st_size < fileBytes) {
+        printf("ERROR: binary data file is truncated\n");
+        return 0;
+    }
+
+    char *meta = new char[header.metaBytes];
+    const char *cp = meta, *end = meta + header.metaBytes;
+    bool ok = fread(meta, 1, header.metaBytes, fd) == (size_t) header.metaBytes;
+    for (int i = 0; ok && i < header.optionCount; i++) {
+        const char *name, *value;
+        ok = getString(&cp, end, &name) && getString(&cp, end, &value);
+        if (ok) {
+            ocOptionDef *def = options->findOptionByName(name);
+            if (def == NULL)
+                printf("Warning: option '%s' not recognized\n", name);
+            else
+                options->setOptionString(def, value);
+        }
+    }
+    VariableList *varp = *vars = new VariableList(header.varCount > 0 ? header.varCount : 1);
+    for (int i = 0; ok && i < header.varCount; i++) {
+        const char *name, *abbrev;
+        int32_t cardinality, old_card, dv, rebin, segment, shift, size, valueCount;
+        ok = getString(&cp, end, &name) && getString(&cp, end, &abbrev) && getInt(&cp, end, &cardinality)
+                && getInt(&cp, end, &old_card) && getInt(&cp, end, &dv) && getInt(&cp, end, &rebin)
+                && getInt(&cp, end, &segment) && getInt(&cp, end, &shift) && getInt(&cp, end, &size)
+                && end - cp >= (long) sizeof(KeySegment);
+        if (!ok)
+            break;
+        varp->addVariable(name, abbrev, cardinality, dv, rebin, old_card);
+        Variable *var = varp->getVariable(i);
+        var->segment = segment;
+        var->shift = shift;
+        var->size = size;
+        memcpy(&var->mask, cp, sizeof(KeySegment));
+        cp += sizeof(KeySegment);
+        ok = getInt(&cp, end, &valueCount) && valueCount <= cardinality;
+        for (int j = 0; ok && j < valueCount; j++) {
+            const char *value;
+            ok = getString(&cp, end, &value);
+            if (ok) {
+                var->valmap[j] = new char[strlen(value) + 1];
+                strcpy(var->valmap[j], value);
+            }
+        }
+    }
+    delete[] meta;
+    if (!ok || varp->getKeySize() != header.keysize) {
+        printf("ERROR: binary data file is damaged\n");
+        return 0;
+    }
+
+    *indata = new Table(header.keysize, 1);
+    ok = (*indata)->mapTuples(fileno(fd), header.dataOffset, header.dataCount);
+    if (ok && header.testOffset) {
+        *testdata = new Table(header.keysize, 1);
+        ok = (*testdata)->mapTuples(fileno(fd), header.testOffset, header.testCount);
+    }
+    if (!ok) {
+        printf("ERROR: couldn't map data from binary data file\n");
+        return 0;
+    }
+    return header.dataLines;
+}
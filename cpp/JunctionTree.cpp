@@ -0,0 +1,320 @@
+/*
+ * Copyright © 1990 The Portland State University OCCAM Project Team
+ * [This program is licensed under the GPL version 3 or later.]
+ * Please see the file LICENSE in the source
+ * distribution of this software for license terms.
+ */
+
+#include "Constants.h"
+#include "JunctionTree.h"
+#include "Key.h"
+#include "Model.h"
+#include "Relation.h"
+#include "Table.h"
+#include "VariableList.h"
+
+#include <float.h>
+#include <limits.h>
+#include <math.h>
+#include <algorithm>
+#include <iterator>
+
+JunctionTree::JunctionTree(Model *model, VariableList *vars, double maxStates) {
+    this->model = model;
+    varList = vars;
+    valid = false;
+    if (maxStates > INT_MAX)
+        maxStates = INT_MAX;
+
+    //-- the graph of the model: two variables are joined if they are in some relation
+    int varCount = vars->getVarCount();
+    std::vector<std::vector<char> > adj(varCount, std::vector<char>(varCount, 0));
+    int relCount = model->getRelationCount();
+    for (int r = 0; r < relCount; r++) {
+        Relation *rel = model->getRelation(r);
+        int count = rel->getVariableCount();
+        for (int i = 0; i < count; i++)
+            for (int j = 0; j < count; j++)
+                adj[rel->getVariable(i)][rel->getVariable(j)] = 1;
+    }
+
+    //-- triangulate by eliminating variables one at a time, each time taking the one whose
+    //-- clique (the variable and its remaining neighbors) has the fewest states, and then
+    //-- the one which adds the fewest edges. The cliques of the triangulated graph are
+    //-- among the cliques made this way.
+    std::vector<char> eliminated(varCount, 0);
+    std::vector<std::vector<int> > candidates;
+    for (int step = 0; step < varCount; step++) {
+        int best = -1;
+        double bestStates = 0;
+        long bestFill = 0;
+        for (int v = 0; v < varCount; v++) {
+            if (eliminated[v])
+                continue;
+            double states = vars->getVariable(v)->cardinality;
+            long fill = 0;
+            for (int u = 0; u < varCount; u++) {
+                if (u == v || eliminated[u] || !adj[v][u])
+                    continue;
+                states *= vars->getVariable(u)->cardinality;
+                for (int w = u + 1; w < varCount; w++) {
+                    if (w != v && !eliminated[w] && adj[v][w] && !adj[u][w])
+                        fill++;
+                }
+            }
+            if (best < 0 || states < bestStates || (states == bestStates && fill < bestFill)) {
+                best = v;
+                bestStates = states;
+                bestFill = fill;
+            }
+        }
+        if (bestStates > maxStates)
+            return;
+        std::vector<int> clique;
+        for (int u = 0; u < varCount; u++) {
+            if (u == best || (!eliminated[u] && adj[best][u]))
+                clique.push_back(u);
+        }
+        for (size_t i = 0; i < clique.size(); i++)
+            for (size_t j = 0; j < clique.size(); j++)
+                adj[clique[i]][clique[j]] = 1;
+        eliminated[best] = 1;
+        candidates.push_back(clique);
+    }
+
+    //-- keep the maximal cliques (the first of any duplicates)
+    for (size_t i = 0; i < candidates.size(); i++) {
+        bool maximal = true;
+        for (size_t j = 0; j < candidates.size() && maximal; j++) {
+            if (i == j || candidates[j].size() < candidates[i].size())
+                continue;
+            if (candidates[j].size() == candidates[i].size() && j > i)
+                continue;
+            if (std::includes(candidates[j].begin(), candidates[j].end(), candidates[i].begin(), candidates[i].end()))
+                maximal = false;
+        }
+        if (maximal) {
+            Clique clique;
+            clique.vars = candidates[i];
+            clique.values.resize(stateCount(clique.vars));
+            cliques.push_back(clique);
+        }
+    }
+
+    //-- join the cliques into a tree which maximizes the separator sizes (Prim's algorithm);
+    //-- this gives the running intersection property. Unconnected parts of the model are
+    //-- joined by empty separators.
+    int cliqueCount = cliques.size();
+    cliqueSeparators.resize(cliqueCount);
+    std::vector<char> inTree(cliqueCount, 0);
+    inTree[0] = 1;
+    for (int added = 1; added < cliqueCount; added++) {
+        int bestA = -1, bestB = -1;
+        long bestSize = -1;
+        for (int a = 0; a < cliqueCount; a++) {
+            if (!inTree[a])
+                continue;
+            for (int b = 0; b < cliqueCount; b++) {
+                if (inTree[b])
+                    continue;
+                std::vector<int> common;
+                std::set_intersection(cliques[a].vars.begin(), cliques[a].vars.end(), cliques[b].vars.begin(),
+                        cliques[b].vars.end(), std::back_inserter(common));
+                if ((long) common.size() > bestSize) {
+                    bestA = a;
+                    bestB = b;
+                    bestSize = common.size();
+                }
+            }
+        }
+        Separator sep;
+        std::vector<int> sepVars;
+        std::set_intersection(cliques[bestA].vars.begin(), cliques[bestA].vars.end(), cliques[bestB].vars.begin(),
+                cliques[bestB].vars.end(), std::back_inserter(sepVars));
+        sep.cliques[0] = bestA;
+        sep.cliques[1] = bestB;
+        makeIndex(cliques[bestA].vars, sepVars, sep.index[0]);
+        makeIndex(cliques[bestB].vars, sepVars, sep.index[1]);
+        sep.values.resize(stateCount(sepVars));
+        cliqueSeparators[bestA].push_back(separators.size());
+        cliqueSeparators[bestB].push_back(separators.size());
+        separators.push_back(sep);
+        inTree[bestB] = 1;
+    }
+
+    //-- each relation is fit in the smallest clique which contains it
+    int keysize = vars->getKeySize();
+    for (int r = 0; r < relCount; r++) {
+        Relation *rel = model->getRelation(r);
+        std::vector<int> relVars(rel->getVariables(), rel->getVariables() + rel->getVariableCount());
+        Margin margin;
+        margin.clique = -1;
+        for (int c = 0; c < cliqueCount; c++) {
+            if (std::includes(cliques[c].vars.begin(), cliques[c].vars.end(), relVars.begin(), relVars.end())
+                    && (margin.clique < 0 || cliques[c].values.size() < cliques[margin.clique].values.size()))
+                margin.clique = c;
+        }
+        makeIndex(cliques[margin.clique].vars, relVars, margin.index);
+        long long relCells = stateCount(relVars);
+        margin.target.assign(relCells, 0.0);
+        margin.proj.resize(relCells);
+        Table *table = rel->getTable();
+        long long tupleCount = table ? table->getTupleCount() : 0;
+        for (long long i = 0; i < tupleCount; i++) {
+            KeySegment *key = table->getKey(i);
+            long long cell = 0;
+            for (size_t k = 0; k < relVars.size(); k++)
+                cell = cell * vars->getVariable(relVars[k])->cardinality
+                        + Key::getKeyValue(key, keysize, vars, relVars[k]);
+            margin.target[cell] = table->getValue(i);
+        }
+        margins.push_back(margin);
+    }
+    valid = true;
+}
+
+JunctionTree::~JunctionTree() {
+}
+
+long long JunctionTree::stateCount(const std::vector<int> &vars) {
+    long long count = 1;
+    for (size_t k = 0; k < vars.size(); k++)
+        count *= varList->getVariable(vars[k])->cardinality;
+    return count;
+}
+
+//-- Cells are numbered in mixed radix over the variables, the last varying fastest. This
+//-- maps each cell over the variables in from to the matching cell over those in to, which
+//-- must be a subset of them.
+void JunctionTree::makeIndex(const std::vector<int> &from, const std::vector<int> &to, std::vector<int> &index) {
+    int count = from.size();
+    std::vector<int> cards(count), digits(count, 0);
+    std::vector<long long> strides(count, 0);
+    long long toCells = 1;
+    for (int k = count - 1; k >= 0; k--) {
+        cards[k] = varList->getVariable(from[k])->cardinality;
+        if (std::binary_search(to.begin(), to.end(), from[k])) {
+            strides[k] = toCells;
+            toCells *= cards[k];
+        }
+    }
+    long long cells = stateCount(from);
+    index.resize(cells);
+    long long cell = 0;
+    for (long long i = 0; i < cells; i++) {
+        index[i] = (int) cell;
+        for (int k = count - 1; k >= 0; k--) {
+            cell += strides[k];
+            if (++digits[k] < cards[k])
+                break;
+            digits[k] = 0;
+            cell -= strides[k] * cards[k];
+        }
+    }
+}
+
+//-- After a clique has changed, pass its new marginals on through the rest of the tree,
+//-- so that every clique and separator table is again the marginal of the fit.
+void JunctionTree::distribute(int clique) {
+    std::vector<std::pair<int, int> > stack; // clique, separator it was reached by
+    stack.push_back(std::make_pair(clique, -1));
+    std::vector<double> newValues;
+    while (!stack.empty()) {
+        int c = stack.back().first;
+        int from = stack.back().second;
+        stack.pop_back();
+        for (size_t k = 0; k < cliqueSeparators[c].size(); k++) {
+            int s = cliqueSeparators[c][k];
+            if (s == from)
+                continue;
+            Separator &sep = separators[s];
+            int side = sep.cliques[0] == c ? 0 : 1;
+            std::vector<double> &values = cliques[c].values;
+            std::vector<int> &index = sep.index[side];
+            newValues.assign(sep.values.size(), 0.0);
+            for (size_t i = 0; i < values.size(); i++)
+                newValues[index[i]] += values[i];
+            int d = sep.cliques[1 - side];
+            std::vector<double> &other = cliques[d].values;
+            std::vector<int> &otherIndex = sep.index[1 - side];
+            for (size_t i = 0; i < other.size(); i++) {
+                double oldValue = sep.values[otherIndex[i]];
+                other[i] = oldValue > 0 ? other[i] * newValues[otherIndex[i]] / oldValue : 0.0;
+            }
+            sep.values.swap(newValues);
+            stack.push_back(std::make_pair(d, s));
+        }
+    }
+}
+
+//-- Fit one relation in its clique, scaling the clique so its marginal over the relation's
+//-- variables is that of the data, and pass the change on. Returns the largest difference
+//-- between the two before scaling.
+double JunctionTree::adjust(Margin &margin) {
+    std::vector<double> &values = cliques[margin.clique].values;
+    std::vector<int> &index = margin.index;
+    std::fill(margin.proj.begin(), margin.proj.end(), 0.0);
+    for (size_t i = 0; i < values.size(); i++)
+        margin.proj[index[i]] += values[i];
+    double maxError = 0;
+    for (size_t j = 0; j < margin.proj.size(); j++) {
+        if (margin.target[j] > DBL_EPSILON)
+            maxError = fmax(maxError, fabs(margin.target[j] - margin.proj[j]));
+    }
+    for (size_t i = 0; i < values.size(); i++) {
+        double relValue = margin.target[index[i]];
+        double projValue = margin.proj[index[i]];
+        if (relValue > DBL_EPSILON && projValue > DBL_EPSILON)
+            values[i] = values[i] * relValue / projValue;
+        else
+            values[i] = 0.0;
+    }
+    distribute(margin.clique);
+    return maxError;
+}
+
+int JunctionTree::fit(double maxDev, double maxIterations, double *error) {
+    //-- start where makeFitTableIPF does, from the orthogonal expansion of the relation with
+    //-- the smallest expansion: that is the uniform distribution fit to that relation
+    for (size_t c = 0; c < cliques.size(); c++)
+        cliques[c].values.assign(cliques[c].values.size(), 1.0 / cliques[c].values.size());
+    for (size_t s = 0; s < separators.size(); s++)
+        separators[s].values.assign(separators[s].values.size(), 1.0 / separators[s].values.size());
+    int startRel = 0;
+    for (int r = 1; r < (int) margins.size(); r++) {
+        if (model->getRelation(r)->getExpansionSize() < model->getRelation(startRel)->getExpansionSize())
+            startRel = r;
+    }
+    adjust(margins[startRel]);
+
+    int iter;
+    double maxError = 0;
+    for (iter = 0; iter < maxIterations; iter++) {
+        maxError = 0;
+        for (size_t m = 0; m < margins.size(); m++)
+            maxError = fmax(maxError, adjust(margins[m]));
+        if (maxError < maxDev)
+            break;
+    }
+    *error = maxError;
+    return iter;
+}
+
+double JunctionTree::entropy() {
+    double h = 0.0;
+    for (size_t c = 0; c < cliques.size(); c++) {
+        std::vector<double> &values = cliques[c].values;
+        for (size_t i = 0; i < values.size(); i++) {
+            if (values[i] > PROB_MIN)
+                h -= values[i] * log(values[i]);
+        }
+    }
+    for (size_t s = 0; s < separators.size(); s++) {
+        std::vector<double> &values = separators[s].values;
+        for (size_t i = 0; i < values.size(); i++) {
+            if (values[i] > PROB_MIN)
+                h += values[i] * log(values[i]);
+        }
+    }
+    return h / log(2.0);
+}
@@ -6,11 +6,17 @@
  */
 
 #define _GNU_SOURCE
+#include <atomic>
+#include <thread>
+#include <unordered_map>
 #include <utility>
+#include <vector>
 #include <gmp.h>
 #include <fenv.h>
 #include <math.h>
+#include "AttributeList.h"
 #include "Input.h"
+#include "JunctionTree.h"
 #include "Key.h"
 #include "ManagerBase.h"
 #include "Math.h"
@@ -20,6 +26,7 @@
 #include "RelCache.h"
 #include "Relation.h"
 #include "StateConstraint.h"
+#include "StatsCache.h"
 #include "VariableList.h"
 #include "_Core.h"
 
@@ -144,6 +151,8 @@ ManagerBase::ManagerBase(VariableList *vars, Table *input) :
 
     topRef = bottomRef = refModel = NULL;
     relCache = new RelCache;
+    holdTables = false;
+    statsCache = NULL;
     modelCache = new ModelCache;
     sampleSize = 0;
     testSampleSize = 0;
@@ -153,15 +162,15 @@ ManagerBase::ManagerBase(VariableList *vars, Table *input) :
     dataLines = 0;
     fitTable1 = NULL;
     fitTable2 = NULL;
+    fitTableModel = NULL;
+    shareFit = false;
+    bottomRefP2 = -1;
     projTable = NULL;
     inputData = testData = NULL;
     DVOrder = NULL;
     searchDirection = Direction::Ascending;
     useInverseNotation = 0;
     valuesAreFunctions = false;
-    intersectArray = NULL;
-    intersectCount = 0;
-    intersectMax = 1;
     functionConstant = 0;
     negativeConstant = 0;
     signal(SIGSEGV, segfault_handler);
@@ -179,11 +188,11 @@ ManagerBase::~ManagerBase() {
     if (fitTable1) delete fitTable1;
     if (fitTable2) delete fitTable2;
     if (projTable) delete projTable;
-    if (intersectArray) delete[] intersectArray;
     if (DVOrder) delete[] DVOrder;
     delete options;
     delete modelCache;
     delete relCache;
+    if (statsCache) delete statsCache;
     if (varList) delete varList;
 }
 
@@ -271,7 +280,7 @@ Relation *ManagerBase::getRelation(int *input_vars, int varcount, bool make_proj
             rel->addVariable(varindices[i], stateindices[i]);
         }
         if (!relCache->addRelation(rel)) {
-            Relation *cached_rel = relCache->findRelation(rel->getPrintName());
+            Relation *cached_rel = relCache->findRelation(rel);
             delete rel;
             rel = cached_rel;
         } else {
@@ -298,7 +307,7 @@ Relation *ManagerBase::getRelation(int *input_vars, int varcount, bool make_proj
             rel->addVariable(varindices[i]);
         }
         if (!relCache->addRelation(rel)) {
-            Relation *cached_rel = relCache->findRelation(rel->getPrintName());
+            Relation *cached_rel = relCache->findRelation(rel);
             delete rel;
             rel = cached_rel;
         }
@@ -330,8 +339,13 @@ Relation *ManagerBase::getChildRelation(Relation *rel, int skip, bool makeProjec
 // This function is a special case of the other makeProjection(), further below.
 // It projects the input data into the table for a relation.
 bool ManagerBase::makeProjection(Relation *rel) {
-    if (rel->getTable())
+    if (rel->getTable()) {
+        //-- while tables are held, they are all pinned, and the fits which use them may be
+        //-- running on several threads; so the cache's recency list isn't touched then
+        if (!holdTables)
+            relCache->useTable(rel);
         return true; // table already computed
+    }
 
     //-- create the projection data for a given relation. Go through
     //-- the inputData, and for each tuple, sum it into the table for the relation.
@@ -343,6 +357,7 @@ bool ManagerBase::makeProjection(Relation *rel) {
     Table *table = new Table(keysize, start_size);
     rel->setTable(table);
     makeProjection(inputData, table, rel);
+    relCache->addTable(rel);
     return true;
 }
 
@@ -538,24 +553,13 @@ int ManagerBase::getDvOrder(int index) {
     return NULL;
 }
 
-static double *sort_freq;
-static Variable *sort_dv_var;
-int sortDV(const void *d1, const void *d2) {
-    int a = *(int*) d1;
-    int b = *(int*) d2;
-    // Would prefer to use DBL_EPSILON here, but the frequencies we get for DV values (from the bottom reference)
-    // are not precise enough for some reason.
-    if (fabs(sort_freq[a] - sort_freq[b]) < 1e-10) {
-        return strcmp(sort_dv_var->valmap[a], sort_dv_var->valmap[b]);
-    }
-    if (sort_freq[a] > sort_freq[b]) {
-        return -1;
-    }
-    if (sort_freq[a] < sort_freq[b]) {
-        return 1;
-    }
-    // Put this again, just in case.
-    return strcmp(sort_dv_var->valmap[a], sort_dv_var->valmap[b]);
+//-- order DV values by descending frequency, then by name, then by index. The frequencies
+//-- have been rounded (see createDvOrder), so they can be compared exactly.
+static bool sortDV(double *freq, Variable *dv_var, int a, int b) {
+    if (freq[a] != freq[b])
+        return freq[a] > freq[b];
+    int cmp = strcmp(dv_var->valmap[a], dv_var->valmap[b]);
+    return cmp != 0 ? cmp < 0 : a < b;
 }
 
 void ManagerBase::createDvOrder() {
@@ -563,25 +567,34 @@ void ManagerBase::createDvOrder() {
         return;
     if (DVOrder != NULL)
         return;
-    sort_dv_var = varList->getVariable(varList->getDV());
-    int dv_card = sort_dv_var->cardinality;
+    Variable *dv_var = varList->getVariable(varList->getDV());
+    int dv_card = dv_var->cardinality;
     DVOrder = new int[dv_card];
     // Build an array of frequencies, taken from the dependent relation (from the bottom reference)
     long long k;
     Table *depTable;
     for (k = 0; k < bottomRef->getRelationCount(); ++k) {
         if (!bottomRef->getRelation(k)->isIndependentOnly()) {
+            makeProjection(bottomRef->getRelation(k));
             depTable = bottomRef->getRelation(k)->getTable();
             break;
         }
     }
-    sort_freq = new double[dv_card];
+    double *freq = new double[dv_card]();
     for (k = 0; k < depTable->getTupleCount(); ++k) {
-        sort_freq[Key::getKeyValue(depTable->getKey(k), keysize, varList, varList->getDV())] = depTable->getValue(k);
+        freq[Key::getKeyValue(depTable->getKey(k), keysize, varList, varList->getDV())] = depTable->getValue(k);
     }
-    for (int i = 0; i < dv_card; ++i)
+    // Would prefer to use DBL_EPSILON here, but the frequencies we get for DV values (from the bottom reference)
+    // are not precise enough for some reason; so they are rounded to 1e-10, and values which round
+    // the same are ordered by name.
+    for (int i = 0; i < dv_card; ++i) {
         DVOrder[i] = i;
-    qsort(DVOrder, dv_card, sizeof(int), sortDV);
+        freq[i] = round(freq[i] * 1e10);
+    }
+    std::sort(DVOrder, DVOrder + dv_card, [freq, dv_var](int a, int b) {
+        return sortDV(freq, dv_var, a, b);
+    });
+    delete[] freq;
 }
 
 // Creates a product of the cardinalities of any variables missing from the model
@@ -683,6 +696,11 @@ bool ManagerBase::makeProjections(Model *model) {
         if (!makeProjection(model->getRelation(i)))
             return false;
     }
+    //-- the model's tables are now the most recently used, so if the cache is over
+    //-- its budget, older tables can go. This is only done here, where callers don't
+    //-- hold on to tables of other relations.
+    if (!holdTables)
+        relCache->trimTables(count);
     return true;
 }
 
@@ -694,28 +712,62 @@ bool ManagerBase::deleteModelFromCache(Model *model) {
     return modelCache->deleteModel(model);
 }
 
+//-- the settings which the cached statistics of the model depend on, besides the data
+static void statsSettingsKey(ManagerBase *mgr, Model *model, char *key, int maxLength) {
+    unsigned long long hash = StatsCache::hash(mgr->getRefModel() ? mgr->getRefModel()->getPrintName() : "");
+    double values[13] = { (double) mgr->getSearchDirection(), -1, -1, -1,
+            mgr->getFunctionConstant(), mgr->getNegativeConstant(), -1, -1, -1,
+            (double) mgr->getDDFMethod(), (double) mgr->getValuesAreFunctions(),
+            (double) model->isStateBased(), -1 };
+    mgr->getOptionFloat("ipf-maxit", NULL, &values[1]);
+    mgr->getOptionFloat("ipf-maxdev", NULL, &values[2]);
+    mgr->getOptionFloat("palpha", NULL, &values[3]);
+    mgr->getOptionFloat("ipf-warm-start", NULL, &values[6]);
+    mgr->getOptionFloat("ipf-accelerate", NULL, &values[7]);
+    mgr->getOptionFloat("ipf-junction-tree", NULL, &values[8]);
+    mgr->getOptionFloat("alpha", NULL, &values[12]);
+    hash = StatsCache::hash(values, sizeof(values), hash);
+    snprintf(key, maxLength, "%016llx", hash);
+}
+
+bool ManagerBase::loadCachedStatistics(Model *model, const char *attr) {
+    if (statsCache == NULL || model == NULL)
+        return false;
+    char key[17];
+    statsSettingsKey(this, model, key, sizeof(key));
+    bool had = attr && model->getAttributeList()->getAttributeIndex(attr) >= 0;
+    statsCache->load(key, model);
+    return attr && !had && model->getAttributeList()->getAttributeIndex(attr) >= 0;
+}
+
+void ManagerBase::saveCachedStatistics(Model *model) {
+    if (statsCache == NULL || model == NULL)
+        return;
+    char key[17];
+    statsSettingsKey(this, model, key, sizeof(key));
+    statsCache->save(key, model);
+}
+
 //-- intersect two variable lists, producing a third. returns true if intersection
 //-- is not empty, and returns the list and count of common variables
 static bool intersect(Relation *rel1, Relation *rel2, int* &var, int &count) {
-    int *var1, *var2;
-    int count1, count2;
-    count1 = rel1->getVariableCount();
-    var1 = rel1->getVariables();
-    count2 = rel2->getVariableCount();
-    var2 = rel2->getVariables();
+    int words1 = rel1->getVarBitWords(), words2 = rel2->getVarBitWords();
+    unsigned long long *bits1 = rel1->getVarBits(), *bits2 = rel2->getVarBits();
 
     var = NULL;
     count = 0;
-    for (int i = 0; i < count1; i++) {
-        for (int j = 0; j < count2; j++) {
-            if (var1[i] == var2[j]) {
-                if (var == NULL)
-                    var = new int[count1]; //this is sure to be large enough
-                var[count++] = var1[i];
-            }
+    if (!ocIntersectsBits(words1, bits1, words2, bits2))
+        return false;
+    int words = words1 < words2 ? words1 : words2;
+    var = new int[rel1->getVariableCount()]; //this is sure to be large enough
+    for (int w = 0; w < words; w++) {
+        unsigned long long common = bits1[w] & bits2[w];
+        for (int b = 0; common; b++, common >>= 1) {
+            if (common & 1)
+                var[count++] = w * 64 + b;
         }
     }
-    return var != NULL;
+    return true;
 }
 
 
@@ -748,11 +800,15 @@ void ManagerBase::expandTuple(double tupleValue, KeySegment *key, int *missingVa
 }
 
 void ManagerBase::makeOrthoExpansion(Relation *rel, Table *outTable) {
+    makeProjection(rel);
+    makeOrthoExpansion(rel, rel->getTable(), outTable);
+}
+
+void ManagerBase::makeOrthoExpansion(Relation *rel, Table *relTable, Table *outTable) {
     //-- get an array of the variable indices which don't occur in the relation.
     int varCount = rel->getVariableList()->getVarCount();
     int missingVars[varCount];
     int missingCount = rel->copyMissingVariables(missingVars, varCount);
-    Table *relTable = rel->getTable();
 
     long long tupleCount = relTable->getTupleCount();
     outTable->reset(keysize);
@@ -861,10 +917,14 @@ double ManagerBase::computeH(Model *model, HMethod method, int SB) {
     if (loops) {
         h = model->getAttribute(ATTRIBUTE_FIT_H);
         if (h < 0) {
-            makeFitTable(model);
-            h = ocEntropy(fitTable1);
-            model->setAttribute(ATTRIBUTE_FIT_H, h);
-            model->setAttribute(ATTRIBUTE_H, h);
+            if (fitJunctionTree(model)) {
+                h = model->getAttribute(ATTRIBUTE_FIT_H);
+            } else {
+                makeFitTable(model);
+                h = ocEntropy(fitTable1);
+                model->setAttribute(ATTRIBUTE_FIT_H, h);
+                model->setAttribute(ATTRIBUTE_H, h);
+            }
         }
     } else {
         h = model->getAttribute(ATTRIBUTE_ALG_H);
@@ -919,12 +979,6 @@ struct DFAndHProc: public ocIntersectProcessor {
 void ManagerBase::calculateDfAndEntropy(Model *model) {
     if ((model->getAttribute(ATTRIBUTE_DF) < 0) || (model->getAttribute(ATTRIBUTE_ALG_H) < 0)) {
         DFAndHProc processor(this);
-        if (intersectArray != NULL) {
-            delete[] intersectArray;
-            intersectCount = 0;
-            intersectMax = model->getRelationCount();
-            intersectArray = NULL;
-        }
         doIntersectionProcessing(model, &processor);
         model->setAttribute(ATTRIBUTE_DF, processor.df);
         model->setAttribute(ATTRIBUTE_ALG_H, processor.h);
@@ -932,96 +986,143 @@ void ManagerBase::calculateDfAndEntropy(Model *model) {
 }
 
 void ManagerBase::doIntersectionProcessing(Model *model, ocIntersectProcessor *proc) {
-    //-- allocate intersect storage; this grows later if needed
-    if (intersectArray == NULL) {
-        intersectMax = model->getRelationCount();
-        intersectArray = new VarIntersect[intersectMax];
+    IntersectTerms *terms = getIntersectTerms(model);
+    std::vector<Relation*> own;
+    for (int i = 0; i < model->getRelationCount(); i++)
+        own.push_back(model->getRelation(i));
+    std::sort(own.begin(), own.end());
+    for (IntersectTerms::iterator it = terms->begin(); it != terms->end(); ++it) {
+        Relation *rel = it->first;
+        //-- projections are made for the intersections; the caller makes those it needs
+        //-- for the model's own relations
+        if (!std::binary_search(own.begin(), own.end(), rel))
+            makeProjection(rel);
+        proc->process(it->second > 0, rel, abs(it->second));
     }
-    int count = model->getRelationCount();
-    VariableList *varList = model->getRelation(0)->getVariableList();
+}
+
+//-- the intersection of two relations; NULL if they have no variables in common. Finding
+//-- the relation for the common variables is the costly part, so that is memoized.
+Relation *ManagerBase::intersectRelations(Relation *rel1, Relation *rel2) {
+    int *newvars, newcount;
+    if (!intersect(rel1, rel2, newvars, newcount))
+        return NULL;
+    if (rel2 < rel1)
+        std::swap(rel1, rel2);
+    std::pair<Relation*, Relation*> pair(rel1, rel2);
+    map<std::pair<Relation*, Relation*>, Relation*>::iterator it = intersectMemo.find(pair);
     Relation *rel;
-    int i, j, k;
-    //-- go through the relations in the model and create VarIntersect entries
-    for (i = 0; i < count; i++) {
-        rel = model->getRelation(i);
-        while (intersectCount >= intersectMax) {
-            intersectArray = (VarIntersect*) growStorage(intersectArray, sizeof(VarIntersect)*intersectMax, 2);
-            intersectMax *= 2;
+    if (it != intersectMemo.end()) {
+        rel = it->second;
+    } else {
+        rel = getRelation(newvars, newcount);
+        intersectMemo[pair] = rel;
+    }
+    delete[] newvars;
+    return rel;
+}
+
+static void addTerm(IntersectTerms &terms, Relation *rel, int count) {
+    for (IntersectTerms::iterator it = terms.begin(); it != terms.end(); ++it) {
+        if (it->first == rel) {
+            it->second += count;
+            return;
         }
-        VarIntersect *intersect = intersectArray + (intersectCount++);
-        intersect->rel = rel;
-        intersect->startIndex = i;
-        intersect->sign = true;
-        intersect->count = 1;
-        proc->process(intersect->sign, intersect->rel, intersect->count);
     }
-    int level0end = intersectCount;
-    bool sign = true;
-    bool match;
-
-    //-- given the previous level of intersection terms, construct the next level from
-    //-- all intersections among the previous level. When an intersection is found, we
-    //-- need to check the new intersections. If there is a match, we update its
-    //-- include count; if there is no match, we create a new one. This process
-    //-- terminates when no new terms have been added.
-    VarIntersect *ip, *jp, *newp;
-    VarIntersect *currentArray, *nextArray;
-    int currentCount, nextCount;
-    int nextMax;
-    int *newvars, newcount;
-    currentArray = intersectArray;
-    currentCount = intersectCount;
-    while (currentCount > 0) {
-        sign = !sign;
-        nextArray = new VarIntersect[intersectMax];
-        nextCount = 0;
-        nextMax = intersectMax;
-        for (i = 0; i < currentCount; i++) {
-            for (j = currentArray[i].startIndex + 1; j < level0end; j++) {
-                ip = currentArray + i;
-                jp = intersectArray + j;
-                if (intersect(ip->rel, jp->rel, newvars, newcount)) {
-                    rel = getRelation(newvars, newcount, true);
-                    proc->process(sign, rel, ip->count);
-                    // only add the relation to the intersect array if it has any potential for overlap.
-                    // (when j==(level0end-1), that relation can be part of no further overlaps)
-                    if (j < (level0end - 1)) {
-                        match = false;
-                        for (k = 0; k < nextCount; k++) {
-                            if ((nextArray[k].rel == rel) && (nextArray[k].startIndex == j)) {
-                                match = true;
-                                nextArray[k].count += ip->count;
-                                break;
-                            }
-                        }
-                        if (!match) {
-                            while (nextCount >= nextMax) {
-                                nextArray = (VarIntersect*) growStorage(nextArray, sizeof(VarIntersect)*nextMax, 2);
-                                nextMax *= 2;
-                            }
-                            newp = nextArray + (nextCount++);
-                            newp->rel = rel;
-                            newp->startIndex = j;
-                            newp->sign = sign;
-                            newp->count = ip->count;
-                        }
-                    }
-                    delete[] newvars;
-                }
-            }
+    terms.push_back(std::make_pair(rel, count));
+}
+
+//-- Add the inclusion-exclusion terms of a list of relations, times sign, using
+//-- IE(A1..An) = IE(A1..An-1) + An - IE(A1^An, ..., An-1^An). Empty intersections are
+//-- left out, as are variable-based relations contained in others (their terms cancel),
+//-- so the lists shrink quickly.
+void ManagerBase::addIntersectTerms(std::vector<Relation*> &rels, int sign, IntersectTerms &terms) {
+    std::vector<Relation*> family;
+    for (size_t i = 0; i < rels.size(); i++) {
+        bool contained = false;
+        for (size_t j = 0; j < rels.size() && !contained; j++) {
+            if (j == i)
+                continue;
+            if (rels[j] == rels[i])
+                contained = j < i;
+            else if (!rels[i]->isStateBased() && !rels[j]->isStateBased())
+                contained = rels[j]->contains(rels[i]);
         }
-        if (currentArray != intersectArray) {
-            delete[] currentArray;
+        if (!contained)
+            family.push_back(rels[i]);
+    }
+    std::vector<Relation*> common;
+    for (size_t n = 0; n < family.size(); n++) {
+        addTerm(terms, family[n], sign);
+        common.clear();
+        for (size_t i = 0; i < n; i++) {
+            Relation *rel = intersectRelations(family[i], family[n]);
+            if (rel)
+                common.push_back(rel);
         }
-        currentArray = nextArray;
-        nextArray = NULL;
-        currentCount = nextCount;
-    }
-    if (currentArray != intersectArray) {
-        delete[] currentArray;
+        if (!common.empty())
+            addIntersectTerms(common, -sign, terms);
     }
 }
 
+IntersectTerms *ManagerBase::getIntersectTerms(Model *model) {
+    IntersectTerms *terms = model->getIntersectTerms();
+    if (terms)
+        return terms;
+    terms = new IntersectTerms();
+    std::vector<Relation*> family, common;
+    for (int i = 0; i < model->getRelationCount(); i++)
+        family.push_back(model->getRelation(i));
+    std::sort(family.begin(), family.end());
+
+    //-- the progenitor's terms can be used if each of its relations which the model
+    //-- dropped is contained in one of the model's relations
+    Model *progen = model->getProgenitor();
+    bool fromProgen = progen && progen != model && progen->getIntersectTerms() && !model->isStateBased();
+    for (int i = 0; fromProgen && i < progen->getRelationCount(); i++) {
+        Relation *rel = progen->getRelation(i);
+        if (!std::binary_search(family.begin(), family.end(), rel))
+            fromProgen = model->containsRelation(rel);
+    }
+    if (fromProgen) {
+        //-- start from the progenitor's terms, and add each new relation R to the family
+        //-- as above. The dropped relations are contained in the model's relations, so
+        //-- leaving them in the family changes nothing.
+        *terms = *progen->getIntersectTerms();
+        family.clear();
+        for (int i = 0; i < progen->getRelationCount(); i++)
+            family.push_back(progen->getRelation(i));
+        for (int i = 0; i < model->getRelationCount(); i++) {
+            Relation *rel = model->getRelation(i);
+            if (std::find(family.begin(), family.end(), rel) != family.end())
+                continue;
+            addTerm(*terms, rel, 1);
+            common.clear();
+            for (size_t f = 0; f < family.size(); f++) {
+                Relation *fRel = intersectRelations(family[f], rel);
+                if (fRel)
+                    common.push_back(fRel);
+            }
+            addIntersectTerms(common, -1, *terms);
+            family.push_back(rel);
+        }
+    } else {
+        family.clear();
+        for (int i = 0; i < model->getRelationCount(); i++)
+            family.push_back(model->getRelation(i));
+        addIntersectTerms(family, 1, *terms);
+    }
+    //-- drop the terms which cancelled out
+    IntersectTerms::iterator last = terms->begin();
+    for (IntersectTerms::iterator it = terms->begin(); it != terms->end(); ++it) {
+        if (it->second != 0)
+            *last++ = *it;
+    }
+    terms->erase(last, terms->end());
+    model->setIntersectTerms(terms);
+    return terms;
+}
+
 // !!! This function computes dependent stats whether or not this is a directed system. !!!
 // Perhaps this should be fixed. [jsf]
 void ManagerBase::computeStatistics(Relation *rel) {
@@ -1192,6 +1293,34 @@ void ManagerBase::compareProgenitors(Model *model, Model *newProgen) {
     computeIncrementalAlpha(model);
 }
 
+void ManagerBase::computeModelStatistics(Model *model, int groups) {
+    if (model == NULL)
+        return;
+    //-- the statistics share the model's projections (which are held in the cache
+    //-- until all are done) and its fit table. Pearson statistics may fit the bottom
+    //-- reference (once per manager), so they come after the others that use the fit.
+    bool held = holdTables;
+    holdTables = true;
+    loadCachedStatistics(model);
+    shareFit = true;
+    fitTableModel = NULL;
+    if (groups & L2_STATISTICS)
+        computeL2Statistics(model);
+    if (groups & DEPENDENT_STATISTICS)
+        computeDependentStatistics(model);
+    if (groups & BP_STATISTICS)
+        computeBPStatistics(model);
+    if (groups & PERCENT_CORRECT)
+        computePercentCorrect(model);
+    if (groups & PEARSON_STATISTICS)
+        computePearsonStatistics(model);
+    if (groups & INCREMENTAL_ALPHA)
+        computeIncrementalAlpha(model);
+    shareFit = false;
+    fitTableModel = NULL;
+    holdTables = held;
+}
+
 void ManagerBase::setValuesAreFunctions(int flag) {
     if (flag == 0)
         valuesAreFunctions = false;
@@ -1307,7 +1436,7 @@ Model *ManagerBase::makeModel(const char *name, bool makeProject) {
     //-- put it in the cache; return the cached one if present
     if (!modelCache->addModel(model)) {
         //-- already exists in cache; return that one
-        Model *cachedModel = modelCache->findModel(model->getPrintName());
+        Model *cachedModel = modelCache->findModel(model);
         delete model;
         model = cachedModel;
     }
@@ -1375,7 +1504,7 @@ Model *ManagerBase::makeSbModel(const char *name, bool makeProject) {
     //-- put it in the cache; return the cached one if present
     if (!modelCache->addModel(model)) {
         //-- already exists in cache; return that one
-        Model *cachedModel = modelCache->findModel(model->getPrintName());
+        Model *cachedModel = modelCache->findModel(model);
         delete model;
         model = cachedModel;
     }
@@ -1481,6 +1610,7 @@ bool ManagerBase::makeFitTableAlgebraic(Model* model) {
     algTable->sort();
     if (fitTable1) delete fitTable1;
     fitTable1 = algTable;
+    fitTableModel = model;
  
     return true;
 }
@@ -1504,14 +1634,40 @@ bool ManagerBase::makeFitTableIPF(Model* model) {
             stateSpaceSize = 1000000;
         projTable = new Table(keysize, stateSpaceSize);
     }
-    fitTable1->reset(keysize);
-    fitTable2->reset(keysize);
-    projTable->reset(keysize);
+    makeProjections(model);
+    bool fitted = makeFitTableIPF(model, fitTable1, fitTable2, projTable);
+    fitTableModel = fitted ? model : NULL;
+    if (fitted)
+        keepFitTable(model, fitTable1);
+    return fitted;
+}
+
+// This does the work of makeFitTableIPF, using the given scratch tables rather than
+// the manager's own. The fitted data is left in fit; the two fit tables may be
+// swapped during fitting. The model's projections (and their masks) must already have
+// been made: they are read directly from the relations, not through makeProjection and
+// the relation cache. Apart from the model itself, this only reads shared data, so it
+// can run on several threads at once.
+bool ManagerBase::makeFitTableIPF(Model* model, Table *&fit, Table *&work, Table *proj, bool allowWarmStart) {
+    //-- with "ipf-warm-start" 2, the model is first fit from the usual start, to find
+    //-- how many iterations the warm start saves
+    double warmStart = 0;
+    Table *startTable = NULL;
+    double coldIterations = -1;
+    if (allowWarmStart && getOptionFloat("ipf-warm-start", NULL, &warmStart) && warmStart > 0)
+        startTable = getWarmStartTable(model);
+    if (startTable && warmStart >= 2) {
+        makeFitTableIPF(model, fit, work, proj, false);
+        coldIterations = model->getAttribute(ATTRIBUTE_IPF_ITERATIONS);
+    }
+
+    fit->reset(keysize);
+    work->reset(keysize);
+    proj->reset(keysize);
     KeySegment *key = new KeySegment[keysize];
     int k;
     double error = 0;
 
-    makeProjections(model);
     int relCount = model->getRelationCount();
     Relation *relList[relCount];
     Table *tableList[relCount];
@@ -1534,7 +1690,10 @@ bool ManagerBase::makeFitTableIPF(Model* model) {
             expsize = newexpsize;
         }
     }
-    makeOrthoExpansion(relList[startRel], fitTable1);
+    if (startTable)
+        fit->copy(startTable);
+    else
+        makeOrthoExpansion(relList[startRel], tableList[startRel], fit);
 
     // configurable fitting parameters:  convergence error. This is approximately in units of samples.
     // if initial data was probabilities, an artificial scale of 1000 is used.
@@ -1557,66 +1716,372 @@ bool ManagerBase::makeFitTableIPF(Model* model) {
     Relation *rel;
     Table *table;
     KeySegment *mask;
-    for (iter = 0; iter < maxiter; iter++) {
-        error = 0.0; // absolute difference between original projection and computed values
-        for (r = 0; r < relCount; r++) {
-            rel = relList[r];
-            table = tableList[r];
-            mask = maskList[r];
-            // create a projection of the computed data, based on the variables in the relation
-            projTable->reset(keysize);
-            makeProjection(fitTable1, projTable, rel);
-            // for each tuple in fitTable1, create a scaled tuple in fitTable2, scaled by the
-            // ratio of the projection from the input data, and the computed projection
-            // from the previous iteration.  In any cases where the input marginal is
-            // zero, or where the computed marginal is zero, skip this tuple (equivalent
-            // to setting it to zero, but conserves space).
-            tupleCount = fitTable1->getTupleCount();
-            fitTable2->reset(keysize);
+    if (!model->isStateBased()) {
+        //-- For variable-based models, each tuple of the fit table always projects onto the
+        //-- same tuple of each relation's input projection, so these are looked up once here.
+        //-- Tuples are only ever scaled, or dropped when their value reaches zero, so the rows
+        //-- of the fit table are fixed, and each pass becomes a sum into the projection
+        //-- (scatter) and a scaling from it (gather), over flat arrays with no key searches.
+        //-- Dropped tuples are marked with a negative value, and removed at the end.
+        //--
+        //-- If the state space is small enough (see the "ipf-dense-max" option), the cells are
+        //-- instead every state of the full state space, addressed by their mixed-radix index,
+        //-- and the projections are the full state spaces of the relations. The cells are in
+        //-- key order either way, so both layouts give exactly the same fit.
+        tupleCount = fit->getTupleCount();
+        double denseMax;
+        if (!getOptionFloat("ipf-dense-max", NULL, &denseMax))
+            denseMax = 0;
+        bool dense = ocDegreesOfFreedom(varList) + 1 <= denseMax;
+        long long cellCount = dense ? (long long) ocDegreesOfFreedom(varList) + 1 : tupleCount;
+        long long *cellIndex = new long long[tupleCount]; // fit table row -> cell
+        double *fitValues = new double[cellCount];
+        long long **indexList = new long long*[relCount];
+        long long *relCellCount = new long long[relCount];
+        double **relValueList = new double*[relCount];
+        double **projValueList = new double*[relCount];
+        if (dense) {
+            int varCount = varList->getVarCount();
+            int cards[varCount], digits[varCount];
+            long long strides[varCount];
+            for (int v = 0; v < varCount; v++)
+                cards[v] = varList->getVariable(v)->cardinality;
+            for (i = 0; i < cellCount; i++)
+                fitValues[i] = -1.0;
             for (i = 0; i < tupleCount; i++) {
-                newValue = 0.0;
-                fitTable1->copyKey(i, key);
-                value = fitTable1->getValue(i);
-                for (k = 0; k < keysize; k++)
-                    key[k] |= mask[k];
-                j = table->indexOf(key);
-                if (j >= 0) {
-                    relValue = table->getValue(j);
-                    if (relValue > DBL_EPSILON) {
-                        j = projTable->indexOf(key);
-                        if (j >= 0) {
-                            projValue = projTable->getValue(j);
+                KeySegment *fitKey = fit->getKey(i);
+                long long cell = 0;
+                for (int v = 0; v < varCount; v++)
+                    cell = cell * cards[v] + Key::getKeyValue(fitKey, keysize, varList, v);
+                cellIndex[i] = cell;
+                fitValues[cell] = fit->getValue(i);
+            }
+            for (r = 0; r < relCount; r++) {
+                table = tableList[r];
+                //-- strides of the relation's variables in its own state space; zero for the
+                //-- variables which aren't in the relation
+                long long relCells = 1;
+                for (int v = varCount - 1; v >= 0; v--) {
+                    if (relList[r]->findVariable(v) >= 0) {
+                        strides[v] = relCells;
+                        relCells *= cards[v];
+                    } else {
+                        strides[v] = 0;
+                    }
+                }
+                relCellCount[r] = relCells;
+                relValueList[r] = new double[relCells];
+                projValueList[r] = new double[relCells];
+                for (j = 0; j < relCells; j++)
+                    relValueList[r][j] = 0.0;
+                long long relTupleCount = table->getTupleCount();
+                for (j = 0; j < relTupleCount; j++) {
+                    KeySegment *relKey = table->getKey(j);
+                    long long relCell = 0;
+                    for (int v = 0; v < varCount; v++) {
+                        if (strides[v] > 0)
+                            relCell += strides[v] * Key::getKeyValue(relKey, keysize, varList, v);
+                    }
+                    relValueList[r][relCell] = table->getValue(j);
+                }
+                //-- step through the full state space with an odometer, tracking the
+                //-- matching relation state
+                long long *index = indexList[r] = new long long[cellCount];
+                long long relCell = 0;
+                for (int v = 0; v < varCount; v++)
+                    digits[v] = 0;
+                for (i = 0; i < cellCount; i++) {
+                    index[i] = relCell;
+                    for (int v = varCount - 1; v >= 0; v--) {
+                        relCell += strides[v];
+                        if (++digits[v] < cards[v])
+                            break;
+                        digits[v] = 0;
+                        relCell -= strides[v] * cards[v];
+                    }
+                }
+            }
+        } else {
+            for (i = 0; i < tupleCount; i++) {
+                cellIndex[i] = i;
+                fitValues[i] = fit->getValue(i);
+            }
+            for (r = 0; r < relCount; r++) {
+                table = tableList[r];
+                mask = maskList[r];
+                relCellCount[r] = table->getTupleCount();
+                indexList[r] = new long long[tupleCount];
+                relValueList[r] = new double[relCellCount[r]];
+                projValueList[r] = new double[relCellCount[r]];
+                for (i = 0; i < tupleCount; i++) {
+                    fit->copyKey(i, key);
+                    for (k = 0; k < keysize; k++)
+                        key[k] |= mask[k];
+                    indexList[r][i] = table->indexOf(key);
+                }
+                for (j = 0; j < relCellCount[r]; j++)
+                    relValueList[r][j] = table->getValue(j);
+            }
+        }
+
+        //-- one pass of IPF over all the relations; returns the largest difference found
+        //-- between a relation and the projection of the fit onto it
+        auto cycle = [&]() {
+            double error = 0.0; // absolute difference between original projection and computed values
+            for (int r = 0; r < relCount; r++) {
+                long long *index = indexList[r];
+                double *relValues = relValueList[r];
+                double *projValues = projValueList[r];
+                // project the computed data onto the relation
+                for (long long j = 0; j < relCellCount[r]; j++)
+                    projValues[j] = 0.0;
+                for (long long i = 0; i < cellCount; i++) {
+                    if (fitValues[i] >= 0 && index[i] >= 0)
+                        projValues[index[i]] += fitValues[i];
+                }
+                // scale each tuple by the ratio of the input and computed projections
+                for (long long i = 0; i < cellCount; i++) {
+                    double value = fitValues[i];
+                    if (value < 0)
+                        continue;
+                    double newValue = 0.0;
+                    long long j = index[i];
+                    if (j >= 0) {
+                        double relValue = relValues[j];
+                        if (relValue > DBL_EPSILON) {
+                            double projValue = projValues[j];
                             if (projValue > DBL_EPSILON) {
                                 newValue = value * relValue / projValue;
                             }
                             error = fmax(error, fabs(relValue - projValue));
-                        } else {
-                            error = fmax(error, relValue);
                         }
                     }
+                    fitValues[i] = (newValue > DBL_EPSILON) ? newValue : -1.0;
+                }
+            }
+            return error;
+        };
+
+        double accelerate;
+        if (!getOptionFloat("ipf-accelerate", NULL, &accelerate))
+            accelerate = 0;
+        if (accelerate <= 0 || maxiter <= 2) {
+            for (iter = 0; iter < maxiter; iter++) {
+                error = cycle();
+                if (error < delta2)         // check convergence
+                    break;
+            }
+        } else {
+            //-- Squared extrapolation (SQUAREM). After two passes from x0, giving x1 and x2,
+            //-- the fit jumps to x0 - 2a(x1 - x0) + a^2(x2 - 2x1 + x0), with a = -|x1 - x0| /
+            //-- |x2 - 2x1 + x0|, taken on the logs of the values. The coefficients sum to one,
+            //-- so the logs stay in the model's loglinear family, and IPF from there still
+            //-- converges to the same fit. One more pass follows the jump; if its error is worse
+            //-- than that of the pass which made x2, the jump is undone. Iterations are counted
+            //-- as passes, so they can be compared with plain IPF.
+            double *x0 = new double[cellCount];
+            double *x1 = new double[cellCount];
+            double *x2 = new double[cellCount];
+            long long passes = 0;
+            bool converged = false;
+            auto step = [&]() {
+                error = cycle();
+                converged = error < delta2;
+                if (!converged)
+                    passes++;
+                return converged || passes >= maxiter;
+            };
+            for (;;) {
+                memcpy(x0, fitValues, cellCount * sizeof(double));
+                if (step())
+                    break;
+                memcpy(x1, fitValues, cellCount * sizeof(double));
+                if (step())
+                    break;
+                double plainError = error;
+                memcpy(x2, fitValues, cellCount * sizeof(double));
+                double rr = 0, vv = 0;
+                for (i = 0; i < cellCount; i++) {
+                    if (x0[i] > 0 && x1[i] > 0 && x2[i] > 0) {
+                        double l0 = log(x0[i]), l1 = log(x1[i]), l2 = log(x2[i]);
+                        rr += (l1 - l0) * (l1 - l0);
+                        vv += (l2 - 2 * l1 + l0) * (l2 - 2 * l1 + l0);
+                    }
+                }
+                if (vv <= 0)
+                    continue;
+                double alpha = -sqrt(rr / vv);
+                if (alpha > -1)
+                    alpha = -1;
+                for (i = 0; i < cellCount; i++) {
+                    if (x0[i] > 0 && x1[i] > 0 && x2[i] > 0) {
+                        double l0 = log(x0[i]), l1 = log(x1[i]), l2 = log(x2[i]);
+                        newValue = exp(l0 - 2 * alpha * (l1 - l0) + alpha * alpha * (l2 - 2 * l1 + l0));
+                        if (newValue > DBL_EPSILON && std::isfinite(newValue))
+                            fitValues[i] = newValue;
+                    }
                 }
-                if (newValue > DBL_EPSILON) {
-                    fitTable1->copyKey(i, key);
-                    fitTable2->addTuple(key, newValue);
+                bool stop = step();
+                if (!converged && error > plainError) {
+                    //-- the jump made things worse; go on from x2 instead
+                    memcpy(fitValues, x2, cellCount * sizeof(double));
+                    stop = step();
                 }
+                if (stop)
+                    break;
             }
-            Table *ftswap = fitTable1;        // swap fitTable1 and fitTable2 for next pass
-            fitTable1 = fitTable2;
-            fitTable2 = ftswap;
+            //-- as for plain IPF, the count excludes the final pass when it converged
+            iter = converged ? passes : (int) maxiter;
+            delete[] x0;
+            delete[] x1;
+            delete[] x2;
+        }
+
+        work->reset(keysize);
+        for (i = 0; i < tupleCount; i++) {
+            value = fitValues[cellIndex[i]];
+            if (value >= 0) {
+                fit->copyKey(i, key);
+                work->addTuple(key, value);
+            }
+        }
+        Table *ftswap = fit;
+        fit = work;
+        work = ftswap;
+
+        for (r = 0; r < relCount; r++) {
+            delete[] indexList[r];
+            delete[] relValueList[r];
+            delete[] projValueList[r];
+        }
+        delete[] indexList;
+        delete[] relCellCount;
+        delete[] relValueList;
+        delete[] projValueList;
+        delete[] fitValues;
+        delete[] cellIndex;
+    } else {
+        for (iter = 0; iter < maxiter; iter++) {
+            error = 0.0; // absolute difference between original projection and computed values
+            for (r = 0; r < relCount; r++) {
+                rel = relList[r];
+                table = tableList[r];
+                mask = maskList[r];
+                // create a projection of the computed data, based on the variables in the relation
+                proj->reset(keysize);
+                makeProjection(fit, proj, rel);
+                // for each tuple in fit, create a scaled tuple in work, scaled by the
+                // ratio of the projection from the input data, and the computed projection
+                // from the previous iteration.  In any cases where the input marginal is
+                // zero, or where the computed marginal is zero, skip this tuple (equivalent
+                // to setting it to zero, but conserves space).
+                tupleCount = fit->getTupleCount();
+                work->reset(keysize);
+                for (i = 0; i < tupleCount; i++) {
+                    newValue = 0.0;
+                    fit->copyKey(i, key);
+                    value = fit->getValue(i);
+                    for (k = 0; k < keysize; k++)
+                        key[k] |= mask[k];
+                    j = table->indexOf(key);
+                    if (j >= 0) {
+                        relValue = table->getValue(j);
+                        if (relValue > DBL_EPSILON) {
+                            j = proj->indexOf(key);
+                            if (j >= 0) {
+                                projValue = proj->getValue(j);
+                                if (projValue > DBL_EPSILON) {
+                                    newValue = value * relValue / projValue;
+                                }
+                                error = fmax(error, fabs(relValue - projValue));
+                            } else {
+                                error = fmax(error, relValue);
+                            }
+                        }
+                    }
+                    if (newValue > DBL_EPSILON) {
+                        fit->copyKey(i, key);
+                        work->addTuple(key, newValue);
+                    }
+                }
+                Table *ftswap = fit;        // swap fit and work for next pass
+                fit = work;
+                work = ftswap;
+            }
+            if (error < delta2)         // check convergence
+                break;
         }
-        if (error < delta2)         // check convergence
-            break;
     }
-    fitTable1->sort();
+    fit->sort();
     model->setAttribute(ATTRIBUTE_IPF_ITERATIONS, (double) iter);
     model->setAttribute(ATTRIBUTE_IPF_ERROR, error);
+    if (coldIterations >= 0)
+        model->setAttribute(ATTRIBUTE_IPF_SAVED, coldIterations - iter);
     delete[] key;
     return true;
 }
 
+Table *ManagerBase::getWarmStartTable(Model *model) {
+    if (model->isStateBased() || !hasLoops(model))
+        return NULL;
+    Model *progen = model->getProgenitor();
+    if (progen == NULL || progen == model || progen->getFitTable() == NULL)
+        return NULL;
+    if (!model->containsModel(progen))
+        return NULL;
+    return progen->getFitTable();
+}
+
+void ManagerBase::keepFitTable(Model *model, Table *fit) {
+    double warmStart;
+    if (model->isStateBased() || model->getFitTable() != NULL)
+        return;
+    if (!getOptionFloat("ipf-warm-start", NULL, &warmStart) || warmStart <= 0)
+        return;
+    long long count = fit->getTupleCount();
+    Table *kept = new Table(keysize, count > 0 ? count : 1);
+    kept->copy(fit);
+    model->setFitTable(kept);
+}
+
+bool ManagerBase::fitJunctionTree(Model *model) {
+    double maxStates;
+    if (model->isStateBased() || !getOptionFloat("ipf-junction-tree", NULL, &maxStates) || maxStates <= 0)
+        return false;
+    makeProjections(model);
+    JunctionTree tree(model, varList, maxStates);
+    if (!tree.isValid())
+        return false;
+
+    //-- the same convergence settings as makeFitTableIPF
+    double delta2;
+    getOptionFloat("ipf-maxdev", NULL, &delta2);
+    if (this->sampleSize > 0) {
+        delta2 /= sampleSize;
+    } else {
+        delta2 /= 1000;
+    }
+    double maxiter = 1;
+    if (hasLoops(model))
+        getOptionFloat("ipf-maxit", NULL, &maxiter);
+
+    double error = 0;
+    int iter = tree.fit(delta2, maxiter, &error);
+    double h = tree.entropy();
+    model->setAttribute(ATTRIBUTE_FIT_H, h);
+    model->setAttribute(ATTRIBUTE_H, h);
+    model->setAttribute(ATTRIBUTE_IPF_ITERATIONS, (double) iter);
+    model->setAttribute(ATTRIBUTE_IPF_ERROR, error);
+    return true;
+}
+
 bool ManagerBase::makeFitTable(Model *model) {
     
     if (model == nullptr) { return false; }
+
+    //-- within computeModelStatistics, the fit is made once and shared
+    else if (shareFit && model == fitTableModel && fitTable1 != nullptr)
+        { return true; }
     
     // Check for models that can be fit algorithmically. 
     // If so, solve that way.
@@ -1629,6 +2094,167 @@ bool ManagerBase::makeFitTable(Model *model) {
         { return makeFitTableIPF(model); }
 }
 
+void ManagerBase::fitModels(Model **models, long count, int threadCount, HMethod method) {
+    //-- On this thread, find the models which need IPF, and make their projections and
+    //-- masks. After this, the workers' makeFitTableIPF only reads the relations (their
+    //-- tables are taken from them directly, not through the relation cache) and writes to
+    //-- the model itself. No projection tables are deleted until all the fits are done.
+    std::vector<Model*> fitList;
+    bool held = holdTables;
+    holdTables = true;
+    for (long m = 0; m < count; m++) {
+        Model *model = models[m];
+        if (model == NULL)
+            continue;
+        //-- a model whose fitted H was cached on disk by an earlier run isn't fit again
+        loadCachedStatistics(model);
+        if (model->getAttribute(ATTRIBUTE_FIT_H) >= 0)
+            continue;
+        bool loops = hasLoops(model);
+        if (method == ALGEBRAIC || (method == AUTO && !loops))
+            continue;
+        //-- junction tree fits are small, so they are done here rather than by the workers
+        if (fitJunctionTree(model))
+            continue;
+        //-- the masks and variable bits of the relations are made on first use, so they are
+        //-- made here for those the workers read: the model's, and its progenitor's (which
+        //-- a warm start checks the model contains)
+        makeProjections(model);
+        for (int r = 0; r < model->getRelationCount(); r++) {
+            model->getRelation(r)->getMask();
+            model->getRelation(r)->getVarBits();
+        }
+        fitList.push_back(model);
+        //-- a progenitor which wasn't fit with IPF (e.g., one without loops) is fit now, so
+        //-- that its fit can be kept for warm starts
+        Model *progen = model->getProgenitor();
+        if (progen) {
+            for (int r = 0; r < progen->getRelationCount(); r++)
+                progen->getRelation(r)->getVarBits();
+        }
+        double warmStart;
+        if (progen && progen != model && progen->getFitTable() == NULL && !model->isStateBased()
+                && getOptionFloat("ipf-warm-start", NULL, &warmStart) && warmStart > 0
+                && loops && model->containsModel(progen))
+            makeFitTableIPF(progen);
+    }
+    if (fitList.empty()) {
+        holdTables = held;
+        return;
+    }
+
+    if (threadCount <= 0)
+        threadCount = std::thread::hardware_concurrency();
+    if (threadCount > (long) fitList.size())
+        threadCount = fitList.size();
+    if (threadCount < 1)
+        threadCount = 1;
+
+    //-- Each worker takes the next unfitted model from the list, until none are left.
+    unsigned long long startSize = (unsigned long long) ocDegreesOfFreedom(varList) + 1;
+    if (startSize > 1000000)
+        startSize = 1000000;
+    std::atomic<size_t> next(0);
+    auto worker = [&]() {
+        Table *fit = new Table(keysize, startSize);
+        Table *work = new Table(keysize, startSize);
+        Table *proj = new Table(keysize, startSize);
+        size_t m;
+        while ((m = next++) < fitList.size()) {
+            Model *model = fitList[m];
+            makeFitTableIPF(model, fit, work, proj);
+            keepFitTable(model, fit);
+            double h = ocEntropy(fit);
+            model->setAttribute(ATTRIBUTE_FIT_H, h);
+            model->setAttribute(ATTRIBUTE_H, h);
+        }
+        delete fit;
+        delete work;
+        delete proj;
+    };
+    std::vector<std::thread> workers;
+    for (int t = 1; t < threadCount; t++)
+        workers.push_back(std::thread(worker));
+    worker();
+    for (size_t t = 0; t < workers.size(); t++)
+        workers[t].join();
+    holdTables = held;
+    if (!holdTables)
+        relCache->trimTables(0);
+}
+
+long ManagerBase::selectBest(Model **models, long count, long width, const char *sortName, Direction direction,
+        long *best) {
+    //-- the models are ordered by their sort values (negated when the highest come first),
+    //-- then by name, and taken from a heap until width of them are chosen
+    struct Candidate {
+        double key;
+        const char *name;
+        long index;
+    };
+    std::vector<Candidate> heap;
+    heap.reserve(count);
+    for (long m = 0; m < count; m++) {
+        if (models[m] == NULL)
+            continue;
+        AttributeList *attrs = models[m]->getAttributeList();
+        int attrIndex = attrs->getAttributeIndex(sortName);
+        double key = attrIndex < 0 ? -1 : attrs->getAttributeByIndex(attrIndex);
+        if (direction == Direction::Descending)
+            key = -key;
+        Candidate candidate = { key, models[m]->getPrintName(), m };
+        heap.push_back(candidate);
+    }
+    auto after = [](const Candidate &a, const Candidate &b) {
+        if (a.key != b.key)
+            return a.key > b.key;
+        int cmp = strcmp(a.name, b.name);
+        return cmp != 0 ? cmp > 0 : a.index > b.index;
+    };
+    std::make_heap(heap.begin(), heap.end(), after);
+
+    //-- a model equivalent to one already chosen is skipped. Variable-based models are only
+    //-- equivalent if they are the same, so they are looked up by their structure. State-based
+    //-- models which contain each other have the same degrees of freedom, so containment is
+    //-- only checked against those chosen with the same DF (or whose DF isn't known yet).
+    std::unordered_map<unsigned long long, std::vector<Model*> > chosenByHash;
+    std::map<long long, std::vector<Model*> > chosenByDF;
+    std::vector<Model*> chosen;
+    long bestCount = 0;
+    while (bestCount < width && !heap.empty()) {
+        std::pop_heap(heap.begin(), heap.end(), after);
+        long index = heap.back().index;
+        heap.pop_back();
+        Model *model = models[index];
+        std::vector<Model*> &same = chosenByHash[model->getHashKey()];
+        bool equivalent = false;
+        for (size_t i = 0; i < same.size() && !equivalent; i++)
+            equivalent = same[i]->isEquivalentTo(model);
+        bool stateBased = model->isStateBased();
+        double df = model->getAttribute(ATTRIBUTE_DF);
+        long long dfKey = df < 0 ? -1 : llround(df);
+        if (!equivalent && stateBased && dfKey >= 0) {
+            std::vector<Model*> &sameDF = chosenByDF[dfKey];
+            for (size_t i = 0; i < sameDF.size() && !equivalent; i++)
+                equivalent = sameDF[i]->isEquivalentTo(model);
+            std::vector<Model*> &unknownDF = chosenByDF[-1];
+            for (size_t i = 0; i < unknownDF.size() && !equivalent; i++)
+                equivalent = unknownDF[i]->isEquivalentTo(model);
+        } else if (!equivalent && stateBased) {
+            for (size_t i = 0; i < chosen.size() && !equivalent; i++)
+                equivalent = chosen[i]->isEquivalentTo(model);
+        }
+        if (equivalent)
+            continue;
+        same.push_back(model);
+        if (stateBased)
+            chosenByDF[dfKey].push_back(model);
+        chosen.push_back(model);
+        best[bestCount++] = index;
+    }
+    return bestCount;
+}
+
 FitIntersectMap ManagerBase::computeIntersectLevels(Model* model) {
 
     // Allocate new workspace array
@@ -1704,16 +2330,19 @@ FitIntersectMap ManagerBase::computeIntersectLevels(Model* model) {
 Table* ManagerBase::disownTable() {
     Table* ret = fitTable1;
     fitTable1 = nullptr;
+    fitTableModel = nullptr;
     return ret;
 }
 
 Table* ManagerBase::getIndepTable() {
+    Model* oldFitModel = fitTableModel;
     Table* oldFitTable1 = disownTable();
 
     makeFitTable(bottomRef);
     Table* table = fitTable1;
 
     fitTable1 = oldFitTable1;
+    fitTableModel = oldFitModel;
     return table;}
 
 
@@ -1728,10 +2357,18 @@ Table* ManagerBase::getIndepTable() {
 
 Table* ManagerBase::projectedFit(Relation* projectTo, Model* fitModel) {
 
+    // the model's relations use projections of the full data, so make sure they are
+    // in the cache (and stay there) before inputData is replaced below.
+    bool held = holdTables;
+    holdTables = true;
+    makeProjections(fitModel);
+
     // save the work tables; also zero out the fitTable1.
     Table* oldFitTable = fitTable1;
+    Model* oldFitModel = fitTableModel;
     Table* oldData = inputData;
     fitTable1 = nullptr;
+    fitTableModel = nullptr;
 
 //    printf("<br>");
 //    printf("OLD FIT TABLE:");
@@ -1756,7 +2393,9 @@ Table* ManagerBase::projectedFit(Relation* projectTo, Model* fitModel) {
     // get out the result and reset the work tables
     Table* result = fitTable1;
     fitTable1 = oldFitTable;
+    fitTableModel = oldFitModel;
     inputData = oldData;
+    holdTables = held;
 
 
     return result;
@@ -16,6 +16,7 @@
 #include "RelCache.h"
 #include "Relation.h"
 #include "StateConstraint.h"
+#include "StatsCache.h"
 #include "VariableList.h"
 #include "_Core.h"
 #include <assert.h>
@@ -41,6 +42,11 @@ bool ManagerBase::initFromCommandLine(int argc, char **argv) {
         if (fd == NULL) {
             printf("ERROR: couldn't open %s\n", fname);
             return false;
+        } else if (ocIsBinaryFile(fd)) {
+            if ((dataLines = ocReadBinaryFile(fd, options, &input, &test, &vars)) == 0) {
+                printf("ERROR: ocReadBinaryFile() failed for %s\n", fname);
+                return false;
+            }
         } else if ((dataLines = ocReadFile(fd, options, &input, &test, &vars)) == 0) {
             printf("ERROR: ocReadFile() failed for %s\n", fname);
             return false;
@@ -48,6 +54,13 @@ bool ManagerBase::initFromCommandLine(int argc, char **argv) {
     }
     varList = vars;
 
+    //-- save the data as read, before any of the adjustments below
+    const char *option;
+    if (getOptionString("compile-data", NULL, &option)) {
+        if (!ocWriteBinaryFile(option, options, input, test, vars, dataLines))
+            return false;
+    }
+
     if (!getOptionFloat("alpha-threshold", NULL, &alpha_threshold))
     {
         alpha_threshold = 0.05;
@@ -64,8 +77,6 @@ bool ManagerBase::initFromCommandLine(int argc, char **argv) {
         }
     }
 
-
-    const char *option;
     if (getOptionString("function-values", NULL, &option)) {
         setValuesAreFunctions(1);
     }
@@ -113,10 +124,48 @@ bool ManagerBase::initFromCommandLine(int argc, char **argv) {
         currentOptDef = options->findOptionByName("ipf-maxit");
         setOptionFloat(currentOptDef, 266);
     }
+    //-- largest state space for which IPF works on dense arrays, rather than on the
+    //-- tuples of the fit table
+    if (!getOptionFloat("ipf-dense-max", NULL, &value)) {
+        currentOptDef = options->findOptionByName("ipf-dense-max");
+        setOptionFloat(currentOptDef, 1000000);
+    }
+    //-- budget for the projection tables in the relation cache (none by default)
+    if (getOptionFloat("projection-cache-mb", NULL, &value) && value > 0) {
+        relCache->setMaxTableBytes((long long) (value * 1024 * 1024));
+    }
 
     inputData = input;
     testData = test;
     inputH = ocEntropy(inputData);
     keysize = vars->getKeySize();
+
+    //-- statistics cache, keyed on the variables and the data
+    const char *cachePath;
+    if (getOptionString("stats-cache", NULL, &cachePath) && cachePath[0]) {
+        unsigned long long hash = StatsCache::hash("");
+        for (int i = 0; i < varList->getVarCount(); i++) {
+            Variable *var = varList->getVariable(i);
+            hash = StatsCache::hash(var->abbrev, hash);
+            hash = StatsCache::hash(&var->cardinality, sizeof(var->cardinality), hash);
+            hash = StatsCache::hash(&var->dv, sizeof(var->dv), hash);
+            for (int j = 0; j < var->cardinality; j++) {
+                if (var->valmap[j])
+                    hash = StatsCache::hash(var->valmap[j], hash);
+            }
+        }
+        Table *tables[2] = { inputData, testData };
+        for (int t = 0; t < 2; t++) {
+            if (tables[t] == NULL)
+                continue;
+            for (long long i = 0; i < tables[t]->getTupleCount(); i++) {
+                double value = tables[t]->getValue(i);
+                hash = StatsCache::hash(tables[t]->getKey(i), keysize * sizeof(KeySegment), hash);
+                hash = StatsCache::hash(&value, sizeof(value), hash);
+            }
+            hash = StatsCache::hash(&t, sizeof(t), hash);
+        }
+        statsCache = new StatsCache(cachePath, hash);
+    }
     return true;
 }
@@ -140,60 +140,6 @@ bool ocHasOverlaps(Model *model) {
     return false;
 }
 
-//-- these definitions are used in loop checking
-struct VarList {
-        int varCount;
-        int *vars;
-        VarList() :
-                varCount(0), vars(0) {
-        }
-        ~VarList() {
-            if (vars)
-                delete[] vars;
-        }
-        void setVars(int *newVars) {
-            if (vars)
-                delete[] vars;
-            vars = newVars;
-        }
-};
-
-//-- copy a VarList
-static void VLCopy(VarList &from, VarList &to) {
-    if (to.varCount < from.varCount) {
-        to.setVars(new int[from.varCount]);
-    }
-    to.varCount = from.varCount;
-    if (to.varCount > 0)
-        memcpy(to.vars, from.vars, to.varCount * sizeof(int));
-}
-
-//-- remove variables from v1 which are present in v2
-static void VLComplement(VarList &v1, VarList &v2) {
-    if (v1.varCount == 0 || v1.varCount == 0)
-        return;
-    int *newvars = new int[v1.varCount];
-    int count = 0, i, j;
-    for (i = 0; i < v1.varCount; i++) {
-        for (j = 0; j < v2.varCount; j++) {
-            if (v2.vars[j] == v1.vars[i])
-                break;
-        }
-        if (j >= v2.varCount) { // not found; add it to result
-            newvars[count++] = v1.vars[i];
-        }
-    }
-    v1.setVars(newvars);
-    v1.varCount = count;
-}
-
-//-- check for containment (v1 contains v2)
-static bool VLContains(VarList &v1, VarList &v2) {
-    if (v1.varCount < v2.varCount)
-        return false; // quick check for impossibility
-    return ocContainsVariables(v1.varCount, v1.vars, v2.varCount, v2.vars);
-}
-
 // returns true if first boolean array is a superset of (or equal to) second
 bool isSuperset(bool *first, bool *second, int length) {
     for (int i = 0; i < length; i++)
@@ -350,15 +296,25 @@ bool ocHasLoops(Model *model) {
     }
     if (model->isStateBased())
         return ocSbHasLoops(model);
-    int i, j, relcount;
+    int i, j, w, relcount;
     relcount = model->getRelationCount();
-    VarList *rels = new VarList[relcount];
-    //-- copy variable lists from relations
+    if (relcount == 0)
+        return false;
+    //-- copy variable bitsets from relations. All relations of the model use the same
+    //-- variable list, so have the same number of words.
+    int words = 0;
+    for (i = 0; i < relcount; i++) {
+        int relWords = model->getRelation(i)->getVarBitWords();
+        if (relWords > words)
+            words = relWords;
+    }
+    unsigned long long *rels = new unsigned long long[relcount * words];
+    memset(rels, 0, relcount * words * sizeof(unsigned long long));
+    bool *empty = new bool[relcount];
     for (i = 0; i < relcount; i++) {
         Relation *relation = model->getRelation(i);
-        rels[i].varCount = relation->getVariableCount();
-        rels[i].setVars(new int[rels[i].varCount]);
-        relation->copyVariables(rels[i].vars, rels[i].varCount);
+        memcpy(rels + i * words, relation->getVarBits(), relation->getVarBitWords() * sizeof(unsigned long long));
+        empty[i] = relation->getVariableCount() == 0;
     }
 
     for (;;) {
@@ -366,23 +322,37 @@ bool ocHasLoops(Model *model) {
         //-- repeat until no further change:
         //-- first eliminate variables occuring in only one relation.
         //-- then eliminate relations which are subsets of others
-        for (i = 0; i < relcount; i++) {
-            VarList newList;
-            VLCopy(rels[i], newList);
-            for (j = 0; j < relcount; j++) {
-                if (j != i)
-                    VLComplement(newList, rels[j]);
+        for (w = 0; w < words; w++) {
+            unsigned long long once = 0, twice = 0;
+            for (i = 0; i < relcount; i++) {
+                twice |= once & rels[i * words + w];
+                once |= rels[i * words + w];
             }
-            if (newList.varCount > 0) {
-                VLComplement(rels[i], newList);
-                change = true;
+            unsigned long long unique = once & ~twice;
+            if (unique == 0)
+                continue;
+            for (i = 0; i < relcount; i++)
+                rels[i * words + w] &= ~unique;
+            change = true;
+        }
+        for (i = 0; i < relcount; i++) {
+            if (empty[i])
+                continue;
+            empty[i] = true;
+            for (w = 0; w < words; w++) {
+                if (rels[i * words + w]) {
+                    empty[i] = false;
+                    break;
+                }
             }
         }
         for (i = 0; i < relcount; i++) {
             for (j = 0; j < relcount; j++) {
-                if (i != j && rels[i].varCount > 0 && rels[j].varCount > 0 && VLContains(rels[i], rels[j])) {
+                if (i != j && !empty[i] && !empty[j]
+                        && ocContainsBits(words, rels + i * words, words, rels + j * words)) {
                     change = true;
-                    rels[j].varCount = 0;
+                    empty[j] = true;
+                    memset(rels + j * words, 0, words * sizeof(unsigned long long));
                 }
             }
         }
@@ -393,10 +363,11 @@ bool ocHasLoops(Model *model) {
     //-- do cleanup, and also see if there are any relations left.
     int remaining = 0;
     for (i = 0; i < relcount; i++) {
-        if (rels[i].varCount > 0)
+        if (!empty[i])
             remaining++;
     }
     delete[] rels;
+    delete[] empty;
     return remaining > 1;
 }
 
@@ -36,10 +36,13 @@ Model::Model(int size) {
     totalConstraints = 0;
     relations = new Relation*[size];
     fitTable = NULL;
+    intersectTerms = NULL;
     attributeList = new AttributeList(6);
     printName = NULL;
     inverseName = NULL;
     hashNext = NULL;
+    hashKey = 0;
+    hashKeyValid = false;
     progenitor = NULL;
     ID = 0;
     structMatrix = NULL;
@@ -63,6 +66,7 @@ Model::~Model() {
         delete fitTable;
         fitTable = NULL;
     }
+    delete intersectTerms;
     if (attributeList)
         delete attributeList;
 }
@@ -313,6 +317,7 @@ void Model::addRelation(Relation *newRelation, bool normalize, ModelCache *cache
     }
     relations[i] = newRelation;
     relationCount++;
+    hashKeyValid = false;
     if (printName) {
         delete printName;
         printName = NULL;
@@ -332,6 +337,8 @@ void Model::addRelation(Relation *newRelation, bool normalize, ModelCache *cache
         delete fitTable;
         fitTable = NULL;
     }
+    delete intersectTerms;
+    intersectTerms = NULL;
     if (attributeList) {
         delete attributeList;
         attributeList = new AttributeList(6);
@@ -362,7 +369,7 @@ bool Model::containsRelation(Relation *relation, ModelCache *cache) {
         Model *temp_new = NULL;
         double new_df;
         if (cache) {
-            temp_new = cache->findModel(new_model->getPrintName());
+            temp_new = cache->findModel(new_model);
         }
         if (temp_new) {
             new_df = temp_new->getAttribute(ATTRIBUTE_DF);
@@ -378,7 +385,7 @@ bool Model::containsRelation(Relation *relation, ModelCache *cache) {
         double df = this->getAttribute(ATTRIBUTE_DF);
         if (df < 0.0) { //-- not set yet
             if (cache) {
-                temp_old = cache->findModel(this->getPrintName());
+                temp_old = cache->findModel(this);
             }
             if (temp_old) {
                 df = temp_old->getAttribute(ATTRIBUTE_DF);
@@ -419,7 +426,7 @@ bool Model::containsModel(Model *other) {
 bool Model::isEquivalentTo(Model *other) {
     if (this->isStateBased() || other->isStateBased()) {
         // might be good to check if DFs are equal first, as a faster check
-        if ((this == other) || strcmp(this->getPrintName(),other->getPrintName()) == 0) {
+        if (this->isSameAs(other)) {
             return true;
         }
         if (this->containsModel(other) && other->containsModel(this)) {
@@ -446,6 +453,15 @@ void Model::setFitTable(Table *tbl) {
     fitTable = tbl;
 }
 
+IntersectTerms *Model::getIntersectTerms() {
+    return intersectTerms;
+}
+
+void Model::setIntersectTerms(IntersectTerms *terms) {
+    delete intersectTerms;
+    intersectTerms = terms;
+}
+
 void Model::deleteFitTable() {
     if (fitTable) {
         delete fitTable;
@@ -453,6 +469,30 @@ void Model::deleteFitTable() {
     }
 }
 
+unsigned long long Model::getHashKey() {
+    if (!hashKeyValid) {
+        //-- the relations are kept sorted, so their order is the same for any model
+        //-- with the same relations
+        hashKey = 14695981039346656037ULL;
+        for (int i = 0; i < relationCount; i++)
+            hashKey = (hashKey ^ relations[i]->getHashKey()) * 1099511628211ULL;
+        hashKeyValid = true;
+    }
+    return hashKey;
+}
+
+bool Model::isSameAs(Model *other) {
+    if (this == other)
+        return true;
+    if (relationCount != other->relationCount || getHashKey() != other->getHashKey())
+        return false;
+    for (int i = 0; i < relationCount; i++) {
+        if (!relations[i]->isSameAs(other->relations[i]))
+            return false;
+    }
+    return true;
+}
+
 const char * Model::getPrintName(int useInverse) {
     int i, len = 0;
     const char *name;
@@ -13,23 +13,18 @@
 #include <memory.h>
 #include <string.h>
 
-static int hashcode(const char *name, int hashsize) {
-    unsigned int key = 0;
-    for (const char *cp = name; *cp; cp++)
-        key = (key << 1) + *cp;
-    return key % hashsize;
-}
-
 ModelCache::ModelCache() {
-    hash = new Model*[MODELCACHE_HASHSIZE];
-    memset(hash, 0, MODELCACHE_HASHSIZE * sizeof(Model*));
+    hashSize = MODELCACHE_HASHSIZE;
+    modelCount = 0;
+    hash = new Model*[hashSize];
+    memset(hash, 0, hashSize * sizeof(Model*));
 }
 
 //-- destroy Model cache.  This also deletes all the Models held in the cache.
 ModelCache::~ModelCache() {
     Model *r1, *r2;
     int i;
-    for (i = 0; i < MODELCACHE_HASHSIZE; i++) {
+    for (i = 0; i < hashSize; i++) {
         r1 = hash[i];
         while (r1) {
             r2 = r1->getHashNext();
@@ -37,14 +32,14 @@ ModelCache::~ModelCache() {
             r1 = r2;
         }
     }
-    delete hash;
+    delete[] hash;
 }
 
 long ModelCache::size() {
-    long size = MODELCACHE_HASHSIZE * sizeof(Model*);
+    long size = hashSize * sizeof(Model*);
     Model *r1;
     int i;
-    for (i = 0; i < MODELCACHE_HASHSIZE; i++) {
+    for (i = 0; i < hashSize; i++) {
         r1 = hash[i];
         while (r1) {
             size += r1->size();
@@ -57,11 +52,14 @@ long ModelCache::size() {
 //-- addModel - put a new Model in the cache. If a matching Model already
 //-- exists, an error is returned.
 bool ModelCache::addModel(class Model *model) {
-    if (findModel(model->getPrintName()) != NULL)
+    if (findModel(model) != NULL)
         return false; //error; exists
-    int hashindex = hashcode(model->getPrintName(), MODELCACHE_HASHSIZE);
+    if (modelCount >= hashSize)
+        growHash();
+    long hashindex = model->getHashKey() & (hashSize - 1);
     model->setHashNext(hash[hashindex]);
     hash[hashindex] = model;
+    modelCount++;
     return true;
 }
 
@@ -70,7 +68,7 @@ bool ModelCache::addModel(class Model *model) {
 bool ModelCache::deleteModel(class Model *model) {
     if (model == NULL)
         return false;
-    int hashindex = hashcode(model->getPrintName(), MODELCACHE_HASHSIZE);
+    long hashindex = model->getHashKey() & (hashSize - 1);
     Model *rp = hash[hashindex];
     Model *prev = NULL;
     while (rp && (rp != model)) {
@@ -85,28 +83,49 @@ bool ModelCache::deleteModel(class Model *model) {
         }
         //		printf("deleting: %s\n", model->getPrintName());
         delete rp;
+        modelCount--;
         return true;
     } else {
         return false;
     }
 }
 
-//-- findModel - find a Model in the cache.  Null is returned if the given
-//-- Model doesn't exist.
-class Model *ModelCache::findModel(const char *name) {
-    int hashindex = hashcode(name, MODELCACHE_HASHSIZE);
+//-- findModel - find the Model in the cache with the same relations as the
+//-- given one.  Null is returned if there is none.
+class Model *ModelCache::findModel(Model *model) {
+    long hashindex = model->getHashKey() & (hashSize - 1);
     Model *rp = hash[hashindex];
-    while (rp && strcmp(name, rp->getPrintName()) != 0)
+    while (rp && !rp->isSameAs(model))
         rp = rp->getHashNext();
     return rp; // either NULL, or the matching one
 }
 
+//-- double the number of hash chains, so they stay short
+void ModelCache::growHash() {
+    long newSize = hashSize * 2;
+    Model **newHash = new Model*[newSize];
+    memset(newHash, 0, newSize * sizeof(Model*));
+    for (long i = 0; i < hashSize; i++) {
+        Model *rp = hash[i];
+        while (rp) {
+            Model *next = rp->getHashNext();
+            long hashindex = rp->getHashKey() & (newSize - 1);
+            rp->setHashNext(newHash[hashindex]);
+            newHash[hashindex] = rp;
+            rp = next;
+        }
+    }
+    delete[] hash;
+    hash = newHash;
+    hashSize = newSize;
+}
+
 //-- dump - print out all Models in the cache
 void ModelCache::dump() {
     printf("\nDump ModelCache:\n");
-    for (int i = 0; i < MODELCACHE_HASHSIZE; i++) {
+    for (long i = 0; i < hashSize; i++) {
         if (hash[i]) {
-            printf("hash chain [%d]:\n", i);
+            printf("hash chain [%ld]:\n", i);
             for (Model *model = hash[i]; model; model = model->getHashNext()) {
                 model->dump();
             }
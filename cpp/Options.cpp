@@ -134,6 +134,10 @@ static void setStandardOptions(Options *opts) {
     opts->addOptionValue(def, "top", "reference is saturated model");
     opts->addOptionValue(def, "bottom", "reference is independence model");
     opts->addOptionValue(def, "default", "reference is top for undirected, bottom for directed");
+    def = opts->addOptionName("search-threads", "", "Threads for fitting models during search, default=1");
+    opts->addOptionValue(def, "#", "");
+    def = opts->addOptionName("read-threads", "", "Threads for reading the data, default=1");
+    opts->addOptionValue(def, "#", "");
     def = opts->addOptionName("search-direction", "S", "Specify search up or down lattice");
     opts->addOptionValue(def, "up", "search up");
     opts->addOptionValue(def, "down", "search down");
@@ -141,6 +145,20 @@ static void setStandardOptions(Options *opts) {
     opts->addOptionValue(def, "#", "");
     def = opts->addOptionName("ipf-maxdev", "i", "Max error in IPF, default=0.25");
     opts->addOptionValue(def, "#", "");
+    def = opts->addOptionName("ipf-warm-start", "", "Start IPF from the progenitor's fit: 0=no (default), 1=yes, 2=yes, and report the iterations saved");
+    opts->addOptionValue(def, "#", "");
+    def = opts->addOptionName("ipf-accelerate", "", "Accelerate IPF by squared extrapolation: 0=no (default), 1=yes");
+    opts->addOptionValue(def, "#", "");
+    def = opts->addOptionName("ipf-junction-tree", "", "Fit models with loops on a junction tree when no clique has more than this many states, default=0 (never)");
+    opts->addOptionValue(def, "#", "");
+    def = opts->addOptionName("ipf-dense-max", "", "Max state space size for IPF on dense arrays, default=1000000");
+    opts->addOptionValue(def, "#", "");
+    def = opts->addOptionName("projection-cache-mb", "", "Max MB of projection tables kept in memory, default=0 (no limit)");
+    opts->addOptionValue(def, "#", "");
+    def = opts->addOptionName("stats-cache", "", "File for caching model statistics between runs on the same data");
+    opts->addOptionValue(def, "$", "");
+    def = opts->addOptionName("compile-data", "", "Write the data and options to a binary file, for faster loading");
+    opts->addOptionValue(def, "$", "");
     def = opts->addOptionName("no-frequency", "", "There is no frequency data in table");
     def = opts->addOptionName("function-values", "", "Values represent function data, not frequencies.");
     opts->addOptionValue(def, "$", "");
@@ -323,53 +341,111 @@ void Options::setOptions(int argc, char **argv) {
     return;
 }
 
-bool Options::getLine(FILE *fd, char *line, int *lineno) {
-    int count;
-    char current;
+static const long READ_BUFFER_SIZE = 1 << 22; // more than MAXLINE
+
+LineReader::LineReader(FILE *fd) :
+        fd(fd), size(READ_BUFFER_SIZE), pos(0), end(0), fileEnded(fd == NULL), endReached(false),
+        ownsBuffer(true) {
+    buffer = new char[size];
+}
+
+LineReader::LineReader(const char *text, long length) :
+        fd(NULL), buffer((char *) text), size(length), pos(0), end(length), fileEnded(true),
+        endReached(false), ownsBuffer(false) {
+}
+
+LineReader::~LineReader() {
+    if (ownsBuffer)
+        delete[] buffer;
+}
+
+//-- move the unread characters to the start of the buffer, and read more after them. Returns
+//-- false if nothing more could be read.
+bool LineReader::fill() {
+    if (fileEnded || (pos == 0 && end == size))
+        return false;
+    if (pos > 0) {
+        memmove(buffer, buffer + pos, end - pos);
+        end -= pos;
+        pos = 0;
+    }
+    long count = fread(buffer + end, 1, size - end, fd);
+    if (count <= 0) {
+        fileEnded = true;
+        return false;
+    }
+    end += count;
+    return true;
+}
+
+//-- find the first CR or LF in the buffer, from the given position, or -1 if there isn't one
+long LineReader::findBreak(long from) {
+    const char *lf = (const char *) memchr(buffer + from, '\n', end - from);
+    long length = (lf ? lf - buffer : end) - from;
+    const char *cr = (const char *) memchr(buffer + from, '\r', length);
+    if (cr)
+        return cr - buffer;
+    return lf ? lf - buffer : -1;
+}
+
+bool LineReader::getLine(char *line, int *lineno) {
     line[0] = '\0';
     while (true) {
-        count = 0;
-        while (count < MAXLINE) {
-            current = (char) fgetc(fd);
-            if ((count == 0) && feof(fd))
-                break;
-            if ((current == '\r') || (current == '\n') || feof(fd)) {
-                line[count++] = '\n';
-                break;
-            } else if (current == '#') {
-                while ((current != '\r') && (current != '\n') && !feof(fd)) {
-                    current = (char) fgetc(fd);
-                }
-                if (count == 0)
-                    continue;
-                line[count++] = '\n';
-                break;
-            } else {
-                line[count++] = current;
-            }
+        if (pos == end && !fill()) {
+            endReached = true;
+            return false; // end of file
         }
-        if ((count == MAXLINE) && (line[count - 1] != '\n')) {
+        long lineEnd;
+        while ((lineEnd = findBreak(pos)) < 0 && fill())
+            ;
+        long length = (lineEnd < 0 ? end : lineEnd) - pos;
+        //-- the line ends at the first comment
+        const char *comment = (const char *) memchr(buffer + pos, '#', length);
+        long count = comment ? comment - (buffer + pos) : length;
+        if (count >= MAXLINE) {
+            if (!ownsBuffer)
+                return false; // the caller reports this
             printf("Error: maximum line length (%d) exceeded in data file.\n", MAXLINE);
+            memcpy(line, buffer + pos, MAXLINE);
             line[MAXLINE] = '\0';
             printf("Line begins:\n%s\n", line);
             exit(1);
         }
-        if (count > 0) {
-            line[count++] = '\0';
-            (*lineno)++;
-            trim(line);
-            if (line[0] == '\0')
-                continue; // skip blank lines, comments
-            if (line[0] == '\n')
-                continue; // skip blank lines, comments
-            return true;
-        } else
-            break;
+        memcpy(line, buffer + pos, count);
+        line[count] = '\0';
+        pos += length;
+        //-- a comment can be longer than the buffer; skip the rest of it
+        while (lineEnd < 0 && !fileEnded) {
+            pos = end;
+            if (fill())
+                lineEnd = findBreak(pos);
+        }
+        if (lineEnd < 0)
+            endReached = true; // no line break before the end of the file
+        else
+            pos = lineEnd + 1;
+        if (count == 0 && comment)
+            continue; // a comment line isn't counted
+        (*lineno)++;
+        trim(line);
+        if (line[0] == '\0')
+            continue; // skip blank lines, comments
+        return true;
     }
-    return false; // end of file
 }
 
-bool Options::readOptions(FILE *fd) {
+long LineReader::getText(const char **text) {
+    fill();
+    *text = buffer + pos;
+    if (fileEnded)
+        return end - pos;
+    long last = end;
+    while (last > pos && buffer[last - 1] != '\n' && buffer[last - 1] != '\r')
+        last--;
+    return last - pos;
+}
+
+bool Options::readOptions(LineReader *reader) {
     //-- Read options from a file.  The option name is on a line by itself,
     //-- starting with a colon.  Any option values follow on separate lines
     //-- A given option ends when there is another line with a colon or EOF.
@@ -378,7 +454,7 @@ bool Options::readOptions(FILE *fd) {
     char line[MAXLINE];
     char *cp;
     int lineno = 0;
-    bool gotLine = getLine(fd, line, &lineno);
+    bool gotLine = reader->getLine(line, &lineno);
     while (gotLine) {
         cp = line;
         if (*cp == ':') { // beginning of a new option
@@ -410,7 +486,7 @@ bool Options::readOptions(FILE *fd) {
                 exit(1);
             }
         }
-        gotLine = getLine(fd, line, &lineno);
+        gotLine = reader->getLine(line, &lineno);
     }
     return true;
 }
@@ -496,6 +572,17 @@ bool Options::getOptionFloat(const char *name, void **nextp, double *nvalue) {
     }
 }
 
+bool Options::getNextOption(void **nextp, const char **name, const char **value) {
+    ocOption *opt = (ocOption *) *nextp;
+    opt = opt ? opt->next : options;
+    if (opt == NULL)
+        return false;
+    *name = opt->def->name;
+    *value = opt->value;
+    *nextp = opt;
+    return true;
+}
+
 void Options::write(FILE *fd, bool printHTML, bool skipNominal) {
     const char *startline, *endline, *fieldsep;
 
@@ -7,6 +7,7 @@
 
 #include "Relation.h"
 #include "RelCache.h"
+#include "Table.h"
 
 #include <assert.h>
 #include <stdio.h>
@@ -14,23 +15,21 @@
 #include <memory.h>
 #include <string.h>
 
-static int hashcode(const char *name, int hashsize) {
-    unsigned int key = 0;
-    for (const char *cp = name; *cp; cp++)
-        key = (key << 1) + *cp;
-    return key % hashsize;
-}
-
 RelCache::RelCache() {
-    hash = new Relation*[RELCACHE_HASHSIZE];
-    memset(hash, 0, RELCACHE_HASHSIZE * sizeof(Relation*));
+    hashSize = RELCACHE_HASHSIZE;
+    relationCount = 0;
+    hash = new Relation*[hashSize];
+    memset(hash, 0, hashSize * sizeof(Relation*));
+    tableHead = tableTail = NULL;
+    tableBytes = tableCount = maxTableBytes = 0;
+    hits = misses = evictions = 0;
 }
 
 //-- destroy relation cache.  This also deletes all the relations held in the cache.
 RelCache::~RelCache() {
     Relation *r1, *r2;
     int i;
-    for (i = 0; i < RELCACHE_HASHSIZE; i++) {
+    for (i = 0; i < hashSize; i++) {
         r1 = hash[i];
         while (r1) {
             r2 = r1->getHashNext();
@@ -38,14 +37,14 @@ RelCache::~RelCache() {
             r1 = r2;
         }
     }
-    delete hash;
+    delete[] hash;
 }
 
 long RelCache::size() {
-    long size = RELCACHE_HASHSIZE * sizeof(Relation*);
+    long size = hashSize * sizeof(Relation*);
     Relation *r1;
     int i;
-    for (i = 0; i < RELCACHE_HASHSIZE; i++) {
+    for (i = 0; i < hashSize; i++) {
         r1 = hash[i];
         while (r1) {
             size += r1->size();
@@ -55,48 +54,124 @@ long RelCache::size() {
     return size;
 }
 
-//-- delete tables from all relations
+//-- delete tables from all relations. Only the tables made through the cache
+//-- are deleted; a table set directly on a relation (such as the input data,
+//-- for the top relation) belongs to someone else.
 void RelCache::deleteTables() {
-    Relation *r1;
-    int i;
-    for (i = 0; i < RELCACHE_HASHSIZE; i++) {
-        r1 = hash[i];
-        while (r1) {
-            r1->deleteTable();
-            r1 = r1->getHashNext();
-        }
+    while (tableHead) {
+        Relation *rel = tableHead;
+        unlinkTable(rel);
+        rel->deleteTable();
+    }
+    tableBytes = 0;
+    tableCount = 0;
+}
+
+bool RelCache::isTracked(Relation *rel) {
+    return rel == tableHead || rel->getTablePrev() != NULL;
+}
+
+void RelCache::unlinkTable(Relation *rel) {
+    Relation *prev = rel->getTablePrev();
+    Relation *next = rel->getTableNext();
+    if (prev) prev->setTableNext(next);
+    else tableHead = next;
+    if (next) next->setTablePrev(prev);
+    else tableTail = prev;
+    rel->setTablePrev(NULL);
+    rel->setTableNext(NULL);
+}
+
+static void linkFirst(Relation *rel, Relation *&head, Relation *&tail) {
+    rel->setTablePrev(NULL);
+    rel->setTableNext(head);
+    if (head) head->setTablePrev(rel);
+    else tail = rel;
+    head = rel;
+}
+
+void RelCache::addTable(Relation *rel) {
+    misses++;
+    if (isTracked(rel) || rel->getTable() == NULL)
+        return;
+    linkFirst(rel, tableHead, tableTail);
+    tableBytes += rel->getTable()->size();
+    tableCount++;
+}
+
+void RelCache::useTable(Relation *rel) {
+    if (!isTracked(rel))
+        return;
+    hits++;
+    if (rel == tableHead)
+        return;
+    unlinkTable(rel);
+    linkFirst(rel, tableHead, tableTail);
+}
+
+void RelCache::trimTables(int keepCount) {
+    if (maxTableBytes <= 0)
+        return;
+    while (tableBytes > maxTableBytes && tableCount > keepCount) {
+        Relation *rel = tableTail;
+        unlinkTable(rel);
+        tableBytes -= rel->getTable()->size();
+        tableCount--;
+        rel->deleteTable();
+        evictions++;
     }
 }
 
 //-- addRelation - put a new relation in the cache. If a matching relation already
 //-- exists, an error is returned.
-// [JSF] This doesn't seem to check for matches, or return errors.
 bool RelCache::addRelation(class Relation *rel) {
-    if (findRelation(rel->getPrintName()) != NULL)
+    if (findRelation(rel) != NULL)
         return false; //error; exists
-    KeySegment *mask = rel->getMask();
-    int hashindex = hashcode(rel->getPrintName(), RELCACHE_HASHSIZE);
+    if (relationCount >= hashSize)
+        growHash();
+    long hashindex = rel->getHashKey() & (hashSize - 1);
     rel->setHashNext(hash[hashindex]);
     hash[hashindex] = rel;
+    relationCount++;
     return true;
 }
 
-//-- findRelation - find a relation in the cache.  Null is returned if the given
-//-- relation doesn't exist.
-class Relation *RelCache::findRelation(const char *name) {
-    int hashindex = hashcode(name, RELCACHE_HASHSIZE);
+//-- findRelation - find the relation in the cache with the same structure as the
+//-- given one.  Null is returned if there is none.
+class Relation *RelCache::findRelation(Relation *rel) {
+    long hashindex = rel->getHashKey() & (hashSize - 1);
     Relation *rp = hash[hashindex];
-    while (rp && strcmp(name, rp->getPrintName()) != 0)
+    while (rp && !rp->isSameAs(rel))
         rp = rp->getHashNext();
     return rp; // either NULL, or the matching one
 }
 
+//-- double the number of hash chains, so they stay short
+void RelCache::growHash() {
+    long newSize = hashSize * 2;
+    Relation **newHash = new Relation*[newSize];
+    memset(newHash, 0, newSize * sizeof(Relation*));
+    for (long i = 0; i < hashSize; i++) {
+        Relation *rp = hash[i];
+        while (rp) {
+            Relation *next = rp->getHashNext();
+            long hashindex = rp->getHashKey() & (newSize - 1);
+            rp->setHashNext(newHash[hashindex]);
+            newHash[hashindex] = rp;
+            rp = next;
+        }
+    }
+    delete[] hash;
+    hash = newHash;
+    hashSize = newSize;
+}
+
 //-- dump - print out all relations in the cache
 void RelCache::dump() {
     printf("\nDumping RelCache:\n");
-    for (int i = 0; i < RELCACHE_HASHSIZE; i++) {
+    for (long i = 0; i < hashSize; i++) {
         if (hash[i]) {
-            printf("hash chain [%d]:\n", i);
+            printf("hash chain [%ld]:\n", i);
             for (Relation *rel = hash[i]; rel; rel = rel->getHashNext()) {
                 rel->dump();
             }
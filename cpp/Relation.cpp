@@ -22,6 +22,7 @@ Relation::Relation(VariableList *list, int size, int keysz, long stateconstsz) {
     varCount = 0;
     vars = new int[size];
     table = NULL;
+    dataIndex = NULL;
     stateConstraints = NULL;
     states = NULL;
     if (stateconstsz >= 0) {
@@ -30,7 +31,13 @@ Relation::Relation(VariableList *list, int size, int keysz, long stateconstsz) {
         stateConstraints = new StateConstraint(keysz, stateconstsz);
     }
     mask = NULL;
+    varBits = NULL;
+    varBitWords = 0;
+    hashKey = 0;
+    hashKeyValid = false;
     hashNext = NULL;
+    tablePrev = NULL;
+    tableNext = NULL;
     attributeList = new AttributeList(2);
     printName = NULL;
     inverseName = NULL;
@@ -52,8 +59,12 @@ Relation::~Relation() {
         delete stateConstraints;
     if (table)
         delete table;
+    if (dataIndex)
+        delete[] dataIndex;
     if (mask)
         delete[] mask;
+    if (varBits)
+        delete[] varBits;
 }
 
 long Relation::size() {
@@ -87,6 +98,11 @@ void Relation::addVariable(int varindex, int stateind) {
         states[varCount] = stateind;
     }
     varCount++;
+    if (varBits) {
+        delete[] varBits;
+        varBits = NULL;
+    }
+    hashKeyValid = false;
 }
 
 // returns the VariableList object
@@ -194,6 +210,25 @@ int Relation::findVariable(int varid) {
     return -1;
 }
 
+bool Relation::hasVariable(int varid) {
+    if (varBits == NULL)
+        buildVarBits();
+    int word = varid / 64;
+    return varid >= 0 && word < varBitWords && (varBits[word] >> (varid % 64) & 1);
+}
+
+unsigned long long *Relation::getVarBits() {
+    if (varBits == NULL)
+        buildVarBits();
+    return varBits;
+}
+
+int Relation::getVarBitWords() {
+    if (varBits == NULL)
+        buildVarBits();
+    return varBitWords;
+}
+
 // return number of variables in relation
 int Relation::getVariableCount() {
     return varCount;
@@ -234,6 +269,17 @@ void Relation::deleteTable() {
         delete table;
         table = NULL;
     }
+    setDataIndex(NULL);
+}
+
+void Relation::setDataIndex(long long *index) {
+    if (dataIndex)
+        delete[] dataIndex;
+    dataIndex = index;
+}
+
+long long *Relation::getDataIndex() {
+    return dataIndex;
 }
 
 // sets/gets the state constraints for the relation
@@ -259,8 +305,53 @@ bool Relation::contains(Relation *other) {
     if (isStateBased() || other->isStateBased())
         return ocContainsStates(varCount, vars, states, other->varCount, other->vars, other->states);
         // or check if models of rel A & B are equivalent
-    else
-        return ocContainsVariables(varCount, vars, other->varCount, other->vars);
+    else if (varCount < other->varCount)
+        return false;
+    else {
+        if (varBits == NULL)
+            buildVarBits();
+        if (other->varBits == NULL)
+            other->buildVarBits();
+        return ocContainsBits(varBitWords, varBits, other->varBitWords, other->varBits);
+    }
+}
+
+//-- The print name leaves out the state of a binary DV, so the relation is the same
+//-- whichever state is given (or none).
+int Relation::getPrintedState(int index) {
+    if (states == NULL || states[index] == DONT_CARE)
+        return DONT_CARE;
+    if (varList) {
+        Variable *var = varList->getVariable(vars[index]);
+        if (var->dv && var->cardinality == 2)
+            return DONT_CARE;
+    }
+    return states[index];
+}
+
+unsigned long long Relation::getHashKey() {
+    if (!hashKeyValid) {
+        //-- FNV-1a over the variables and states
+        hashKey = 14695981039346656037ULL;
+        for (int i = 0; i < varCount; i++) {
+            hashKey = (hashKey ^ (unsigned int) vars[i]) * 1099511628211ULL;
+            hashKey = (hashKey ^ (unsigned int) getPrintedState(i)) * 1099511628211ULL;
+        }
+        hashKeyValid = true;
+    }
+    return hashKey;
+}
+
+bool Relation::isSameAs(Relation *other) {
+    if (this == other)
+        return true;
+    if (varCount != other->varCount || getHashKey() != other->getHashKey())
+        return false;
+    for (int i = 0; i < varCount; i++) {
+        if (vars[i] != other->vars[i] || getPrintedState(i) != other->getPrintedState(i))
+            return false;
+    }
+    return true;
 }
 
 // see if all variables are independent variables. These relations are not decomposed during search
@@ -358,6 +449,7 @@ void Relation::sort(int *vars, int varCount, int *states) {
 
 void Relation::sort() {
     sort(vars, varCount, states);
+    hashKeyValid = false;
     //qsort(vars, varCount, sizeof(int), sortCompare);
 }
 
@@ -458,6 +550,20 @@ double Relation::getMatchingTupleValue(KeySegment *key) {
     return value;
 }
 
+void Relation::buildVarBits() {
+    //-- all relations over a variable list have the same number of words
+    int count = varList ? varList->getVarCount() : 0;
+    for (int i = 0; i < varCount; i++) {
+        if (vars[i] >= count)
+            count = vars[i] + 1;
+    }
+    varBitWords = ocVarBitWords(count);
+    varBits = new unsigned long long[varBitWords];
+    memset(varBits, 0, varBitWords * sizeof(unsigned long long));
+    for (int i = 0; i < varCount; i++)
+        varBits[vars[i] / 64] |= 1ULL << (vars[i] % 64);
+}
+
 void Relation::buildMask() {
     int keysize = varList->getKeySize();
     mask = new KeySegment[keysize];
@@ -14,6 +14,7 @@
 #include <string.h>
 #include <ctype.h>
 #include <stdlib.h>
+#include <algorithm>
 
 /* Global and static variables...
  * collected towards the top in an attempt to increase my understanding */
@@ -88,21 +89,12 @@ void Report::setAttributes(const char *attrlist) {
 }
 
 void Report::sort(const char *attr, Direction dir) {
-    extern const char *sortAttr;
-    extern Direction sortDir;
-    extern Direction searchDir;
-    sortAttr = attr;
-    sortDir = dir;
-    searchDir = manager->getSearchDirection();
-    qsort(models, modelCount, sizeof(Model*), sortCompare);
+    std::stable_sort(models, models + modelCount, ModelOrder(attr, dir, manager->getSearchDirection()));
 }
 
 void Report::sort(class Model** models, long modelCount, const char *attr, Direction dir) {
-    extern const char *sortAttr;
-    extern Direction sortDir;
-    sortAttr = attr;
-    sortDir = dir;
-    qsort(models, modelCount, sizeof(Model*), sortCompare);
+    //-- models of a search level are all at the same level, so the search direction doesn't matter
+    std::stable_sort(models, models + modelCount, ModelOrder(attr, dir, Direction::Ascending));
 }
 
 // Print a report of the search results
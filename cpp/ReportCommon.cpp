@@ -9,8 +9,47 @@
 #include <cstring>
 #include "ManagerBase.h"
 #include <math.h>
+#include <stdarg.h>
 #include "Constants.h"
 
+static const long REPORT_BUFFER_SIZE = 1 << 20;
+
+ReportBuffer::ReportBuffer(FILE *fd) : fd(fd), used(0) {
+    buffer = new char[REPORT_BUFFER_SIZE];
+}
+
+ReportBuffer::~ReportBuffer() {
+    flush();
+    delete[] buffer;
+}
+
+void ReportBuffer::print(const char *format, ...) {
+    va_list args;
+    va_start(args, format);
+    int length = vsnprintf(buffer + used, REPORT_BUFFER_SIZE - used, format, args);
+    va_end(args);
+    if (length < 0)
+        return;
+    if (length < REPORT_BUFFER_SIZE - used) {
+        used += length;
+        return;
+    }
+    //-- it didn't fit; make room, and if it still doesn't fit, write it directly
+    flush();
+    va_start(args, format);
+    if (length < REPORT_BUFFER_SIZE)
+        used += vsnprintf(buffer, REPORT_BUFFER_SIZE, format, args);
+    else
+        vfprintf(fd, format, args);
+    va_end(args);
+}
+
+void ReportBuffer::flush() {
+    if (used > 0)
+        fwrite(buffer, 1, used, fd);
+    used = 0;
+}
+
 void Report::newl(FILE* fd) {
     if (htmlMode) {
         fprintf(fd, "<br/>");
@@ -144,8 +183,7 @@ const char* Report::delim() { return delim_arr[sepStyle()]; }
 const char* Report::hdr_delim() { return hdr_delim_arr[sepStyle()]; }
 
 
-void Report::printTableRow(FILE* fd, bool blue, VariableList* varlist, int var_count, Relation* rel, double value, KeySegment* refkey, double refvalue, double iviValue, double adjustConstant, double sample_size, bool printLift, bool printCalc) {
-    char* keystr = new char[var_count * (MAXABBREVLEN + strlen(delim())) + 1];
+void Report::printTableRow(ReportBuffer& out, char* keystr, bool blue, VariableList* varlist, int var_count, Relation* rel, double value, KeySegment* refkey, double refvalue, double iviValue, double adjustConstant, double sample_size, bool printLift, bool printCalc) {
     Key::keyToUserString(refkey, varlist, keystr, delim());
 
     const char* pre = !htmlMode ? "" : (blue ? "<tr class=r1>" : "<tr>");
@@ -156,21 +194,20 @@ void Report::printTableRow(FILE* fd, bool blue, VariableList* varlist, int var_c
         double res = value - refvalue;
         if (printLift) {
 
-            fprintf(fd, fmt, pre, keystr, refvalue, refvalue * sample_size - adjustConstant, value, value * sample_size - adjustConstant, res, iviValue, iviValue * sample_size - adjustConstant, lift);
+            out.print(fmt, pre, keystr, refvalue, refvalue * sample_size - adjustConstant, value, value * sample_size - adjustConstant, res, iviValue, iviValue * sample_size - adjustConstant, lift);
         } else {
 
-            fprintf(fd, fmt, pre, keystr, refvalue, refvalue * sample_size - adjustConstant, value, value * sample_size - adjustConstant, res);
+            out.print(fmt, pre, keystr, refvalue, refvalue * sample_size - adjustConstant, value, value * sample_size - adjustConstant, res);
         }
 
     } else if(rel != NULL) { 
         if (printLift) {
-            fprintf(fd, fmt, pre, keystr, refvalue, refvalue * sample_size - adjustConstant, iviValue, iviValue * sample_size - adjustConstant, lift); 
+            out.print(fmt, pre, keystr, refvalue, refvalue * sample_size - adjustConstant, iviValue, iviValue * sample_size - adjustConstant, lift); 
 
         } else {
-            fprintf(fd, fmt, pre, keystr, refvalue, refvalue * sample_size - adjustConstant); 
+            out.print(fmt, pre, keystr, refvalue, refvalue * sample_size - adjustConstant); 
         }
     }
-    delete[] keystr;
 }
 
 
@@ -180,6 +217,9 @@ void Report::printTable(FILE* fd, Relation* rel, Table* fit_table, Table* input_
     VariableList* varlist = rel ? rel->getVariableList() : manager->getVariableList();
     int var_count = varlist->getVarCount();
     header(fd, rel, printLift, printCalc);
+    //-- the rows (and totals) are written through a buffer; the key strings are built in keystr
+    ReportBuffer out(fd);
+    char* keystr = new char[var_count * (MAXABBREVLEN + strlen(delim())) + 1];
     
     bool blue = 1;
 
@@ -200,7 +240,7 @@ void Report::printTable(FILE* fd, Relation* rel, Table* fit_table, Table* input_
         value_total += value;
         refValue_total += refvalue;
         iviValue_total += iviValue;
-        printTableRow(fd, blue, varlist, var_count, rel, value, refkey, refvalue, iviValue, adjustConstant, sample_size, printLift, printCalc);
+        printTableRow(out, keystr, blue, varlist, var_count, rel, value, refkey, refvalue, iviValue, adjustConstant, sample_size, printLift, printCalc);
         blue = !blue;
         lastRefKey = refkey;
     };
@@ -210,7 +250,7 @@ void Report::printTable(FILE* fd, Relation* rel, Table* fit_table, Table* input_
 
 
     auto tableTotals = 
-        [this,fd,adjustConstant,rel,printLift,printCalc,var_count,lastRefKey,varlist]
+        [this,&out,keystr,adjustConstant,rel,printLift,printCalc,lastRefKey,varlist]
         (double value, double refvalue, double ivivalue, double sample_size) {
 
         const char* pre = !htmlMode ? "" : "<tr>";
@@ -218,30 +258,31 @@ void Report::printTable(FILE* fd, Relation* rel, Table* fit_table, Table* input_
 
         double lift = value / ivivalue; 
 
-        char* keystr = new char[var_count * (MAXABBREVLEN + strlen(delim())) + 1];
         Key::keyToUserString(lastRefKey, varlist, keystr, delim(), false);
 
         if (printCalc) {
             double res = value - refvalue;
             if (printLift) {
 
-                fprintf(fd, fmt, pre, keystr, refvalue, refvalue * sample_size - adjustConstant, value, value * sample_size - adjustConstant, res, ivivalue, ivivalue * sample_size - adjustConstant, lift);
+                out.print(fmt, pre, keystr, refvalue, refvalue * sample_size - adjustConstant, value, value * sample_size - adjustConstant, res, ivivalue, ivivalue * sample_size - adjustConstant, lift);
             } else {
-                fprintf(fd, fmt, pre, keystr, refvalue, refvalue * sample_size - adjustConstant, value, value * sample_size - adjustConstant, res);
+                out.print(fmt, pre, keystr, refvalue, refvalue * sample_size - adjustConstant, value, value * sample_size - adjustConstant, res);
             }
 
         } else if(rel != NULL) { 
             if (printLift) {
-                fprintf(fd, fmt, pre, keystr, refvalue, refvalue * sample_size - adjustConstant, ivivalue, ivivalue * sample_size - adjustConstant, lift); 
+                out.print(fmt, pre, keystr, refvalue, refvalue * sample_size - adjustConstant, ivivalue, ivivalue * sample_size - adjustConstant, lift); 
 
             } else {
-                fprintf(fd, fmt, pre, keystr, refvalue, refvalue * sample_size - adjustConstant); 
+                out.print(fmt, pre, keystr, refvalue, refvalue * sample_size - adjustConstant); 
             }
         }
     };
 
 
     tableTotals(value_total, refValue_total, iviValue_total, sample_size);
+    out.flush();
+    delete[] keystr;
 
     header(fd, rel, printLift, printCalc, false);
     
@@ -250,33 +291,33 @@ void Report::printTable(FILE* fd, Relation* rel, Table* fit_table, Table* input_
     if ((printCalc && (1 - value_total) > PRINT_MIN)
         || (printLift && (1 - iviValue_total > PRINT_MIN))
         || sawUndefinedLift) {
-        printf("Note: ");
+        fprintf(fd, "Note: ");
         newl(fd);
     }
     if (printCalc && (1 - value_total) > PRINT_MIN) {
-        printf("The calculated probabilities sum to less than 1");
+        fprintf(fd, "The calculated probabilities sum to less than 1");
         newl(fd);
-        printf("(and the total residual is less than 0)");
+        fprintf(fd, "(and the total residual is less than 0)");
         newl(fd);
-        printf("because the calculated distribution has probability");
+        fprintf(fd, "because the calculated distribution has probability");
         newl(fd);
-        printf("distributed over states that were not observed in the data. \n");
+        fprintf(fd, "distributed over states that were not observed in the data. \n");
         newl(fd);
     }
     if (printLift && (1 - iviValue_total > PRINT_MIN)) {
-        printf("The independence probabilities sum to less than 1");
+        fprintf(fd, "The independence probabilities sum to less than 1");
         newl(fd);
-        printf(" because the independence distribution has probability");
+        fprintf(fd, " because the independence distribution has probability");
         newl(fd);
-        printf(" distributed over states that were not observed in the data. \n");
+        fprintf(fd, " distributed over states that were not observed in the data. \n");
         newl(fd);
     }
     if (sawUndefinedLift) {
-        printf("One or more states has an undefined (\"-nan\") lift value,");
+        fprintf(fd, "One or more states has an undefined (\"-nan\") lift value,");
         newl(fd);
-        printf(" because the calculated and independence probabilities are both 0,");
+        fprintf(fd, " because the calculated and independence probabilities are both 0,");
         newl(fd);
-        printf(" possibly because the state was never seen in the training data. \n");
+        fprintf(fd, " possibly because the state was never seen in the training data. \n");
         newl(fd);
     }
     if ((printCalc && (1 - value_total) > PRINT_MIN)
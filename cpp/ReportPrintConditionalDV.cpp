@@ -12,6 +12,84 @@
 #include <cmath>
 #include "Math.h"
 #include <climits>
+#include <algorithm>
+#include <string>
+#include <unordered_map>
+#include <vector>
+
+//-- a key as a string of its bytes, for looking keys up in a hash table
+static std::string keyString(KeySegment *key, int key_size) {
+    return std::string((const char *) key, key_size * sizeof(KeySegment));
+}
+
+/*
+ * groupSiblings - group the tuples of a table by IV state, that is, by key with the DV set to
+ * DONT_CARE. The states are numbered in the order they first appear in the table, up to
+ * max_states of them. Each state's key is copied to keys, and entered in states; the index of
+ * its tuple for each DV value (or -1) is put in siblings[state * dv_card + value], in the order
+ * Key::getSiblings would find them. Each tuple is looked at once, rather than searching the
+ * table for each sibling, and the earlier states for each tuple. Returns the number of states.
+ */
+static int groupSiblings(Table *table, VariableList *var_list, int dv_index, int dv_card, int max_states,
+        KeySegment **keys, std::vector<long> &siblings, std::unordered_map<std::string, int> &states) {
+    int key_size = table->getKeySize();
+    long long table_size = table->getTupleCount();
+    KeySegment *temp_key = new KeySegment[key_size];
+    int count = 0;
+    siblings.clear();
+    for (long long index = 0; index < table_size; index++) {
+        KeySegment *key = table->getKey(index);
+        memcpy(temp_key, key, key_size * sizeof(KeySegment));
+        Key::setKeyValue(temp_key, key_size, var_list, dv_index, DONT_CARE);
+        std::string name = keyString(temp_key, key_size);
+        std::unordered_map<std::string, int>::iterator found = states.find(name);
+        int state;
+        if (found != states.end()) {
+            state = found->second;
+        } else if (count < max_states) {
+            state = count++;
+            states[name] = state;
+            memcpy(keys[state], temp_key, key_size * sizeof(KeySegment));
+            siblings.resize(count * dv_card, -1);
+        } else
+            continue;
+        int dv_value = Key::getKeyValue(key, key_size, var_list, dv_index);
+        if (dv_value < dv_card)
+            siblings[state * dv_card + dv_value] = index;
+    }
+    delete[] temp_key;
+    return count;
+}
+
+/*
+ * findFitIndex - find an IV state's index in the fit table's states. A state the fit table
+ * doesn't have is added at the end, as tied, with the rule of its state in the alternate
+ * default table (if alt_missing_indices is given and the state is there).
+ */
+static int findFitIndex(KeySegment *key, int key_size, VariableList *var_list, KeySegment **fit_key,
+        std::unordered_map<std::string, int> &fit_states, int *keys_found,
+        std::unordered_map<std::string, int> &alt_states, int *alt_rule, int *alt_missing_indices,
+        int alt_missing_count, int *fit_rule, bool *fit_tied) {
+    std::string name = keyString(key, key_size);
+    std::unordered_map<std::string, int>::iterator found = fit_states.find(name);
+    if (found != fit_states.end())
+        return found->second;
+    int fit_index = (*keys_found)++;
+    fit_states[name] = fit_index;
+    memcpy(fit_key[fit_index], key, key_size * sizeof(KeySegment));
+    if (alt_missing_indices != NULL) {
+        KeySegment *temp_key = new KeySegment[key_size];
+        memcpy(temp_key, key, key_size * sizeof(KeySegment));
+        for (int j = 0; j < alt_missing_count; j++)
+            Key::setKeyValue(temp_key, key_size, var_list, alt_missing_indices[j], DONT_CARE);
+        std::unordered_map<std::string, int>::iterator alt = alt_states.find(keyString(temp_key, key_size));
+        if (alt != alt_states.end())
+            fit_rule[fit_index] = alt_rule[alt->second];
+        delete[] temp_key;
+    }
+    fit_tied[fit_index] = true;
+    return fit_index;
+}
 
 void Report::printConditional_DV(FILE *fd, Model *model, bool calcExpectedDV, char* classTarget) {
     printConditional_DV(fd, model, NULL, calcExpectedDV, classTarget);
@@ -90,6 +168,7 @@ void Report::printConditional_DV(FILE *fd, Model *model, Relation *rel, bool cal
                 manager->makeProjection(test_data, test_table, predRelWithDV);
             iv_rel = predRelWithDV;
         } else {
+            manager->makeProjection(rel);
             fit_table = rel->getTable();
             manager->makeProjection(input_data, input_table, rel);
             if (test_sample_size > 0.0)
@@ -342,24 +421,13 @@ void Report::printConditional_DV(FILE *fd, Model *model, Relation *rel, bool cal
     }
     fprintf(fd, blank_line);
 
-    int index = 0;
     int keys_found = 0;
     int alt_keys_found = 0;
-    KeySegment *key;
     double temp_value;
     long *index_sibs = new long[dv_card];
-    int key_compare, num_sibs;
+    int num_sibs;
 
-    int fit_table_size = fit_table->getTupleCount();
     int input_table_size = input_table->getTupleCount();
-    int alt_table_size = 0;
-    if (use_alt_default) {
-        alt_table_size = alt_table->getTupleCount();
-    }
-    int test_table_size = 0;
-    if (test_sample_size > 0.0) {
-        test_table_size = test_table->getTupleCount();
-    }
     int dv_value, best_i;
 
     // Count up the total frequencies for each DV value in the reference data, for the output table.
@@ -385,39 +453,27 @@ void Report::printConditional_DV(FILE *fd, Model *model, Relation *rel, bool cal
     double precision = 1.0e10;
 
     // Work out the alternate default table, if requested
+    std::vector<long> sibs;
+    std::unordered_map<std::string, int> alt_states;
     if (use_alt_default) {
-        while (alt_keys_found < iv_statespace) {
-            if (index >= alt_table_size)
-                break;
-
-            key = alt_table->getKey(index);
-            index++;
-            memcpy((int *) temp_key_array, (int *) key, key_size * sizeof(KeySegment));
-            Key::setKeyValue(temp_key_array, key_size, var_list, dv_index, DONT_CARE);
-
-            key_compare = 1;
-            for (int i = 0; i < alt_keys_found; i++) {
-                key_compare = Key::compareKeys((KeySegment *) alt_key[i], temp_key_array, key_size);
-                if (key_compare == 0)
-                    break;
-            }
-            if (key_compare == 0)
-                continue;
-            memcpy((int *) alt_key[alt_keys_found], (int *) temp_key_array, sizeof(KeySegment) * key_size);
+        alt_keys_found = groupSiblings(alt_table, var_list, dv_index, dv_card, iv_statespace, alt_key, sibs, alt_states);
+        for (int k = 0; k < alt_keys_found; k++) {
             num_sibs = 0;
-            Key::getSiblings(key, var_list, alt_table, index_sibs, dv_index, &num_sibs);
+            for (int v = 0; v < dv_card; v++)
+                if (sibs[k * dv_card + v] >= 0)
+                    index_sibs[num_sibs++] = sibs[k * dv_card + v];
             best_i = 0;
             temp_value = 0.0;
             for (int i = 0; i < num_sibs; i++) {
                 temp_value += alt_table->getValue(index_sibs[i]);
                 KeySegment *temp_key = alt_table->getKey(index_sibs[i]);
                 dv_value = Key::getKeyValue(temp_key, key_size, var_list, dv_index);
-                alt_prob[alt_keys_found][dv_value] = alt_table->getValue(index_sibs[i]);
+                alt_prob[k][dv_value] = alt_table->getValue(index_sibs[i]);
                 if (i == 0) {
                     best_i = dv_value;
                 } else {
-                    f1 = round(alt_prob[alt_keys_found][dv_value] * precision);
-                    f2 = round(alt_prob[alt_keys_found][best_i] * precision);
+                    f1 = round(alt_prob[k][dv_value] * precision);
+                    f2 = round(alt_prob[k][best_i] * precision);
                     if (f1 > f2) {
                         best_i = dv_value;
                     } else if (fabs(f1 - f2) < 1) {
@@ -426,43 +482,23 @@ void Report::printConditional_DV(FILE *fd, Model *model, Relation *rel, bool cal
                     }
                 }
             }
-            alt_key_prob[alt_keys_found] = temp_value;
-            alt_rule[alt_keys_found] = best_i;
-            alt_keys_found++;
+            alt_key_prob[k] = temp_value;
+            alt_rule[k] = best_i;
         }
     }
 
     bool tie_flag;
-    index = 0;
-    // Loop till we have as many keys as the size of the IV statespace (at most)
-    while (keys_found < iv_statespace) {
-        // Also break the loop if index exceeds the tupleCount for the table
-        if (index >= fit_table_size)
-            break;
-
-        // Get the key and value for the current index
-        key = fit_table->getKey(index);
-        index++;
-        memcpy((int *) temp_key_array, (int *) key, key_size * sizeof(KeySegment));
-        Key::setKeyValue(temp_key_array, key_size, var_list, dv_index, DONT_CARE);
-
-        // Check if this key has appeared yet
-        key_compare = 1;
-        for (int i = 0; i < keys_found; i++) {
-            key_compare = Key::compareKeys((KeySegment *) fit_key[i], temp_key_array, key_size);
-            // If zero is returned, keys are equal, meaning this key has appeared before.  Stop checking.
-            if (key_compare == 0)
-                break;
-        }
-        // If this was a duplicate key, move on to the next index.
-        if (key_compare == 0)
-            continue;
-        // Otherwise, this is a new key.  Place it into the keylist
-        memcpy((int *) fit_key[keys_found], (int *) temp_key_array, sizeof(KeySegment) * key_size);
+    std::unordered_map<std::string, int> fit_states;
+    keys_found = groupSiblings(fit_table, var_list, dv_index, dv_card, iv_statespace, fit_key, sibs, fit_states);
+    // For each IV state of the fit table...
+    for (int k = 0; k < keys_found; k++) {
+        memcpy((int *) temp_key_array, (int *) fit_key[k], key_size * sizeof(KeySegment));
 
         // Get the siblings of the key
         num_sibs = 0;
-        Key::getSiblings(key, var_list, fit_table, index_sibs, dv_index, &num_sibs);
+        for (int v = 0; v < dv_card; v++)
+            if (sibs[k * dv_card + v] >= 0)
+                index_sibs[num_sibs++] = sibs[k * dv_card + v];
 
         tie_flag = false;
         best_i = 0;
@@ -475,15 +511,15 @@ void Report::printConditional_DV(FILE *fd, Model *model, Relation *rel, bool cal
             // Get the dv_value for the sibling
             dv_value = Key::getKeyValue(temp_key, key_size, var_list, dv_index);
             // Compute & store the conditional value for the sibling (in probability)
-            fit_prob[keys_found][dv_value] = fit_table->getValue(index_sibs[i]);
+            fit_prob[k][dv_value] = fit_table->getValue(index_sibs[i]);
             // Next keep track of what the best number correct is
             // (ie, if this is the first sib, it's the best.  After that, compare & keep the best.)
             if (i == 0) {
                 best_i = dv_value;
             } else {
                 // Probabilities are rounded so checks for gt/lt/eq are not skewed by the imprecision in floating point numbers.
-                f1 = round(fit_prob[keys_found][dv_value] * precision);
-                f2 = round(fit_prob[keys_found][best_i] * precision);
+                f1 = round(fit_prob[k][dv_value] * precision);
+                f2 = round(fit_prob[k][best_i] * precision);
                 if (f1 > f2) {
                     best_i = dv_value;
                     tie_flag = false;
@@ -497,25 +533,23 @@ void Report::printConditional_DV(FILE *fd, Model *model, Relation *rel, bool cal
                         for (int j = 0; j < alt_missing_count; j++)
                             Key::setKeyValue(temp_key_array, key_size, var_list, alt_missing_indices[j], DONT_CARE);
                         // find the key in the alt table
-                        for (int j = 0; j < alt_keys_found; j++) {
-                            key_compare = Key::compareKeys((KeySegment *) alt_key[j], temp_key_array, key_size);
-                            if (key_compare == 0) {
-                                // if present, compare the alt values for best_i and dv_value
-                                f1 = round(alt_prob[j][dv_value] * precision);
-                                f2 = round(alt_prob[j][best_i] * precision);
-                                if (f1 > f2)
+                        std::unordered_map<std::string, int>::iterator alt = alt_states.find(keyString(temp_key_array, key_size));
+                        if (alt != alt_states.end()) {
+                            int j = alt->second;
+                            // if present, compare the alt values for best_i and dv_value
+                            f1 = round(alt_prob[j][dv_value] * precision);
+                            f2 = round(alt_prob[j][best_i] * precision);
+                            if (f1 > f2)
+                                best_i = dv_value;
+                            else if (fabs(f1 - f2) < 1)
+                                // there is a tie in the alternate default as well, so revert to independence
+                                if (manager->getDvOrder(best_i) > manager->getDvOrder(dv_value))
                                     best_i = dv_value;
-                                else if (fabs(f1 - f2) < 1)
-                                    // there is a tie in the alternate default as well, so revert to independence
-                                    if (manager->getDvOrder(best_i) > manager->getDvOrder(dv_value))
-                                        best_i = dv_value;
-                                break;
-                            }
-                        }
-                        // if the key was not found in the alt default table, revert to independence
-                        if (key_compare != 0)
+                        } else {
+                            // if the key was not found in the alt default table, revert to independence
                             if (manager->getDvOrder(best_i) > manager->getDvOrder(dv_value))
                                 best_i = dv_value;
+                        }
                     } else {
                         if (manager->getDvOrder(best_i) > manager->getDvOrder(dv_value))
                             best_i = dv_value;
@@ -524,156 +558,67 @@ void Report::printConditional_DV(FILE *fd, Model *model, Relation *rel, bool cal
             }
         }
         // Save the total probability for these siblings.
-        fit_key_prob[keys_found] = temp_value;
+        fit_key_prob[k] = temp_value;
         // Save the final best rule's index.
-        fit_rule[keys_found] = best_i;
-        fit_tied[keys_found] = tie_flag;
-        // And move on to the next key...
-        keys_found++;
+        fit_rule[k] = best_i;
+        fit_tied[k] = tie_flag;
     }
 
     // Sort out the input (reference) data
-    // Loop through all the input data
-    int input_counter = 0;
-    index = 0;
+    // Loop through the IV states of the input data
+    std::unordered_map<std::string, int> input_states;
+    int input_counter = groupSiblings(input_table, var_list, dv_index, dv_card, iv_statespace, input_key, sibs, input_states);
     int fit_index = 0;
-    while (input_counter < iv_statespace) {
-        if (index >= input_table_size)
-            break;
-
-        key = input_table->getKey(index);
-        index++;
-        memcpy((int *) temp_key_array, (int *) key, key_size * sizeof(KeySegment));
-        Key::setKeyValue(temp_key_array, key_size, var_list, dv_index, DONT_CARE);
-
-        // Check if this key has appeared yet -- we only do this so siblings aren't counted multiple times.
-        key_compare = 1;
-        for (int i = 0; i < input_counter; i++) {
-            key_compare = Key::compareKeys((KeySegment *) input_key[i], temp_key_array, key_size);
-            if (key_compare == 0)
-                break;
-        }
-        // If this was a duplicate, move on
-        if (key_compare == 0)
-            continue;
-        // Otherwise, the key is new to the input list, we add it into the list.
-        memcpy((int *) input_key[input_counter], (int *) temp_key_array, sizeof(KeySegment) * key_size);
-
-        // Next, find out if the index of this key is in the fit_key list, to keep the keys in the same order
-        for (fit_index = 0; fit_index < keys_found; fit_index++) {
-            key_compare = Key::compareKeys((KeySegment *) fit_key[fit_index], temp_key_array, key_size);
-            if (key_compare == 0)
-                break;
-        }
-        // If the key wasn't found, we must add it to the fit list as well
-        if (key_compare != 0) {
-            memcpy((int *) fit_key[keys_found], (int *) temp_key_array, sizeof(KeySegment) * key_size);
-            if (use_alt_default) {
-                for (int j = 0; j < alt_missing_count; j++)
-                    Key::setKeyValue(temp_key_array, key_size, var_list, alt_missing_indices[j], DONT_CARE);
-                for (int j = 0; j < alt_keys_found; j++) {
-                    key_compare = Key::compareKeys((KeySegment *) alt_key[j], temp_key_array, key_size);
-                    if (key_compare == 0)
-                        fit_rule[keys_found] = alt_rule[j];
-                }
-            }
-            fit_tied[keys_found] = true;
-            fit_index = keys_found;
-            keys_found++;
-        }
-
-        // Get the siblings of this key
-        num_sibs = 0;
-        Key::getSiblings(key, var_list, input_table, index_sibs, dv_index, &num_sibs);
+    for (int k = 0; k < input_counter; k++) {
+        // Find out the index of this key in the fit_key list, to keep the keys in the same order
+        fit_index = findFitIndex(input_key[k], key_size, var_list, fit_key, fit_states, &keys_found, alt_states,
+                alt_rule, use_alt_default ? alt_missing_indices : NULL, alt_missing_count, fit_rule, fit_tied);
 
         temp_value = 0.0;
-        for (int i = 0; i < num_sibs; i++) {
+        for (int v = 0; v < dv_card; v++) {
+            long sib = sibs[k * dv_card + v];
+            if (sib < 0)
+                continue;
             // Sum up the total frequencies among the siblings
-            temp_value += input_table->getValue(index_sibs[i]);
-            KeySegment *temp_key = input_table->getKey(index_sibs[i]);
-            dv_value = Key::getKeyValue(temp_key, key_size, var_list, dv_index);
-            input_freq[fit_index][dv_value] = input_table->getValue(index_sibs[i]) * sample_size;
+            temp_value += input_table->getValue(sib);
+            input_freq[fit_index][v] = input_table->getValue(sib) * sample_size;
         }
         input_key_freq[fit_index] = temp_value * sample_size;
-        input_counter++;
     }
 
     // Compute performance on test data, if present
     // This section will reuse many of the variables from above, since it is performing a similar task.
     if (test_sample_size > 0.0) {
-        int test_counter = 0;
-        index = 0;
-        fit_index = 0;
-        while (test_counter < iv_statespace) {
-            if (index >= test_table_size)
-                break;
-
-            key = test_table->getKey(index);
-            index++;
-            memcpy((int *) temp_key_array, (int *) key, key_size * sizeof(KeySegment));
-            Key::setKeyValue(temp_key_array, key_size, var_list, dv_index, DONT_CARE);
-
-            // Check if this key has appeared yet -- we only do this so siblings aren't counted multiple times.
-            key_compare = 1;
-            for (int i = 0; i < test_counter; i++) {
-                key_compare = Key::compareKeys((KeySegment *) test_key[i], temp_key_array, key_size);
-                if (key_compare == 0)
-                    break;
-            }
-            // If this was a duplicate, move on
-            if (key_compare == 0)
-                continue;
-            // Otherwise, the key is new to the test list, we add it into the list.
-            memcpy((int *) test_key[test_counter], (int *) temp_key_array, sizeof(KeySegment) * key_size);
-
-            // Next, find out the index of this key in the fit_key list, to keep the keys in the same order
-            for (fit_index = 0; fit_index < keys_found; fit_index++) {
-                key_compare = Key::compareKeys((KeySegment *) fit_key[fit_index], temp_key_array, key_size);
-                if (key_compare == 0)
-                    break;
-            }
-            // If the key wasn't found, we must add it to the fit list as well
-            if (key_compare != 0) {
-                memcpy((int *) fit_key[keys_found], (int *) temp_key_array, sizeof(KeySegment) * key_size);
-                if (use_alt_default) {
-                    for (int j = 0; j < alt_missing_count; j++)
-                        Key::setKeyValue(temp_key_array, key_size, var_list, alt_missing_indices[j], DONT_CARE);
-                    for (int j = 0; j < alt_keys_found; j++) {
-                        key_compare = Key::compareKeys((KeySegment *) alt_key[j], temp_key_array, key_size);
-                        if (key_compare == 0)
-                            fit_rule[keys_found] = alt_rule[j];
-                    }
-                }
-                fit_tied[keys_found] = true;
-                fit_index = keys_found;
-                keys_found++;
-            }
-
-            // Get the siblings of this key
-            num_sibs = 0;
-            Key::getSiblings(key, var_list, test_table, index_sibs, dv_index, &num_sibs);
-
+        std::unordered_map<std::string, int> test_states;
+        int test_counter = groupSiblings(test_table, var_list, dv_index, dv_card, iv_statespace, test_key, sibs, test_states);
+        for (int k = 0; k < test_counter; k++) {
+            // Find out the index of this key in the fit_key list, to keep the keys in the same order
+            fit_index = findFitIndex(test_key[k], key_size, var_list, fit_key, fit_states, &keys_found, alt_states,
+                    alt_rule, use_alt_default ? alt_missing_indices : NULL, alt_missing_count, fit_rule, fit_tied);
+
+            bool first = true;
             best_i = 0;
             temp_value = 0.0;
-            for (int i = 0; i < num_sibs; i++) {
+            for (int v = 0; v < dv_card; v++) {
+                long sib = sibs[k * dv_card + v];
+                if (sib < 0)
+                    continue;
                 // Sum up the total frequencies among the siblings
-                temp_value += test_table->getValue(index_sibs[i]);
-                KeySegment *temp_key = test_table->getKey(index_sibs[i]);
-                dv_value = Key::getKeyValue(temp_key, key_size, var_list, dv_index);
-                test_freq[fit_index][dv_value] = test_table->getValue(index_sibs[i]) * test_sample_size;
-                if (i == 0) {
-                    best_i = dv_value;
+                temp_value += test_table->getValue(sib);
+                test_freq[fit_index][v] = test_table->getValue(sib) * test_sample_size;
+                if (first) {
+                    best_i = v;
+                    first = false;
                 } else {
                     // Note: tie-breaking doesn't matter here, since we are only concerned with finding the best frequency possible,
                     // not with the specific rule that results in that frequency.
-                    if (test_freq[fit_index][dv_value] > test_freq[fit_index][best_i])
-                        best_i = dv_value;
+                    if (test_freq[fit_index][v] > test_freq[fit_index][best_i])
+                        best_i = v;
                 }
             }
 
             test_key_freq[fit_index] = temp_value * test_sample_size;
             test_rule[fit_index] = best_i;
-            test_counter++;
         }
     }
 
@@ -876,14 +821,14 @@ void Report::printConditional_DV(FILE *fd, Model *model, Relation *rel, bool cal
     int *key_order = new int[iv_statespace];        // Created a sorted order for the IV states, so they appear in order in the table
     for (int i = 0; i < iv_statespace; i++)
         key_order[i] = i;
-    
-    
-    sort_var_list = var_list;
-    sort_count = iv_count;
-    sort_vars = ind_vars;
-    sort_keys = fit_key;
-    
-    qsort(key_order, iv_statespace, sizeof(int), sortKeys);
+    // Only the keys found need sorting. The others are all DONT_CARE, so they sort together, in index order,
+    // after any found key which compares equal to them; move them there.
+    KeyValueOrder key_value_order(var_list, iv_count, ind_vars, fit_key, NULL);
+    std::sort(key_order, key_order + keys_found, key_value_order);
+    if (keys_found < iv_statespace) {
+        int *unused = std::lower_bound(key_order, key_order + keys_found, keys_found, key_value_order);
+        std::rotate(unused, key_order + keys_found, key_order + iv_statespace);
+    }
 
     // Prep for P-MARGIN, P-RULE
     // Make table containing univorm distribution of DV cardinality
@@ -900,6 +845,9 @@ void Report::printConditional_DV(FILE *fd, Model *model, Relation *rel, bool cal
     }
 
 
+    //-- the rows are written through a buffer, rather than a call to fprintf for each field
+    ReportBuffer out(fd);
+    double* calculated = new double[dv_card];
     int i;
     // For each of the model's keys (i.e., each row of the table)...
     for (int order_i = 0; order_i < iv_statespace; order_i++) {
@@ -915,16 +863,16 @@ void Report::printConditional_DV(FILE *fd, Model *model, Relation *rel, bool cal
         }
         // Also, switch the bgcolor of each row from grey to white, every other row. (If not in HTML, this does nothing.)
         if (order_i % 2)
-            fprintf(fd, row_start);
+            out.print(row_start);
         else
-            fprintf(fd, row_start2);
+            out.print(row_start2);
         // Print the states of the IV in separate columns
         for (int j = 0; j < iv_count; j++) {
             keyval = Key::getKeyValue(fit_key[i], keysize, var_list, ind_vars[j]);
             keyvalstr = var_list->getVarValue(ind_vars[j], keyval);
-            fprintf(fd, "%s%s", keyvalstr, row_sep);
+            out.print("%s%s", keyvalstr, row_sep);
         }
-        fprintf(fd, "|%s%.3f%s", row_sep, input_key_freq[i], row_sep);
+        out.print("|%s%.3f%s", row_sep, input_key_freq[i], row_sep);
         // Print out the conditional probabilities of the training data
         temp_percent = 0.0;
         for (int j = 0; j < dv_card; j++) {
@@ -933,10 +881,10 @@ void Report::printConditional_DV(FILE *fd, Model *model, Relation *rel, bool cal
             else {
                 temp_percent = input_freq[i][dv_order[j]] / input_key_freq[i] * 100.0;
             }
-            fprintf(fd, "%.3f%s", temp_percent, row_sep);
+            out.print("%.3f%s", temp_percent, row_sep);
         }
         if (rel == NULL || rel->isStateBased()) {
-            fprintf(fd, "|%s", row_sep);
+            out.print("|%s", row_sep);
             // Print out the percentages for each of the DV states
             for (int j = 0; j < dv_card; j++) {
                 if (fit_key_prob[i] == 0)
@@ -947,22 +895,22 @@ void Report::printConditional_DV(FILE *fd, Model *model, Relation *rel, bool cal
                         fit_dv_expected[i] += temp_percent / 100.0 * dv_bin_value[dv_order[j]];
                     }
                 }
-                fprintf(fd, "%.3f%s", temp_percent, row_sep);
+                out.print("%.3f%s", temp_percent, row_sep);
             }
         }
         // Print the DV state of the best rule. If there was no input to base the rule on, use the default rule.
-        fprintf(fd, "%c%s%s", fit_tied[i] ? '*' : ' ', dv_label[fit_rule[i]], row_sep);
+        out.print("%c%s%s", fit_tied[i] ? '*' : ' ', dv_label[fit_rule[i]], row_sep);
 
         // Number correct (of the input data, based on the rule from fit)
-        fprintf(fd, "%.3f%s", input_freq[i][fit_rule[i]], row_sep);
+        out.print("%.3f%s", input_freq[i][fit_rule[i]], row_sep);
         // Percent correct (of the input data, based on the rule from fit)
         if (input_key_freq[i] == 0)
-            fprintf(fd, "%.3f", 0.0);
+            out.print("%.3f", 0.0);
         else
-            fprintf(fd, "%.3f", input_freq[i][fit_rule[i]] / input_key_freq[i] * 100.0);
+            out.print("%.3f", input_freq[i][fit_rule[i]] / input_key_freq[i] * 100.0);
         mean_squared_error = 0.0;
         if (calcExpectedDV == true) {
-            fprintf(fd, "%s%.3f", row_sep, fit_dv_expected[i]);
+            out.print("%s%.3f", row_sep, fit_dv_expected[i]);
             if (input_key_freq[i] > 0.0) {
                 for (int j = 0; j < dv_card; j++) {
                     temp_percent = fit_dv_expected[i] - dv_bin_value[dv_order[j]];
@@ -971,14 +919,13 @@ void Report::printConditional_DV(FILE *fd, Model *model, Relation *rel, bool cal
                 mean_squared_error /= input_key_freq[i];
             } else
                 mean_squared_error = 0;
-            fprintf(fd, "%s%.3f", row_sep, mean_squared_error);
+            out.print("%s%.3f", row_sep, mean_squared_error);
         }
 
         // Print out P-MARGIN and P-RULE
         
         // Make table containing the calculated DV probabilities at this IV state
         // probability of a given dv state j: fit_prob[i][dv_order[j]] / fit_key_prob[i];
-        double* calculated = new double[dv_card];
         for (unsigned j = 0; j < dv_card; ++j) {
             calculated[j] = fit_key_prob[i] == 0 ? 0 : fit_prob[i][dv_order[j]] / fit_key_prob[i];
         }
@@ -986,32 +933,30 @@ void Report::printConditional_DV(FILE *fd, Model *model, Relation *rel, bool cal
         double p_rule = ocPearsonChiSquaredFlat(dv_card, calculated, uniform, input_key_freq[i]);
         double p_margin = ocPearsonChiSquaredFlat(dv_card, calculated, marginal_tab, input_key_freq[i]);
 
-        delete [] calculated;
-
-        fprintf(fd, "%s%.3f%s%.3f", row_sep, p_rule, row_sep, p_margin);
+        out.print("%s%.3f%s%.3f", row_sep, p_rule, row_sep, p_margin);
 
         // Print test results, if present
         if (test_sample_size > 0.0) {
             // Frequency in test data
-            fprintf(fd, "%s|%s%.3f", row_sep, row_sep, test_key_freq[i]);
+            out.print("%s|%s%.3f", row_sep, row_sep, test_key_freq[i]);
             // Print out the percentages for each of the DV states
             for (int j = 0; j < dv_card; j++) {
-                fprintf(fd, row_sep);
+                out.print(row_sep);
                 if (test_key_freq[i] == 0.0)
-                    fprintf(fd, "%.3f", 0.0);
+                    out.print("%.3f", 0.0);
                 else
-                    fprintf(fd, "%.3f", test_freq[i][dv_order[j]] / test_key_freq[i] * 100.0);
+                    out.print("%.3f", test_freq[i][dv_order[j]] / test_key_freq[i] * 100.0);
             }
-            fprintf(fd, row_sep);
+            out.print(row_sep);
             if (test_key_freq[i] == 0.0)
-                fprintf(fd, "%.3f", 0.0);
+                out.print("%.3f", 0.0);
             else
-                fprintf(fd, "%.3f", test_freq[i][fit_rule[i]] / test_key_freq[i] * 100.0);
-            fprintf(fd, row_sep);
+                out.print("%.3f", test_freq[i][fit_rule[i]] / test_key_freq[i] * 100.0);
+            out.print(row_sep);
             if (test_key_freq[i] == 0.0)
-                fprintf(fd, "%.3f", 0.0);
+                out.print("%.3f", 0.0);
             else
-                fprintf(fd, "%.3f", test_freq[i][test_rule[i]] / test_key_freq[i] * 100.0);
+                out.print("%.3f", test_freq[i][test_rule[i]] / test_key_freq[i] * 100.0);
             mean_squared_error = 0.0;
             if (calcExpectedDV == true) {
                 if (test_key_freq[i] > 0.0) {
@@ -1022,12 +967,14 @@ void Report::printConditional_DV(FILE *fd, Model *model, Relation *rel, bool cal
                     mean_squared_error /= test_key_freq[i];
                 } else
                     mean_squared_error = 0;
-                fprintf(fd, "%s%.3f", row_sep, mean_squared_error);
+                out.print("%s%.3f", row_sep, mean_squared_error);
                 total_test_error += mean_squared_error * test_key_freq[i];
             }
         }
-        fprintf(fd, row_end);
+        out.print(row_end);
     }
+    out.flush();
+    delete [] calculated;
 
     // Footer, Row 1 (totals)
     double total_expected_value = 0.0;
@@ -1158,25 +1105,26 @@ void Report::printConditional_DV(FILE *fd, Model *model, Relation *rel, bool cal
         // Body of table
         for (int i = 0; i < alt_keys_found; i++) {
             if (i % 2)
-                fprintf(fd, row_start);
+                out.print(row_start);
             else
-                fprintf(fd, row_start2);
+                out.print(row_start2);
             for (int j = 0; j < alt_iv_count; j++) {
                 keyval = Key::getKeyValue(alt_key[i], keysize, var_list, alt_ind_vars[j]);
                 keyvalstr = var_list->getVarValue(alt_ind_vars[j], keyval);
-                fprintf(fd, "%s%s", keyvalstr, row_sep);
+                out.print("%s%s", keyvalstr, row_sep);
             }
-            fprintf(fd, "|%s", row_sep);
+            out.print("|%s", row_sep);
             for (int j = 0; j < dv_card; j++) {
                 if (alt_key_prob[i] == 0)
                     temp_percent = 0.0;
                 else
                     temp_percent = alt_prob[i][dv_order[j]] / alt_key_prob[i] * 100.0;
-                fprintf(fd, "%.3f%s", temp_percent, row_sep);
+                out.print("%.3f%s", temp_percent, row_sep);
             }
-            fprintf(fd, "%s", dv_label[alt_rule[i]]);
-            fprintf(fd, row_end);
+            out.print("%s", dv_label[alt_rule[i]]);
+            out.print(row_end);
         }
+        out.flush();
         // Footer, Row 1
         fprintf(fd, row_start3);
         for (int i = 0; i < alt_iv_count; i++)
@@ -88,9 +88,8 @@ void Report::printWholeTable(FILE* fd, Model* model, double adjustConstant) {
     Table* input_table = manager->getInputData();
     int keysize = input_table->getKeySize();
 
-    Table* fit_table = new Table(keysize, input_table->getTupleCount());
     manager->makeFitTable(model);
-    fit_table->copy(manager->getFitTable());
+    Table* fit_table = manager->getFitTable();
    
     Table* indep_table = manager->getIndepTable();
 
@@ -106,8 +105,6 @@ void Report::printWholeTable(FILE* fd, Model* model, double adjustConstant) {
     
     printTable(fd, NULL, fit_table, input_table, indep_table, adjustConstant, sample_size, true, true);
     printTestData(fd, NULL, fit_table, indep_table, adjustConstant, keysize, true, true);
-
-    delete fit_table;
 }
 
 void Report::printSingleVariable(FILE* fd, Relation* rel, double adjustConstant) {
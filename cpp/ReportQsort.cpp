@@ -5,24 +5,15 @@
  * distribution of this software for license terms.
  */
 
+#include "AttributeList.h"
+#include "Constants.h"
 #include "Key.h"
 #include "Model.h"
+#include "Report.h"
+#include "Table.h"
+#include "VariableList.h"
 #include <cctype>
 #include <cstring>
-//-- support routines for quicksort. The static variables
-//-- are used to communicate between the sort and compare routines
-// The "levelPref" variable is used to sub-sort during a search,
-// preferring to keep the models sorted in the order of the search.
-
-VariableList *sort_var_list;
-int sort_count;
-int *sort_vars;
-KeySegment **sort_keys;
-Table *sort_table;
-const char *sortAttr;
-Direction sortDir;
-Direction searchDir;
-
 
 int allNumeric(const char* s) {
     bool ret = true;
@@ -40,46 +31,55 @@ int strcmpAccountingForNumbers(const char* s1, const char* s2) {
         return strcmp(s1, s2);
     }
 }
-int sortCompare(const void *k1, const void *k2) {
-    Model *m1 = *((Model**) k1);
-    Model *m2 = *((Model**) k2);
-    double a1 = m1->getAttribute(sortAttr);
-    double a2 = m2->getAttribute(sortAttr);
-    double l1 = m1->getAttribute("Level");
-    double l2 = m2->getAttribute("Level");
-    int levelPref = 0;
-    if      (searchDir == Direction::Ascending)  { levelPref = (l1 > l2) ? -1 : (l1 < l2) ? 1 : 0; } 
-    else if (searchDir == Direction::Descending) { levelPref = (l1 < l2) ? -1 : (l1 > l2) ? 1 : 0; }
-    if (sortDir == Direction::Descending) { return (a1 > a2) ? -1 : (a1 < a2) ? 1 : levelPref; }
-    else                       { return (a1 < a2) ? -1 : (a1 > a2) ? 1 : levelPref; }
+ModelOrder::ModelOrder(const char *attr, Direction sortDir, Direction searchDir) :
+        sortDir(sortDir), searchDir(searchDir) {
+    attrId = AttributeList::getAttributeId(attr, false);
+    levelId = AttributeList::getAttributeId(ATTRIBUTE_LEVEL);
+}
+
+bool ModelOrder::operator()(Model *m1, Model *m2) const {
+    AttributeList *attrs1 = m1->getAttributeList();
+    AttributeList *attrs2 = m2->getAttributeList();
+    double a1 = attrs1->getAttribute(attrId);
+    double a2 = attrs2->getAttribute(attrId);
+    if (a1 != a2)
+        return sortDir == Direction::Descending ? a1 > a2 : a1 < a2;
+    //-- the level is preferred in the order of the search
+    double l1 = attrs1->getAttribute(levelId);
+    double l2 = attrs2->getAttribute(levelId);
+    return searchDir == Direction::Ascending ? l1 > l2 : l1 < l2;
+}
+KeyValueOrder::KeyValueOrder(VariableList *varList, int count, int *vars, KeySegment **keys, Table *table) :
+        varList(varList), count(count), vars(vars), keys(keys), table(table) {
+    keysize = varList->getKeySize();
 }
-int sortKeys(const void *d1, const void *d2) {
-    int keysize = sort_var_list->getKeySize();
+
+bool KeyValueOrder::operator()(int i1, int i2) const {
     KeySegment *k1, *k2;
-    if (sort_keys == NULL) {
-        k1 = sort_table->getKey((long long)*(int*) d1);
-        k2 = sort_table->getKey((long long)*(int*) d2);
+    if (keys == NULL) {
+        k1 = table->getKey((long long) i1);
+        k2 = table->getKey((long long) i2);
     } else {
-        k1 = sort_keys[*(int*) d1];
-        k2 = sort_keys[*(int*) d2];
+        k1 = keys[i1];
+        k2 = keys[i2];
     }
     const char *s1, *s2;
     int test;
     int v;
-    for (int j = 0; j < sort_count; j++) {
-        if (sort_vars == NULL) {
+    for (int j = 0; j < count; j++) {
+        if (vars == NULL) {
             v = j;
         } else {
-            v = sort_vars[j];
+            v = vars[j];
         }
-        s1 = sort_var_list->getVarValue(v, Key::getKeyValue(k1, keysize, sort_var_list, v));
-        s2 = sort_var_list->getVarValue(v, Key::getKeyValue(k2, keysize, sort_var_list, v));
+        s1 = varList->getVarValue(v, Key::getKeyValue(k1, keysize, varList, v));
+        s2 = varList->getVarValue(v, Key::getKeyValue(k2, keysize, varList, v));
         test = strcmpAccountingForNumbers(s1, s2);
         if (test != 0) {
-            return test;
+            return test < 0;
         }
     }
-    return 0;
+    return i1 < i2;
 }
 
 
@@ -178,7 +178,7 @@ void SBMManager::makeReferenceModels(Relation *top) {
     }
     bottomRef = model;
     if (!modelCache->addModel(bottomRef)) {
-        Model *cached_model = modelCache->findModel(bottomRef->getPrintName());
+        Model *cached_model = modelCache->findModel(bottomRef);
         delete bottomRef;
         bottomRef = cached_model;
     }
@@ -283,6 +283,7 @@ void SBMManager::computeInformationStatistics(Model *model) {
 }
 
 void SBMManager::computeL2Statistics(Model *model) {
+    loadCachedStatistics(model);
     //-- make sure we have the fitted table (needed for some statistics)
     //-- this will return immediately if the table was already created.
     //-- make sure the other attributes are there
@@ -347,22 +348,23 @@ void SBMManager::computeL2Statistics(Model *model) {
     }
     model->setAttribute(ATTRIBUTE_AIC, dAIC);
     model->setAttribute(ATTRIBUTE_BIC, dBIC);
-
+    saveCachedStatistics(model);
 }
 
 void SBMManager::computePearsonStatistics(Model *model) {
     //-- these statistics require a full contingency table, so make
-    //-- sure one has been created.
+    //-- sure one has been created. P2 is summed over the data, looking up
+    //-- each state in the fit table. The bottom reference's P2 doesn't
+    //-- change, so it is computed only once.
     if (model == NULL || bottomRef == NULL)
         return;
     makeFitTable(model);
-
-    Table *modelFitTable = new Table(keysize, fitTable1->getTupleCount());
-
-    modelFitTable->copy(fitTable1);
-    makeFitTable(bottomRef);
-    double modelP2 = ocPearsonChiSquared(inputData, modelFitTable, (long) round(sampleSize));
-    double refP2 = ocPearsonChiSquared(inputData, fitTable1, (long) round(sampleSize));
+    double modelP2 = ocPearsonChiSquared(inputData, fitTable1, (long) round(sampleSize));
+    if (bottomRefP2 < 0) {
+        makeFitTable(bottomRef);
+        bottomRefP2 = ocPearsonChiSquared(inputData, fitTable1, (long) round(sampleSize));
+    }
+    double refP2 = bottomRefP2;
 
     int errcode;
     double modelDF = computeDfSb(model);
@@ -391,7 +393,6 @@ void SBMManager::computePearsonStatistics(Model *model) {
     model->setAttribute(ATTRIBUTE_P2, modelP2);
     model->setAttribute(ATTRIBUTE_P2_ALPHA, refP2Prob);
     model->setAttribute(ATTRIBUTE_P2_BETA, refP2Power);
-    delete modelFitTable;
 }
 
 void SBMManager::computeDependentStatistics(Model *model) {
@@ -401,6 +402,7 @@ void SBMManager::computeDependentStatistics(Model *model) {
     //-- will give us the u(ABC...).
     if (!getVariableList()->isDirected())
         return; // can only do this for directed models
+    loadCachedStatistics(model);
     double depH = topRef->getRelation(0)->getAttribute(ATTRIBUTE_DEP_H);
     Relation *indRel;
     int i;
@@ -419,6 +421,7 @@ void SBMManager::computeDependentStatistics(Model *model) {
     model->setAttribute(ATTRIBUTE_COND_H, condH);
     model->setAttribute(ATTRIBUTE_COND_DH, refH - h);
     model->setAttribute(ATTRIBUTE_COND_PCT_DH, 100 * (refH - h) / depH);
+    saveCachedStatistics(model);
 }
 
 void SBMManager::computeBPStatistics(Model *model) {
@@ -514,20 +517,16 @@ void SBMManager::computeBPStatistics(Model *model) {
             int originTerms;
     };
 
+    if (loadCachedStatistics(model, ATTRIBUTE_BP_T))
+        return;
     long fullDimension = (long) ocDegreesOfFreedom(topRef->getRelation(0)) + 1;
 
     BPIntersectProcessor processor(inputData, model->getRelationCount(), fullDimension);
-    if (intersectArray != NULL) {
-        delete[] intersectArray;
-        intersectCount = 0;
-        intersectMax = model->getRelationCount();
-        ;
-        intersectArray = NULL;
-    }
 
     doIntersectionProcessing(model, &processor);
     double t = processor.getTransmission();
     model->setAttribute(ATTRIBUTE_BP_T, t);
+    saveCachedStatistics(model);
 }
 
 void SBMManager::computePercentCorrect(Model *model) {
@@ -538,6 +537,8 @@ void SBMManager::computePercentCorrect(Model *model) {
     //-- if either of these is empty, then we don't have a directed system
     if (indRel == 0 || depRel == 0)
         return;
+    if (loadCachedStatistics(model, ATTRIBUTE_PCT_CORRECT_DATA))
+        return;
     ((ManagerBase*) this)->makeProjection(depRel);
     if (!makeFitTable(model)) {
         printf("ERROR: Failed to create state-based fit table. Terminating.\n");
@@ -598,6 +599,7 @@ void SBMManager::computePercentCorrect(Model *model) {
     }
     delete maxTable;
     delete predModelTable, predInputTable;
+    saveCachedStatistics(model);
 }
 
 void SBMManager::setFilter(const char *attrname, double attrvalue, RelOp op) {
@@ -291,7 +291,7 @@ void SearchFullUp::makeCandidate(SearchStackEntry *stack, int top, Model *start)
     ModelCache *cache = manager->getModelCache();
     if (!cache->addModel(newModel)) {
         //-- already exists in cache; return that one
-        Model *cachedModel = cache->findModel(newModel->getPrintName());
+        Model *cachedModel = cache->findModel(newModel);
         delete newModel;
         newModel = cachedModel;
         //-- since all models come from the cache, we can do pointer compares to see if
@@ -372,47 +372,99 @@ Model **SearchFullUp::search(Model *start) {
     return parentList;
 }
 
-void SearchSbFullUp::recurseDirected(Model *start, int cur_var, int cur_index, int *var_indices, int *state_indices,
-        int &models_found, Model **model_list) {
+SearchSbFullUp::~SearchSbFullUp() {
+    if (choices) delete[] choices;
+    if (varIndices) delete[] varIndices;
+    if (stateIndices) delete[] stateIndices;
+}
+
+void SearchSbFullUp::beginSearch(Model *start) {
     VariableList *var_list = manager->getVariableList();
-    bool is_directed = var_list->isDirected();
-    if (cur_var >= var_list->getVarCount()) {
-        if ((is_directed && (cur_index >= 2)) || (!is_directed && (cur_index >= 1))) { // make sure enough variables have been added
-            Relation *new_relation = manager->getRelation(var_indices, cur_index, true, state_indices);
-            for (int i = 0; i < start->getRelationCount(); i++)
-                if (start->getRelation(i) == new_relation)
-                    return;
-            Model *model = new Model(start->getRelationCount() + 1);
-            model->copyRelations(*start);
-            model->addRelation(new_relation, true, manager->getModelCache()); // may not need to normalize here, or if so, may need to check if it did anything
-            if (model->getRelationCount() > start->getRelationCount()) {
-                addToCache(model, models_found, model_list);
-            } else {
-                delete model;
-            }
+    int var_count = var_list->getVarCount();
+    if (choices == NULL) {
+        choices = new int[var_count];
+        varIndices = new int[var_count];
+        stateIndices = new int[var_count];
+    }
+    for (int i = 0; i < var_count; i++)
+        choices[i] = -1;
+    startModel = start;
+    returned.clear();
+    dvState = 0;
+    generating = (start != manager->getTopRefModel());
+    if (var_list->isDirected()) {
+        // We attempt to add all possible states, skipping those that are already included.
+        // New relations can consist of one or more IVs and the DV, each with only one state.
+        // In the case of a binary DV, new relations contain the full DV.
+        // The model creation process should take care of states that combine to larger relations.
+        if (generating && start->getRelationCount() <= 1) {
+            printf("SearchSbFullUp: Error. %s ", start->getPrintName());
+            printf("is not an appropriate starting model for an upward, directed, state-based search.\n");
+            exit(1);
         }
-        return;
+        Variable *DV = var_list->getVariable(var_list->getDV());
+        dvStateCount = (DV->cardinality > 2) ? DV->cardinality : 1;
     } else {
-        Variable *var = var_list->getVariable(cur_var);
-        // first call recursion without this variable, to skip it
-        recurseDirected(start, cur_var + 1, cur_index, var_indices, state_indices, models_found, model_list);
-        // then call it with each of the states
-        if (!is_directed || (is_directed && (cur_var != var_list->getDV()))) {
-            var_indices[cur_index] = cur_var;
-            for (int i = 0; i < var->cardinality; i++) {
-                state_indices[cur_index] = i;
-                recurseDirected(start, cur_var + 1, cur_index + 1, var_indices, state_indices, models_found,
-                        model_list);
-            }
+        // Neutral system
+        // We attempt to add all possible states, skipping those that are already included.
+        // New relations can consist of one or more IVs, each with only one state.
+        // The model creation process should take care of states that combine to larger relations.
+        dvStateCount = 1;
+    }
+}
+
+// Move the odometer to the next relation. The last variable turns fastest, and each
+// variable is first left out, then given each of its states. Returns false after the last one.
+bool SearchSbFullUp::advance() {
+    VariableList *var_list = manager->getVariableList();
+    int var_count = var_list->getVarCount();
+    bool is_directed = var_list->isDirected();
+    for (int i = var_count - 1; i >= 0; i--) {
+        if (is_directed && i == var_list->getDV())
+            continue;
+        if (choices[i] < var_list->getVariable(i)->cardinality - 1) {
+            choices[i]++;
+            return true;
         }
+        choices[i] = -1;
     }
+    return ++dvState < dvStateCount;
 }
 
-bool SearchSbFullUp::addToCache(Model *model, int &models_found, Model **model_list) {
+// Make the model for the current relation. Returns NULL if there is no new model for it.
+Model *SearchSbFullUp::makeCandidate() {
+    VariableList *var_list = manager->getVariableList();
+    int var_count = var_list->getVarCount();
+    bool is_directed = var_list->isDirected();
+    int cur_index = 0;
+    if (is_directed) {
+        varIndices[cur_index] = var_list->getDV();
+        stateIndices[cur_index++] = (dvStateCount > 1) ? dvState : DONT_CARE;
+    }
+    for (int i = 0; i < var_count; i++) {
+        if (choices[i] >= 0) {
+            varIndices[cur_index] = i;
+            stateIndices[cur_index++] = choices[i];
+        }
+    }
+    // make sure enough variables have been added
+    if ((is_directed && (cur_index < 2)) || (!is_directed && (cur_index < 1)))
+        return NULL;
+    Relation *new_relation = manager->getRelation(varIndices, cur_index, true, stateIndices);
+    for (int i = 0; i < startModel->getRelationCount(); i++)
+        if (startModel->getRelation(i) == new_relation)
+            return NULL;
+    Model *model = new Model(startModel->getRelationCount() + 1);
+    model->copyRelations(*startModel);
+    model->addRelation(new_relation, true, manager->getModelCache()); // may not need to normalize here, or if so, may need to check if it did anything
+    if (model->getRelationCount() <= startModel->getRelationCount()) {
+        delete model;
+        return NULL;
+    }
     ModelCache* cache = manager->getModelCache();
     // put the model in the cache, or use the cached one if already there
     if (!cache->addModel(model)) {
-        Model *cached_model = cache->findModel(model->getPrintName());
+        Model *cached_model = cache->findModel(model);
         delete model;
         model = cached_model;
     }
@@ -420,94 +472,41 @@ bool SearchSbFullUp::addToCache(Model *model, int &models_found, Model **model_l
     if (manager->computeDF(manager->getTopRefModel()) - manager->computeDF(model) <= 1e-36) {
         model = manager->getTopRefModel();
     }
-    // check if this model is in the return list, so we don't add a duplicate
-    bool found = false;
-    for (int j = 0; j < models_found; j++) {
-        if (model_list[j] == model) {
-            found = true;
-            break;
-        }
-    }
-    if (!found) {
-        if (((SBMManager *) manager)->applyFilter(model))
-            model_list[models_found++] = model;
-        return true;
+    // check if this model was returned already, so we don't return a duplicate
+    if (returned.count(model) > 0)
+        return NULL;
+    if (!((SBMManager *) manager)->applyFilter(model))
+        return NULL;
+    returned.insert(model);
+    return model;
+}
+
+Model *SearchSbFullUp::nextModel() {
+    while (generating) {
+        Model *model = makeCandidate();
+        generating = advance();
+        if (model)
+            return model;
     }
-    return false;
+    return NULL;
 }
 
 //----- Bottom-up search through all state-based models -----
 Model** SearchSbFullUp::search(Model* start) {
     if (start == manager->getTopRefModel())
         return NULL;
-    Model **models = NULL; // return list
-    VariableList *var_list = manager->getVariableList();
-    int var_count = var_list->getVarCount();
-    int rel_count = start->getRelationCount();
-    int max_models = 0;
-    int models_found = 0;
-    if (var_list->isDirected()) {
-        if (rel_count > 1) {
-            // We attempt to add all possible states, skipping those that are already included.
-            // New relations can consist of one or more IVs and the DV, each with only one state.
-            // In the case of a binary DV, new relations contain the full DV.
-            // The model creation process should take care of states that combine to larger relations.
-            int *var_indices = new int[var_count];
-            int *state_indices = new int[var_count];
-            memset(var_indices, 0, var_count * sizeof(int));
-            memset(state_indices, 0, var_count * sizeof(int));
-            // compute number of models we're going to generate
-            Variable *DV = var_list->getVariable(var_list->getDV());
-            max_models = DV->cardinality;
-            if (DV->cardinality == 2)
-                max_models = 1;
-            // (If this list is too large, we could start smaller and use growStorage)
-            for (int i = 0; i < var_count; i++) {
-                if (i == var_list->getDV())
-                    continue;
-                max_models *= var_list->getVariable(i)->cardinality + 1;
-            }
-            models = new Model *[max_models + 1];
-            memset(models, 0, sizeof(Model *) * (max_models + 1));
-            int cur_var = 0, cur_index = 0, model_count = 0;
-            var_indices[cur_index] = var_list->getDV();
-            if (DV->cardinality > 2) {
-                for (int i = 0; i < DV->cardinality; i++) {
-                    state_indices[cur_index] = i;
-                    recurseDirected(start, cur_var, cur_index + 1, var_indices, state_indices, models_found, models);
-                }
-            } else {
-                state_indices[cur_index] = DONT_CARE;
-                recurseDirected(start, cur_var, cur_index + 1, var_indices, state_indices, models_found, models);
-            }
-            delete[] var_indices;
-            delete[] state_indices;
-        } else {
-            printf("SearchSbFullUp: Error. %s ", start->getPrintName());
-            printf("is not an appropriate starting model for an upward, directed, state-based search.\n");
-            exit(1);
+    long models_max = 64, models_found = 0;
+    Model **models = new Model *[models_max]; // return list
+    Model *model;
+    beginSearch(start);
+    while ((model = nextModel()) != NULL) {
+        if (models_found + 1 >= models_max) {
+            models = (Model **) growStorage(models, models_max * sizeof(Model *), 2);
+            models_max *= 2;
         }
-    } else {
-        // Neutral system
-        // We attempt to add all possible states, skipping those that are already included.
-        // New relations can consist of one or more IVs, each with only one state.
-        // The model creation process should take care of states that combine to larger relations.
-        int *var_indices = new int[var_count];
-        int *state_indices = new int[var_count];
-        memset(var_indices, 0, var_count * sizeof(int));
-        memset(state_indices, 0, var_count * sizeof(int));
-        // compute number of models we're going to generate
-        max_models = 1;
-        // (If this list is too large, we could start smaller and use growStorage)
-        for (int i = 0; i < var_count; i++)
-            max_models *= var_list->getVariable(i)->cardinality + 1;
-        models = new Model *[max_models + 1];
-        memset(models, 0, sizeof(Model *) * (max_models + 1));
-        int cur_var = 0, cur_index = 0, model_count = 0;
-        recurseDirected(start, cur_var, cur_index, var_indices, state_indices, models_found, models);
-        delete[] var_indices;
-        delete[] state_indices;
+        models[models_found++] = model;
     }
+    models[models_found] = NULL;
     return models;
 }
 
@@ -575,7 +574,7 @@ Model **SearchLooplessDown::search(Model *start) {
             // put in cache, or use the cached one if already there
             ModelCache *cache = manager->getModelCache();
             if (!cache->addModel(model)) {
-                Model *cachedModel = cache->findModel(model->getPrintName());
+                Model *cachedModel = cache->findModel(model);
                 delete model;
                 model = cachedModel;
             }
@@ -597,17 +596,14 @@ Model **SearchLooplessDown::search(Model *start) {
         //-- consider each pair of variables
         for (i = 0; i < varcount - 1; i++) {
             for (j = i + 1; j < varcount; j++) {
-                //-- construct a variable list for this pair, and check for containment
-                int pair[2];
+                //-- check each relation for containment of this pair
                 int includeCount = 0;
                 int includeID;
                 int relNumber;
-                pair[0] = i;
-                pair[1] = j;
                 Relation *rel;
                 for (relNumber = 0; relNumber < relCount; relNumber++) {
                     rel = start->getRelation(relNumber);
-                    if (ocContainsVariables(rel->getVariableCount(), rel->getVariables(), 2, pair)) {
+                    if (rel->hasVariable(i) && rel->hasVariable(j)) {
                         if (++includeCount > 1)
                             break; //pair in more than one relation
                         includeID = relNumber;
@@ -624,7 +620,7 @@ Model **SearchLooplessDown::search(Model *start) {
                     //-- put in cache, or use the cached one if already there
                     ModelCache *cache = manager->getModelCache();
                     if (!cache->addModel(model)) {
-                        Model *cachedModel = cache->findModel(model->getPrintName());
+                        Model *cachedModel = cache->findModel(model);
                         delete model;
                         model = cachedModel;
                     }
@@ -670,7 +666,7 @@ bool SearchSbLooplessUp::addToCache(Model *model, int &models_found, Model **mod
     Model* cached_model = NULL;
     // put the model in the cache, or use the cached one if already there
     if (!cache->addModel(model)) {
-        Model *cached_model = cache->findModel(model->getPrintName());
+        Model *cached_model = cache->findModel(model);
         delete model;
         model = cached_model;
     }
@@ -895,14 +891,14 @@ Model **SearchLooplessUp::search(Model *start) {
                 if (start->containsRelation(pairRel))
                     continue;
                 for (int m = 0; m < relcount; m++) {
-                    if (start->getRelation(m)->findVariable(i) != -1) {
+                    if (start->getRelation(m)->hasVariable(i)) {
                         for (int n = 0; n < relcount; n++) {
-                            if (start->getRelation(n)->findVariable(j) != -1) {
+                            if (start->getRelation(n)->hasVariable(j)) {
                                 newRelVarCount = 2;
                                 newRelVars[0] = i;
                                 newRelVars[1] = j;
                                 for (int k = 0; k < start->getRelation(m)->getVariableCount(); k++) {
-                                    if (start->getRelation(n)->findVariable(start->getRelation(m)->getVariable(k)) != -1) {
+                                    if (start->getRelation(n)->hasVariable(start->getRelation(m)->getVariable(k))) {
                                         newRelVars[newRelVarCount] = start->getRelation(m)->getVariable(k);
                                         newRelVarCount++;
                                     }
@@ -914,7 +910,7 @@ Model **SearchLooplessUp::search(Model *start) {
                                 // put the model in the cache, or use the cached one if already there
                                 ModelCache *cache = manager->getModelCache();
                                 if (!cache->addModel(model)) {
-                                    cachedModel = cache->findModel(model->getPrintName());
+                                    cachedModel = cache->findModel(model);
                                     delete model;
                                     model = cachedModel;
                                 }
@@ -973,7 +969,7 @@ Model **SearchLooplessUp::search(Model *start) {
             if (r == indOnlyRel)
                 continue;
             Relation *rel = start->getRelation(r);
-            if (-1 == rel->findVariable(i)) {
+            if (!rel->hasVariable(i)) {
                 model = new Model(relcount + 1);
                 model->copyRelations(*start, r);
                 int relvarcount = rel->getVariableCount();
@@ -985,7 +981,7 @@ Model **SearchLooplessUp::search(Model *start) {
                 //-- put in cache, or use the cached one if already there
                 ModelCache *cache = manager->getModelCache();
                 if (!cache->addModel(model)) {
-                    Model *cachedModel = cache->findModel(model->getPrintName());
+                    Model *cachedModel = cache->findModel(model);
                     delete model;
                     model = cachedModel;
                 }
@@ -1064,7 +1060,7 @@ Model **SearchDisjointUp::search(Model *start) {
                 if (r == indOnlyRel)
                     continue;
                 Relation *rel = start->getRelation(r);
-                if (-1 != rel->findVariable(i)) {
+                if (rel->hasVariable(i)) {
                     varfound = true;
                     break;
                 }
@@ -1080,7 +1076,7 @@ Model **SearchDisjointUp::search(Model *start) {
                 //-- put in cache, or use the cached one if already there
                 ModelCache *cache = manager->getModelCache();
                 if (!cache->addModel(model)) {
-                    Model *cachedModel = cache->findModel(model->getPrintName());
+                    Model *cachedModel = cache->findModel(model);
                     delete model;
                     model = cachedModel;
                 }
@@ -1116,7 +1112,7 @@ Model **SearchDisjointUp::search(Model *start) {
             //-- put in cache, or use the cached one if already there
             ModelCache *cache = manager->getModelCache();
             if (!cache->addModel(model)) {
-                Model *cachedModel = cache->findModel(model->getPrintName());
+                Model *cachedModel = cache->findModel(model);
                 delete model;
                 model = cachedModel;
             }
@@ -1199,7 +1195,7 @@ bool SearchChain::makeChainModels() {
             oldBrk = (char*) sbrk(0);
         double used = ((char*) sbrk(0)) - oldBrk;
         if (!cache->addModel(model)) {
-            Model *cachedModel = cache->findModel(model->getPrintName());
+            Model *cachedModel = cache->findModel(model);
             delete model;
             model = cachedModel;
         }
@@ -1327,7 +1323,7 @@ Model **SearchDisjointDown::search(Model *start) {
          // put in cache, or use the cached one if already there
          ModelCache *cache = manager->getModelCache();
          if (!cache->addModel(model)) {
-         Model *cachedModel = cache->findModel(model->getPrintName());
+         Model *cachedModel = cache->findModel(model);
          delete model;
          model = cachedModel;
          }
@@ -1367,7 +1363,7 @@ Model **SearchDisjointDown::search(Model *start) {
                     // add the model if it is not in the cache
                     ModelCache *cache = manager->getModelCache();
                     if (!cache->addModel(m)) {
-                        Model *cachedModel = cache->findModel(m->getPrintName());
+                        Model *cachedModel = cache->findModel(m);
                         delete m;
                         m = cachedModel;
                     }
@@ -1411,7 +1407,7 @@ Model **SearchDisjointDown::search(Model *start) {
                             ModelCache *cache = manager->getModelCache();
                             if (!cache->addModel(m1)) {
 
-                                Model *cachedModel = cache->findModel(m1->getPrintName());
+                                Model *cachedModel = cache->findModel(m1);
                                 delete m1;
                                 m1 = cachedModel;
                             }
@@ -29,13 +29,14 @@ SearchType searchTypes[] = {
 };
 
 
-SearchBase::SearchBase(): manager(0), directed(false)
+SearchBase::SearchBase(): manager(0), directed(false), pending(0), pendingIndex(0)
 {
 }
 
 
 SearchBase::~SearchBase()
 {
+    if (pending) delete [] pending;
 }
 
 
@@ -45,6 +46,27 @@ Model **SearchBase::search(Model *start)
 }
 
 
+void SearchBase::beginSearch(Model *start)
+{
+    if (pending) delete [] pending;
+    pending = search(start);
+    pendingIndex = 0;
+}
+
+
+Model *SearchBase::nextModel()
+{
+    if (pending == NULL)
+        return NULL;
+    Model *model = pending[pendingIndex++];
+    if (model == NULL) {
+        delete [] pending;
+        pending = NULL;
+    }
+    return model;
+}
+
+
 SearchBase* SearchFactory::getSearchMethod(ManagerBase *mgr, const char *name, bool proj)
 {
     SearchBase *search = NULL;
@@ -0,0 +1,147 @@
+/*
+ * Copyright © 1990 The Portland State University OCCAM Project Team
+ * [This program is licensed under the GPL version 3 or later.]
+ * Please see the file LICENSE in the source
+ * distribution of this software for license terms.
+ */
+
+#include "AttributeList.h"
+#include "Constants.h"
+#include "Model.h"
+#include "StatsCache.h"
+
+#include <math.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+
+//-- the statistics which are kept. The attribute list doesn't copy names, so
+//-- names read from the file are mapped to these. The IPF iteration counts depend
+//-- on the table the fit started from (which follows the search path), so they
+//-- aren't kept.
+static const char *statNames[] = {
+    ATTRIBUTE_H, ATTRIBUTE_T, ATTRIBUTE_DF, ATTRIBUTE_DDF, ATTRIBUTE_DDF_IND,
+    ATTRIBUTE_FIT_H, ATTRIBUTE_ALG_H, ATTRIBUTE_FIT_T, ATTRIBUTE_ALG_T, ATTRIBUTE_LOOPS,
+    ATTRIBUTE_EXPLAINED_I, ATTRIBUTE_UNEXPLAINED_I, ATTRIBUTE_AIC, ATTRIBUTE_BIC,
+    ATTRIBUTE_BP_AIC, ATTRIBUTE_BP_BIC, ATTRIBUTE_T_FROM_H,
+    ATTRIBUTE_IPF_ERROR, ATTRIBUTE_COND_H, ATTRIBUTE_COND_DH, ATTRIBUTE_COND_PCT_DH,
+    ATTRIBUTE_COND_DF, ATTRIBUTE_COND_DDF, ATTRIBUTE_TOTAL_LR, ATTRIBUTE_IND_LR,
+    ATTRIBUTE_COND_LR, ATTRIBUTE_COND_H_PROB, ATTRIBUTE_P2, ATTRIBUTE_P2_ALPHA,
+    ATTRIBUTE_P2_BETA, ATTRIBUTE_LR, ATTRIBUTE_ALPHA, ATTRIBUTE_BETA,
+    ATTRIBUTE_MAX_REL_WIDTH, ATTRIBUTE_MIN_REL_WIDTH, ATTRIBUTE_BP_T, ATTRIBUTE_BP_H,
+    ATTRIBUTE_BP_LR, ATTRIBUTE_BP_ALPHA, ATTRIBUTE_BP_BETA, ATTRIBUTE_BP_EXPLAINED_I,
+    ATTRIBUTE_BP_UNEXPLAINED_I, ATTRIBUTE_BP_COND_H, ATTRIBUTE_BP_COND_DH,
+    ATTRIBUTE_BP_COND_PCT_DH, ATTRIBUTE_PCT_CORRECT_DATA, ATTRIBUTE_PCT_COVERAGE,
+    ATTRIBUTE_PCT_CORRECT_TEST, ATTRIBUTE_PCT_MISSED_TEST,
+    NULL
+};
+
+static const char *findStatName(const char *name) {
+    for (const char **sp = statNames; *sp; sp++) {
+        if (strcmp(*sp, name) == 0)
+            return *sp;
+    }
+    return NULL;
+}
+
+StatsCache::StatsCache(const char *path, unsigned long long dataHash) {
+    this->path = new char[strlen(path) + 1];
+    strcpy(this->path, path);
+    snprintf(dataKey, sizeof(dataKey), "%016llx", dataHash);
+
+    FILE *fd = fopen(path, "r");
+    if (fd == NULL)
+        return;
+    char *line = NULL;
+    size_t lineMax = 0;
+    while (getline(&line, &lineMax, fd) > 0) {
+        //-- data key, settings key, model name, then name=value for each statistic
+        char *save = NULL;
+        char *field = strtok_r(line, "\t\n", &save);
+        if (field == NULL || strcmp(field, dataKey) != 0)
+            continue;
+        char *settings = strtok_r(NULL, "\t\n", &save);
+        char *name = strtok_r(NULL, "\t\n", &save);
+        if (settings == NULL || name == NULL)
+            continue;
+        StatList &stats = entries[std::string(settings) + "\t" + name];
+        while ((field = strtok_r(NULL, "\t\n", &save)) != NULL) {
+            char *eq = strchr(field, '=');
+            if (eq == NULL)
+                continue;
+            *eq = '\0';
+            const char *statName = findStatName(field);
+            if (statName)
+                stats[statName] = strtod(eq + 1, NULL);
+        }
+    }
+    free(line);
+    fclose(fd);
+}
+
+StatsCache::~StatsCache() {
+    delete[] path;
+}
+
+int StatsCache::load(const char *settingsKey, Model *model) {
+    std::map<std::string, StatList>::iterator entry = entries.find(std::string(settingsKey) + "\t" + model->getPrintName());
+    if (entry == entries.end())
+        return 0;
+    AttributeList *attrs = model->getAttributeList();
+    int count = 0;
+    for (StatList::iterator it = entry->second.begin(); it != entry->second.end(); ++it) {
+        if (attrs->getAttributeIndex(it->first) < 0) {
+            model->setAttribute(it->first, it->second);
+            count++;
+        }
+    }
+    return count;
+}
+
+void StatsCache::save(const char *settingsKey, Model *model) {
+    StatList &stats = entries[std::string(settingsKey) + "\t" + model->getPrintName()];
+    AttributeList *attrs = model->getAttributeList();
+    bool changed = false;
+    for (const char **sp = statNames; *sp; sp++) {
+        int index = attrs->getAttributeIndex(*sp);
+        if (index < 0)
+            continue;
+        double value = attrs->getAttributeByIndex(index);
+        StatList::iterator it = stats.find(*sp);
+        if (it == stats.end() || (it->second != value && !(isnan(it->second) && isnan(value)))) {
+            stats[*sp] = value;
+            changed = true;
+        }
+    }
+    if (!changed)
+        return;
+
+    //-- the whole entry is written as one line, so concurrent runs don't interleave
+    std::string line = std::string(dataKey) + "\t" + settingsKey + "\t" + model->getPrintName();
+    char buf[64];
+    for (StatList::iterator it = stats.begin(); it != stats.end(); ++it) {
+        snprintf(buf, sizeof(buf), "\t%s=%.17g", it->first, it->second);
+        line += buf;
+    }
+    line += "\n";
+    FILE *fd = fopen(path, "a");
+    if (fd == NULL) {
+        printf("Warning: unable to write statistics cache %s\n", path);
+        return;
+    }
+    fputs(line.c_str(), fd);
+    fclose(fd);
+}
+
+unsigned long long StatsCache::hash(const void *data, long long length, unsigned long long hash) {
+    const unsigned char *cp = (const unsigned char *) data;
+    for (long long i = 0; i < length; i++) {
+        hash ^= cp[i];
+        hash *= 1099511628211ULL;
+    }
+    return hash;
+}
+
+unsigned long long StatsCache::hash(const char *str, unsigned long long hash) {
+    return StatsCache::hash(str, strlen(str) + 1, hash);
+}
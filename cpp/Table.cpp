@@ -13,8 +13,13 @@
 #include <stdio.h>
 #include <stdlib.h>
 #include <string.h>
+#include <sys/mman.h>
+#include <unistd.h>
+#include <algorithm>
 
 const long long GROWTH_FACTOR = 2;
+const long long RADIX_SORT_MIN = 256;	// below this many tuples, a comparison sort is faster
+const int RADIX_BITS = 8;	// bits of key sorted on each radix pass
 
 
 /*
@@ -48,6 +53,8 @@ Table::Table(int keysz, long long maxTuples, TableType typ)
     type = typ;
     maxTupleCount = maxTuples;
     tupleCount = 0;
+    mapBase = NULL;
+    mapBytes = 0;
     data = new char[TupleBytes * maxTuples];
     memset(data, 0, TupleBytes * maxTuples * sizeof(char));
 }
@@ -55,7 +62,8 @@ Table::Table(int keysz, long long maxTuples, TableType typ)
 
 Table::~Table()
 {
-    if (data) delete [] (char*)data;
+    if (mapBase) munmap(mapBase, mapBytes);
+    else if (data) delete [] (char*)data;
 }
 
 
@@ -67,21 +75,73 @@ long long Table::size()
 
 void Table::copy(const Table* from)
 {
+    if (from->tupleCount > maxTupleCount && mapBase) unmapTuples();
     while (from->tupleCount > maxTupleCount) {
         data = growStorage(data, maxTupleCount*TupleBytes, GROWTH_FACTOR);
         maxTupleCount *= GROWTH_FACTOR;
     }
-    memcpy(data, from->data, TupleBytes * maxTupleCount);
+    memcpy(data, from->data, TupleBytes * from->tupleCount);
     tupleCount = from->tupleCount;
 }
 
 
+/**
+ * mapTuples - replace the contents of the table with count tuples read directly from
+ * a file, starting at the given offset. The tuples must be in the storage layout used
+ * here, sorted and merged. The file is mapped privately, so the tuples can still be
+ * changed; if the table has to grow, the tuples are first copied to allocated storage.
+ */
+bool Table::mapTuples(int fd, long long offset, long long count)
+{
+    long long bytes = TupleBytes * count;
+    long long page = sysconf(_SC_PAGESIZE);
+    long long start = offset - offset % page;
+    if (count <= 0) {
+        reset(keysize);
+        return true;
+    }
+    void *base = mmap(NULL, bytes + (offset - start), PROT_READ | PROT_WRITE, MAP_PRIVATE, fd, start);
+    if (base == MAP_FAILED) return false;
+    if (mapBase) munmap(mapBase, mapBytes);
+    else delete [] (char*)data;
+    mapBase = base;
+    mapBytes = bytes + (offset - start);
+    data = (char*)base + (offset - start);
+    tupleCount = maxTupleCount = count;
+    return true;
+}
+
+
+/**
+ * unmapTuples - copy mapped tuples to allocated storage, so the table can grow
+ */
+void Table::unmapTuples()
+{
+    char *owned = new char[TupleBytes * maxTupleCount];
+    memcpy(owned, data, TupleBytes * maxTupleCount);
+    munmap(mapBase, mapBytes);
+    mapBase = NULL;
+    mapBytes = 0;
+    data = owned;
+}
+
+
+/**
+ * writeTuples - write the tuples to a file, in the layout read by mapTuples
+ */
+bool Table::writeTuples(FILE *fd)
+{
+    return fwrite(data, TupleBytes, tupleCount, fd) == (size_t) tupleCount;
+}
+
+
 /**
  * addTuple - append a tuple to the table. The variable length key is copied to the key store,
  * and the value to the value store.  The table is resized if needed.
  */
 void Table::addTuple(KeySegment *key, double value)
 {
+    if (tupleCount >= maxTupleCount && mapBase) unmapTuples();
     while (tupleCount >= maxTupleCount) {
         data = growStorage(data, maxTupleCount*TupleBytes, GROWTH_FACTOR);
         maxTupleCount *= GROWTH_FACTOR;
@@ -100,6 +160,7 @@ void Table::addTuple(KeySegment *key, double value)
  */
 void Table::insertTuple(KeySegment *key, double value, long long index)
 {
+    if (tupleCount >= maxTupleCount && mapBase) unmapTuples();
     while (tupleCount >= maxTupleCount) {
         data = growStorage(data, maxTupleCount*TupleBytes, GROWTH_FACTOR);
         maxTupleCount *= GROWTH_FACTOR;
@@ -222,22 +283,175 @@ long long Table::indexOf(KeySegment *key, bool matchOnly)
 }
 
 
+void Table::getMatchingValues(Table *keys, double *values)
+{
+    long long count = keys->getTupleCount();
+    long long index = 0;
+    for (long long i = 0; i < count; i++) {
+        KeySegment *key = keys->getKey(i);
+        int compare = -1;
+        while (index < tupleCount && (compare = Key::compareKeys(KeyPtr(data, keysize, index), key, keysize)) < 0)
+            index++;
+        values[i] = (index < tupleCount && compare == 0) ? getValue(index) : 0.0;
+    }
+}
+
+
 /**
- * sort() - sort the tuples by key value (to allow binary search).  This uses
- * the Unix QuickSort function qsort. We need a little adaptor function for the
- * comparator, because compareKeys isn't quite right
+ * sort() - sort the tuples by key value (to allow binary search). Large tables use
+ * a radix sort; small ones a comparison sort. Both are stable.
  */
-static int sortKeySize;	// must be set before calling sortCompare
-static int sortCompare(const void *k1, const void *k2)
+void Table::sort()
 {
-    return Key::compareKeys((KeySegment *)k1, (KeySegment *)k2, sortKeySize);
+    if (tupleCount < 2) return;
+    if (tupleCount >= RADIX_SORT_MIN) radixSort();
+    else compareSort();
 }
 
 
-void Table::sort()
+/**
+ * compareSort() - the tuples are variable sized, so an index array is sorted (ties
+ * broken by position, so the sort is stable), and the tuples are then moved into place
+ * by following the cycles of the permutation, using one tuple of scratch space.
+ */
+void Table::compareSort()
+{
+    long long *order = new long long[tupleCount];
+    for (long long i = 0; i < tupleCount; i++) order[i] = i;
+    int ks = keysize;
+    void *base = data;
+    std::sort(order, order + tupleCount, [ks, base](long long a, long long b) {
+        int test = Key::compareKeys(KeyPtr(base, ks, a), KeyPtr(base, ks, b), ks);
+        return test < 0 || (test == 0 && a < b);
+    });
+    char *temp = new char[TupleBytes];
+    for (long long i = 0; i < tupleCount; i++) {
+        if (order[i] == i) continue;
+        memcpy(temp, KeyPtr(data, keysize, i), TupleBytes);
+        long long dest = i;
+        while (order[dest] != i) {
+            long long src = order[dest];
+            memcpy(KeyPtr(data, keysize, dest), KeyPtr(data, keysize, src), TupleBytes);
+            order[dest] = dest;
+            dest = src;
+        }
+        memcpy(KeyPtr(data, keysize, dest), temp, TupleBytes);
+        order[dest] = dest;
+    }
+    delete[] temp;
+    delete[] order;
+}
+
+
+/**
+ * radixSort() - LSD radix sort on the key segments, last segment first, RADIX_BITS
+ * at a time. Variable values are packed into the segments, and in a projection the
+ * variables not in the relation are all DONT_CARE, so most of the bits of a key are the
+ * same in every tuple. Those bits are found first (one pass over the keys, which also
+ * counts the digits), and only the digits where some bit differs get a pass.
+ */
+void Table::radixSort()
+{
+    const int segBits = sizeof(KeySegment) * 8;
+    const int digitsPerSeg = (segBits + RADIX_BITS - 1) / RADIX_BITS;
+    const int buckets = 1 << RADIX_BITS;
+    const KeySegment digitMask = buckets - 1;
+
+    KeySegment *allOn = new KeySegment[keysize];
+    KeySegment *anyOn = new KeySegment[keysize];
+    memcpy(allOn, KeyPtr(data, keysize, 0), keysize * sizeof(KeySegment));
+    memset(anyOn, 0, keysize * sizeof(KeySegment));
+    for (long long i = 0; i < tupleCount; i++) {
+        KeySegment *key = KeyPtr(data, keysize, i);
+        for (int s = 0; s < keysize; s++) {
+            allOn[s] &= key[s];
+            anyOn[s] |= key[s];
+        }
+    }
+
+    //-- the passes, least significant first: segment, shift, and digit counts
+    int passCount = 0;
+    int *passSeg = new int[keysize * digitsPerSeg];
+    int *passShift = new int[keysize * digitsPerSeg];
+    for (int s = keysize - 1; s >= 0; s--) {
+        KeySegment varying = allOn[s] ^ anyOn[s];
+        for (int shift = 0; shift < segBits; shift += RADIX_BITS) {
+            if ((varying >> shift) & digitMask) {
+                passSeg[passCount] = s;
+                passShift[passCount] = shift;
+                passCount++;
+            }
+        }
+    }
+    delete[] allOn;
+    delete[] anyOn;
+    if (passCount == 0) {
+        delete[] passSeg;
+        delete[] passShift;
+        return;
+    }
+
+    long long *counts = new long long[passCount * buckets];
+    memset(counts, 0, passCount * buckets * sizeof(long long));
+    for (long long i = 0; i < tupleCount; i++) {
+        KeySegment *key = KeyPtr(data, keysize, i);
+        for (int p = 0; p < passCount; p++) {
+            counts[p * buckets + ((key[passSeg[p]] >> passShift[p]) & digitMask)]++;
+        }
+    }
+
+    char *src = (char*) data;
+    char *dest = new char[tupleCount * TupleBytes];
+    char *temp = dest;
+    for (int p = 0; p < passCount; p++) {
+        //-- turn the counts into starting offsets, then scatter the tuples (stably)
+        long long *offset = counts + p * buckets;
+        long long total = 0;
+        for (int b = 0; b < buckets; b++) {
+            long long count = offset[b];
+            offset[b] = total;
+            total += count;
+        }
+        int seg = passSeg[p];
+        int shift = passShift[p];
+        for (long long i = 0; i < tupleCount; i++) {
+            KeySegment *key = KeyPtr(src, keysize, i);
+            long long pos = offset[(key[seg] >> shift) & digitMask]++;
+            memcpy(KeyPtr(dest, keysize, pos), key, TupleBytes);
+        }
+        std::swap(src, dest);
+    }
+    if (src != data) memcpy(data, src, tupleCount * TupleBytes);
+    delete[] temp;
+    delete[] counts;
+    delete[] passSeg;
+    delete[] passShift;
+}
+
+
+/**
+ * sortAndMerge() - sort the tuples, then collapse each run of tuples with equal
+ * keys into a single tuple holding the sum of their values. Used after bulk loading
+ * with addTuple, so each tuple costs O(1) to add, plus a single sort at the end.
+ */
+void Table::sortAndMerge()
 {
-    sortKeySize = keysize;
-    qsort(data, tupleCount, TupleBytes, sortCompare);
+    if (tupleCount < 2) return;
+    sort();
+    long long dest = 0;
+    for (long long src = 1; src < tupleCount; src++) {
+        KeySegment *srckey = KeyPtr(data, keysize, src);
+        ocTupleValue *destvalue = ValuePtr(data, keysize, dest);
+        if (Key::compareKeys(KeyPtr(data, keysize, dest), srckey, keysize) == 0) {
+            double value = *destvalue + *(ValuePtr(data, keysize, src));
+            if (type == TableType::SetTheoretic && value != 0.0) value = 1.0;
+            *destvalue = (ocTupleValue) value;
+        } else {
+            dest++;
+            if (dest != src) memcpy(KeyPtr(data, keysize, dest), srckey, TupleBytes);
+        }
+    }
+    tupleCount = dest + 1;
 }
 
 
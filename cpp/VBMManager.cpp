@@ -20,6 +20,7 @@
 #include <stdlib.h>
 #include <string.h>
 #include <time.h>
+#include <vector>
 VBMManager::VBMManager(VariableList *vars, Table *input) :
         ManagerBase(vars, input) {
     topRef = bottomRef = refModel = NULL;
@@ -122,8 +123,7 @@ Model *VBMManager::makeChildModel(Model *model, int remove, bool *fromCache, boo
     }
     //-- return one from cache if possible
     if (!modelCache->addModel(newModel)) {
-        const char *name = newModel->getPrintName();
-        Model *cacheModel = modelCache->findModel(name);
+        Model *cacheModel = modelCache->findModel(newModel);
         delete newModel;
         newModel = cacheModel;
         if (fromCache)
@@ -438,6 +438,7 @@ void VBMManager::calculateBP_AicBic(Model *model) {
 
 void VBMManager::computeL2Statistics(Model *model) {
     try {
+        loadCachedStatistics(model);
         //-- make sure the other attributes are there
         computeInformationStatistics(model);
         //-- compute chi-squared statistics and related statistics. L2 = 2*n*sum(p(ln p/q)) = 2*n*ln(2)*T
@@ -482,7 +483,7 @@ void VBMManager::computeL2Statistics(Model *model) {
         }
         model->setAttribute(ATTRIBUTE_AIC, dAIC);
         model->setAttribute(ATTRIBUTE_BIC, dBIC);
-
+        saveCachedStatistics(model);
     }
     catch (std::bad_alloc& ba) {
         printf("Error: OCCAM requested memory allocation that exceeds the current available resources of the computer running Occam. Terminating.");
@@ -492,15 +493,18 @@ void VBMManager::computeL2Statistics(Model *model) {
 
 void VBMManager::computePearsonStatistics(Model *model) {
     //-- these statistics require a full contingency table, so make
-    //-- sure one has been created.
+    //-- sure one has been created. P2 is summed over the data, looking up
+    //-- each state in the fit table. The bottom reference's P2 doesn't
+    //-- change, so it is computed only once.
     if (model == NULL || bottomRef == NULL)
         return;
     makeFitTable(model);
-    Table *modelFitTable = new Table(keysize, fitTable1->getTupleCount());
-    modelFitTable->copy(fitTable1);
-    makeFitTable(bottomRef);
-    double modelP2 = ocPearsonChiSquared(inputData, modelFitTable, (long) round(sampleSize));
-    double refP2 = ocPearsonChiSquared(inputData, fitTable1, (long) round(sampleSize));
+    double modelP2 = ocPearsonChiSquared(inputData, fitTable1, (long) round(sampleSize));
+    if (bottomRefP2 < 0) {
+        makeFitTable(bottomRef);
+        bottomRefP2 = ocPearsonChiSquared(inputData, fitTable1, (long) round(sampleSize));
+    }
+    double refP2 = bottomRefP2;
 
     int errcode;
     double refDDF = computeDDF(model);
@@ -527,7 +531,6 @@ void VBMManager::computePearsonStatistics(Model *model) {
     model->setAttribute(ATTRIBUTE_P2, modelP2);
     model->setAttribute(ATTRIBUTE_P2_ALPHA, refP2Prob);
     model->setAttribute(ATTRIBUTE_P2_BETA, refP2Power);
-    delete modelFitTable;
 }
 
 void VBMManager::computeDependentStatistics(Model *model) {
@@ -537,6 +540,7 @@ void VBMManager::computeDependentStatistics(Model *model) {
     //-- will give us the u(ABC...).
     if (!getVariableList()->isDirected())
         return; // can only do this for directed models
+    loadCachedStatistics(model);
     double depH = topRef->getRelation(0)->getAttribute(ATTRIBUTE_DEP_H);
     Relation *indRel = getIndRelation();
     double indH = indRel->getAttribute(ATTRIBUTE_H);
@@ -548,6 +552,7 @@ void VBMManager::computeDependentStatistics(Model *model) {
     model->setAttribute(ATTRIBUTE_COND_H, condH);
     model->setAttribute(ATTRIBUTE_COND_DH, refH - h);
     model->setAttribute(ATTRIBUTE_COND_PCT_DH, 100 * (refH - h) / depH);
+    saveCachedStatistics(model);
 }
 
 double VBMManager::computeBPT(Model *model) {
@@ -563,97 +568,74 @@ double VBMManager::computeBPT(Model *model) {
     // Null overlaps (for example, AB:CD has no overlaps, but p(AB)+p(CD) = 2, not 1)
     // The count of origin terms which much still be deducted for normalization
     // is maintained, and the q values corrected at the end.
+    //
+    // q is kept for the tuples of the input data only, since only they contribute. Each
+    // relation keeps the index of its projection tuple for each data tuple (made the
+    // first time it is needed), so a term is one pass over the data, with its count
+    // folded into its weight.
 
     class BPIntersectProcessor: public ocIntersectProcessor {
         public:
-            BPIntersectProcessor(Table *inData, double fullDim) {
+            BPIntersectProcessor(Table *inData, double fullDim) :
+                    q(inData->getTupleCount(), 0.0) {
                 inputData = inData;
                 keysize = inputData->getKeySize();
-                qData = new Table(keysize, inputData->getTupleCount());
                 fullDimension = fullDim;
                 originTerms = 0;
-                relCount = 0;
-            }
-
-            void reset(int rels) {
-                qData->reset(keysize);
-
-                //-- seed the computed table with the tuples from the input data,
-                //-- but with zero values. These are the only tuples we care about.
-                for (int i = 0; i < inputData->getTupleCount(); i++) {
-                    KeySegment *key = inputData->getKey(i);
-                    qData->addTuple(key, 0);
-                }
-
-                //-- keep track of the total probability so we can deduct
-                //-- the appropriate number of origin terms.
-                originTerms = 0;
-
-                relCount = rels;
             }
 
             virtual ~BPIntersectProcessor() {
-                delete qData;
             }
 
             virtual void process(bool sign, Relation *rel, int count) {
-                for (int counter = 0; counter < count; counter++) {
+                Table *table = rel->getTable();
+                long long tupleCount = inputData->getTupleCount();
+                long long *index = rel->getDataIndex();
+                if (index == NULL) {
                     KeySegment key[keysize];
-                    double qi, q;
-                    //-- get the orthogonal dimension of the relation (the number of states projected into one substate)
-                    double relDimension = fullDimension / (ocDegreesOfFreedom(rel) + 1);
-                    //-- add the scaled contribution to each q
-                    for (int i = 0; i < qData->getTupleCount(); i++) {
-                        qData->copyKey(i, key);
-                        q = qData->getValue(i);
-                        KeySegment *mask = rel->getMask();
+                    KeySegment *mask = rel->getMask();
+                    index = new long long[tupleCount];
+                    for (long long i = 0; i < tupleCount; i++) {
+                        inputData->copyKey(i, key);
                         for (int k = 0; k < keysize; k++)
                             key[k] |= mask[k];
-                        int j = rel->getTable()->indexOf(key);
-                        if (j >= 0) {
-                            qi = (sign ? 1 : -1) * (rel->getTable()->getValue(j) / relDimension);
-                            qData->setValue(i, qi + q);
-                        }
+                        index[i] = table->indexOf(key);
                     }
-                    originTerms += (sign ? 1 : -1);
+                    rel->setDataIndex(index);
+                }
+                //-- get the orthogonal dimension of the relation (the number of states projected into one substate)
+                double relDimension = fullDimension / (ocDegreesOfFreedom(rel) + 1);
+                //-- add the scaled contribution to each q
+                double weight = (sign ? count : -count) / relDimension;
+                for (long long i = 0; i < tupleCount; i++) {
+                    if (index[i] >= 0)
+                        q[i] += weight * table->getValue(index[i]);
                 }
+                originTerms += (sign ? count : -count);
             }
 
             double getTransmission() {
-                correctOriginTerms();
-
-                double t, p, q;
+                //-- correct for the origin terms
+                double originTerm = ((double) (originTerms - 1)) / fullDimension;
+                double t, p, qi;
                 t = 0;
-                for (long i = 0; i < inputData->getTupleCount(); i++) {
-                    long j = qData->indexOf(inputData->getKey(i));
+                for (long long i = 0; i < inputData->getTupleCount(); i++) {
                     p = inputData->getValue(i);
-                    q = qData->getValue(j);
-                    if (p > 0 && q > 0)
-                        t += p * log(p / q);
+                    qi = q[i] - originTerm;
+                    if (p > 0 && qi > 0)
+                        t += p * log(p / qi);
                 }
                 t /= log(2.0);
                 return t;
             }
 
-            void correctOriginTerms() {
-                double q;
-                double originTerm = ((double) (originTerms - 1)) / fullDimension;
-                for (long i = 0; i < qData->getTupleCount(); i++) {
-                    q = qData->getValue(i);
-                    q -= originTerm;
-                    qData->setValue(i, q);
-                }
-            }
-
-            Table *qData, *inputData;
+            Table *inputData;
+            std::vector<double> q;
             double fullDimension;
             int keysize;
-            int relCount;
             int originTerms;
     };
 
-    static BPIntersectProcessor *processor = NULL;
-
     //-- see if we did this already.
     double modelT = model->getAttribute(ATTRIBUTE_BP_T);
     if (modelT >= 0)
@@ -671,24 +653,15 @@ double VBMManager::computeBPT(Model *model) {
         ManagerBase::makeProjection(rel);
     }
 
-    if (processor == NULL)
-        processor = new BPIntersectProcessor(inputData, fullDimension);
-    processor->reset(relCount);
-    if (intersectArray != NULL) {
-        delete[] intersectArray;
-        intersectCount = 0;
-        intersectMax = model->getRelationCount();
-        ;
-        intersectArray = NULL;
-    }
-
-    doIntersectionProcessing(model, processor);
-    modelT = processor->getTransmission();
+    BPIntersectProcessor processor(inputData, fullDimension);
+    doIntersectionProcessing(model, &processor);
+    modelT = processor.getTransmission();
     model->setAttribute(ATTRIBUTE_BP_T, modelT);
     return modelT;
 }
 
 void VBMManager::computeBPStatistics(Model *model) {
+    loadCachedStatistics(model);
     double modelT = computeBPT(model);
     double topH = computeH(topRef);
     //-- we need both BP and standard T for the bottom model
@@ -755,8 +728,10 @@ void VBMManager::computeBPStatistics(Model *model) {
     model->setAttribute(ATTRIBUTE_BP_BETA, refL2Power);
 
     //-- dependent statistics
-    if (!getVariableList()->isDirected())
+    if (!getVariableList()->isDirected()) {
+        saveCachedStatistics(model);
         return; // can only do this for directed models
+    }
     double depH = topRef->getRelation(0)->getAttribute(ATTRIBUTE_DEP_H);
     double indH = topRef->getRelation(0)->getAttribute(ATTRIBUTE_IND_H);
     // for these computations, we need an estimated H which is compatible
@@ -772,6 +747,7 @@ void VBMManager::computeBPStatistics(Model *model) {
     model->setAttribute(ATTRIBUTE_BP_COND_H, condH);
     model->setAttribute(ATTRIBUTE_BP_COND_DH, refH - modelH);
     model->setAttribute(ATTRIBUTE_BP_COND_PCT_DH, 100 * (refH - modelH) / depH);
+    saveCachedStatistics(model);
 }
 
 void VBMManager::computePercentCorrect(Model *model) {
@@ -783,6 +759,8 @@ void VBMManager::computePercentCorrect(Model *model) {
     //-- if either of these is empty, then we don't have a directed system
     if (indRel == 0 || depRel == 0)
         return;
+    if (loadCachedStatistics(model, ATTRIBUTE_PCT_CORRECT_DATA))
+        return;
 
     ((ManagerBase*) this)->makeProjection(depRel);
 
@@ -840,6 +818,7 @@ void VBMManager::computePercentCorrect(Model *model) {
     }
     delete maxTable;
     delete predModelTable, predInputTable;
+    saveCachedStatistics(model);
 }
 
 void VBMManager::setFilter(const char *attrname, double attrvalue, RelOp op) {
@@ -60,6 +60,7 @@ VariableList::~VariableList() {
         }
         if (varp->exclude)
             delete[] varp->exclude;
+        delete varp->valueIndex;
     }
     if (vars)
         delete vars;
@@ -133,6 +134,7 @@ int VariableList::addVariable(const char *name, const char *abbrev, int cardinal
 
     // clear the value map
     memset(varp->valmap, 0, MAXCARDINALITY * sizeof(const char *));
+    varp->valueIndex = NULL;
 
     return 0;
 }
@@ -165,7 +167,7 @@ int VariableList::markForNoUse() {
 
 /* This function returns the new binning value for an old one for a given variable
  */
-int VariableList::getNewValue(int index, char * old_value, char*new_value) {
+int VariableList::getNewValue(int index, const char * old_value, char*new_value) {
     int i = 0, k;
     int chr;
     char myvalue[100];
@@ -398,36 +400,45 @@ int VariableList::getVarStateList(const char *name, int *varlist, int *stlist) {
 }
 
 int VariableList::getVarValueIndex(int varindex, const char *value) {
-    int index = 0;
-    char **map = vars[varindex].valmap;
-    char myvalue[100];
-    int chr;
-    int cardinality = vars[varindex].cardinality;
     //-- extract the name as a separate string
-    for (chr = 0; chr < 100; chr++) {
-        if (value[chr] == '\0' || isspace(value[chr]) || (value[chr] == ','))
-            break;
-        else
-            myvalue[chr] = value[chr];
-    }
-    myvalue[chr] = '\0';
-    //-- find this value in the value map. Stop on first empty entry
-    while (index < cardinality) {
-        if (map[index] == NULL)
-            break;
-        if (strcmp(myvalue, map[index]) == 0)
-            return index;
-        index++;
+    int length = 0;
+    while (value[length] != '\0' && !isspace(value[length]) && (value[length] != ','))
+        length++;
+    return getVarValueIndex(varindex, value, length);
+}
+
+int VariableList::getVarValueIndex(int varindex, const char *value, int length) {
+    Variable *varp = vars + varindex;
+    char **map = varp->valmap;
+    //-- the index is built on first use, from any values already in the map
+    if (varp->valueIndex == NULL) {
+        varp->valueIndex = new std::unordered_map<std::string, int>();
+        for (int index = 0; index < varp->cardinality && map[index] != NULL; index++)
+            (*varp->valueIndex)[map[index]] = index;
     }
+    std::string myvalue(value, length);
+    std::unordered_map<std::string, int>::iterator found = varp->valueIndex->find(myvalue);
+    if (found != varp->valueIndex->end())
+        return found->second;
     //-- if we have room, add this value. Otherwise return error.
-    if (index < cardinality) {
-        map[index] = new char[strlen(value) + 1];
-        strcpy(map[index], myvalue);
+    int index = varp->valueIndex->size();
+    if (index < varp->cardinality) {
+        map[index] = new char[length + 1];
+        strcpy(map[index], myvalue.c_str());
+        (*varp->valueIndex)[myvalue] = index;
         return index;
     } else
         return -1;
 }
 
+int VariableList::findVarValueIndex(int varindex, const char *value, int length) {
+    std::unordered_map<std::string, int> *valueIndex = vars[varindex].valueIndex;
+    if (valueIndex == NULL)
+        return -1;
+    std::unordered_map<std::string, int>::iterator found = valueIndex->find(std::string(value, length));
+    return found != valueIndex->end() ? found->second : -1;
+}
+
 const char *VariableList::getVarValue(int varindex, int valueindex) {
     char **map = vars[varindex].valmap;
     const char *value = map[valueindex];
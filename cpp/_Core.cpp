@@ -91,6 +91,34 @@ bool ocContainsVariables(int varCount1, int *var1, int varCount2, int *var2)
 }
 
 
+int ocVarBitWords(int varCount)
+{
+    return varCount > 0 ? (varCount + 63) / 64 : 1;
+}
+
+
+//-- check bitsets to see if the first contains the second
+bool ocContainsBits(int words1, const unsigned long long *bits1, int words2, const unsigned long long *bits2)
+{
+    for (int i = 0; i < words2; i++) {
+        unsigned long long word1 = (i < words1) ? bits1[i] : 0;
+        if (bits2[i] & ~word1) return false;
+    }
+    return true;
+}
+
+
+//-- check bitsets to see if they have any variable in common
+bool ocIntersectsBits(int words1, const unsigned long long *bits1, int words2, const unsigned long long *bits2)
+{
+    int words = (words1 < words2) ? words1 : words2;
+    for (int i = 0; i < words; i++) {
+        if (bits1[i] & bits2[i]) return true;
+    }
+    return false;
+}
+
+
 
 
 bool ocContainsStates(int var_count1, int *var1, int *states1, int var_count2, int *var2, int *states2)
@@ -24,6 +24,9 @@ int main(int argc, char* argv[]) {
         printf("\t-L search-levels\n");
         printf("\t-w search-width\n");
         printf("\t-m fit-model (required with -a fit)\n");
+        printf("\t--search-threads=N threads for fitting models (default=1, 0=one per processor)\n");
+        printf("\t--read-threads=N threads for reading the data (default=1, 0=one per processor)\n");
+        printf("\t--compile-data=FILE save the data to a binary file, which can be given as the datafile later\n");
         return 1;
     }
     time_t  t0, t1;
@@ -34,6 +37,11 @@ int main(int argc, char* argv[]) {
     VBMManager *mgr = new VBMManager();
 #endif
     mgr->initFromCommandLine(argc, argv);
+    const char *compiled;
+    if (mgr->getOptionString("compile-data", NULL, &compiled)) {
+        printf("Data saved to %s\n", compiled);
+        return 0;
+    }
     Report *report = new Report(mgr);
     report->setSeparator(3);
     const char *action = "";
@@ -70,6 +78,10 @@ int main(int argc, char* argv[]) {
         if (!mgr->getOptionFloat("search-levels", NULL, &levels))
             levels = 3.0;
 
+        double threads;
+        if (!mgr->getOptionFloat("search-threads", NULL, &threads))
+            threads = 1.0;
+
         mgr->printBasicStatistics();
 #ifdef SB
         mgr->setSearch("sb-full-up");
@@ -110,6 +122,15 @@ int main(int argc, char* argv[]) {
                     for (model = models; *model; model++)
                         count++;
                     levelCount += count;
+                    for (int i=0; i < count; i++) {
+                        if (models[i]->getProgenitor() == NULL)
+                            models[i]->setProgenitor(keptModels[k]);
+                    }
+#ifdef SB
+                    mgr->fitModels(models, count, (int)threads, SBMManager::IPF);
+#else
+                    mgr->fitModels(models, count, (int)threads);
+#endif
                     for (int i=0; i < count; i++) {
                         mgr->computeInformationStatistics(models[i]);
                     }
@@ -137,6 +158,8 @@ int main(int argc, char* argv[]) {
                     delete[] models;
                 }
             }
+            for (int k=0; k < keptCount; k++)
+                keptModels[k]->deleteFitTable();
             delete[] keptModels;
             keptCount = width < nextCount ? width : nextCount;
             keptModels = new Model*[keptCount];
@@ -152,8 +175,12 @@ int main(int argc, char* argv[]) {
                 report->addModel(nextModels[i]);
                 keptModels[i] = nextModels[i];
             }
+            for (; i < nextCount; i++)
+                nextModels[i]->deleteFitTable();
             delete[] nextModels;
         }
+        for (int k=0; k < keptCount; k++)
+            keptModels[k]->deleteFitTable();
         delete[] keptModels;
 
         report->setAttributes("level$I, h, ddf, lr, alpha, information, aic, bic, incr_alpha, prog_id");
@@ -7,6 +7,7 @@
 
 #include "AttributeList.h"
 #include "Math.h"
+#include "RelCache.h"
 #include "Report.h"
 #include "SBMManager.h"
 #include "SearchBase.h"
@@ -336,6 +337,70 @@ DefinePyFunction(VBMManager, computeL2Statistics) {
     return Py_None;
 }
 
+// void fitModels(Model *models[], int threadCount)
+// Fit the models in parallel, for their fitted H. The GIL is released while fitting.
+DefinePyFunction(VBMManager, fitModels) {
+    PyObject *Plist;
+    int threadCount;
+    PyArg_ParseTuple(args, "O!i", &PyList_Type, &Plist, &threadCount);
+    long count = PyList_Size(Plist);
+    Model **models = new Model*[count];
+    for (long i = 0; i < count; i++) {
+        PyObject *Pmodel = PyList_GetItem(Plist, i);
+        if (!PyObject_TypeCheck(Pmodel, &TModel)) {
+            delete[] models;
+            onError("fitModels: list must contain only models");
+        }
+        models[i] = ObjRef(Pmodel, Model);
+    }
+    VBMManager *mgr = ObjRef(self, VBMManager);
+    Py_BEGIN_ALLOW_THREADS
+    mgr->fitModels(models, count, threadCount);
+    Py_END_ALLOW_THREADS
+    delete[] models;
+    Py_INCREF(Py_None);
+    return Py_None;
+}
+
+// list selectBest(Model *models[], int width, const char *sortName, const char *direction)
+// returns the best models of the list, as chosen by ManagerBase::selectBest
+DefinePyFunction(VBMManager, selectBest) {
+    PyObject *Plist;
+    int width;
+    const char *sortName, *dir;
+    PyArg_ParseTuple(args, "O!iss", &PyList_Type, &Plist, &width, &sortName, &dir);
+    Direction direction;
+    if (strcasecmp(dir, "ascending") == 0)
+        direction = Direction::Ascending;
+    else if (strcasecmp(dir, "descending") == 0)
+        direction = Direction::Descending;
+    else
+        onError("Invalid sort direction");
+    long count = PyList_Size(Plist);
+    Model **models = new Model*[count];
+    for (long i = 0; i < count; i++) {
+        PyObject *Pmodel = PyList_GetItem(Plist, i);
+        if (!PyObject_TypeCheck(Pmodel, &TModel)) {
+            delete[] models;
+            onError("selectBest: list must contain only models");
+        }
+        models[i] = ObjRef(Pmodel, Model);
+    }
+    if (width < 0)
+        width = 0;
+    long *best = new long[width + 1];
+    long bestCount = ObjRef(self, VBMManager)->selectBest(models, count, width, sortName, direction, best);
+    PyObject *Pbest = PyList_New(bestCount);
+    for (long i = 0; i < bestCount; i++) {
+        PyObject *Pmodel = PyList_GetItem(Plist, best[i]);
+        Py_INCREF(Pmodel);
+        PyList_SetItem(Pbest, i, Pmodel);
+    }
+    delete[] best;
+    delete[] models;
+    return Pbest;
+}
+
 // void computePearsonStatistics(Model *model)
 DefinePyFunction(VBMManager, computePearsonStatistics) {
     PyObject *Pmodel;
@@ -384,6 +449,19 @@ DefinePyFunction(VBMManager, computeIncrementalAlpha) {
     return Py_None;
 }
 
+// void computeModelStatistics(Model *model, int groups)
+DefinePyFunction(VBMManager, computeModelStatistics) {
+    PyObject *Pmodel;
+    int groups;
+    PyArg_ParseTuple(args, "O!i", &TModel, &Pmodel, &groups);
+    Model *model = ObjRef(Pmodel, Model);
+    if (model == NULL)
+        onError("Model is NULL!");
+    ObjRef(self, VBMManager)->computeModelStatistics(model, groups);
+    Py_INCREF(Py_None);
+    return Py_None;
+}
+
 // void compareProgenitors(Model *model, Model *newProgen)
 DefinePyFunction(VBMManager, compareProgenitors) {
     PyObject *Pmodel, *Pprogen;
@@ -648,6 +726,31 @@ DefinePyFunction(VBMManager, getMemUsage) {
     return Py_BuildValue("d", used);
 }
 
+//void setTableCacheLimit(double bytes)
+// Byte budget for the projection tables of the relation cache; 0 means no limit.
+DefinePyFunction(VBMManager, setTableCacheLimit) {
+    double bytes;
+    PyArg_ParseTuple(args, "d", &bytes);
+    ObjRef(self, VBMManager)->getRelCache()->setMaxTableBytes((long long) bytes);
+    Py_INCREF(Py_None);
+    return Py_None;
+}
+
+//double getTableCacheLimit()
+DefinePyFunction(VBMManager, getTableCacheLimit) {
+    PyArg_ParseTuple(args, "");
+    return Py_BuildValue("d", (double) ObjRef(self, VBMManager)->getRelCache()->getMaxTableBytes());
+}
+
+//dict getTableCacheStats()
+// Hits, misses and evictions of projection tables, and the tables currently kept.
+DefinePyFunction(VBMManager, getTableCacheStats) {
+    PyArg_ParseTuple(args, "");
+    RelCache *cache = ObjRef(self, VBMManager)->getRelCache();
+    return Py_BuildValue("{s:L,s:L,s:L,s:L,s:L}", "hits", cache->getHits(), "misses", cache->getMisses(),
+            "evictions", cache->getEvictions(), "tables", cache->getTableCount(), "bytes", cache->getTableBytes());
+}
+
 //int hasTestData()
 DefinePyFunction(VBMManager, hasTestData) {
     PyArg_ParseTuple(args, "");
@@ -674,8 +777,10 @@ static struct PyMethodDef VBMManager_methods[] = { PyMethodDef(VBMManager, initF
         PyMethodDef(VBMManager, computeDF), PyMethodDef(VBMManager, computeH), PyMethodDef(VBMManager, computeT),
         PyMethodDef(VBMManager, computeInformationStatistics), PyMethodDef(VBMManager, computeDFStatistics),
         PyMethodDef(VBMManager, computeL2Statistics), PyMethodDef(VBMManager, computePearsonStatistics),
+        PyMethodDef(VBMManager, fitModels), PyMethodDef(VBMManager, selectBest),
         PyMethodDef(VBMManager, computeDependentStatistics), PyMethodDef(VBMManager, computeBPStatistics),
         PyMethodDef(VBMManager, computeIncrementalAlpha), PyMethodDef(VBMManager, compareProgenitors),
+        PyMethodDef(VBMManager, computeModelStatistics),
         PyMethodDef(VBMManager, setDDFMethod), PyMethodDef(VBMManager, setUseInverseNotation),
         PyMethodDef(VBMManager, setAlphaThreshold),
         PyMethodDef(VBMManager, setValuesAreFunctions), PyMethodDef(VBMManager, setSearchDirection),
@@ -686,6 +791,7 @@ static struct PyMethodDef VBMManager_methods[] = { PyMethodDef(VBMManager, initF
         PyMethodDef(VBMManager, deleteModelFromCache), PyMethodDef(VBMManager, getSampleSz),
         PyMethodDef(VBMManager, printBasicStatistics), PyMethodDef(VBMManager, computePercentCorrect),
         PyMethodDef(VBMManager, printSizes), PyMethodDef(VBMManager, getMemUsage),
+        PyMethodDef(VBMManager, setTableCacheLimit), PyMethodDef(VBMManager, getTableCacheLimit), PyMethodDef(VBMManager, getTableCacheStats),
         PyMethodDef(VBMManager, hasTestData), PyMethodDef(VBMManager, dumpRelations),
         PyMethodDef(VBMManager, getVariableList),
         { NULL, NULL, 0 } };
@@ -767,7 +873,71 @@ DefinePyFunction(SBMManager, initFromCommandLine) {
     return Py_None;
 }
 
+/****** SearchIterator ******/
+
+//-- An iterator over the models of one level of a search, which are generated as they are
+//-- asked for. It refers to the manager, and uses whatever search the manager has.
+struct PSearchIterator {
+    PyObject_HEAD;
+    PyObject *manager;
+};
+
+static PyObject *SearchIterator_next(PyObject *self) {
+    SearchBase *search = ObjRef(((PSearchIterator*) self)->manager, SBMManager)->getSearch();
+    Model *model = search ? search->nextModel() : NULL;
+    if (model == NULL)
+        return NULL; // no exception set, so this ends the iteration
+    PModel *pmodel = ObjNew(Model);
+    pmodel->obj = model;
+    //-- the model belongs to the manager, and model wrappers have no dealloc, so (as for
+    //-- the other functions returning models) the wrapper is never released
+    Py_INCREF((PyObject*)pmodel);
+    return (PyObject*) pmodel;
+}
+
+static void SearchIterator_dealloc(PyObject *self) {
+    Py_DECREF(((PSearchIterator*) self)->manager);
+    PyObject_DEL(self);
+}
+
+PyTypeObject TSearchIterator = { PyObject_HEAD_INIT(&PyType_Type) 0, "SearchIterator",
+sizeof(PSearchIterator), 0,
+//-- standard methods
+        (destructor) SearchIterator_dealloc,
+        (printfunc) 0,
+        (getattrfunc) 0,
+        (setattrfunc) 0,
+        (cmpfunc) 0,
+        (reprfunc) 0,
+
+        //-- type categories
+        0,
+        0,
+        0,
+
+        //-- more methods
+        (hashfunc) 0,
+        (ternaryfunc) 0,
+        (reprfunc) 0,
+        (getattrofunc) 0,
+        (setattrofunc) 0,
+        0,
+        Py_TPFLAGS_DEFAULT,
+        0,
+        (traverseproc) 0,
+        (inquiry) 0,
+        (richcmpfunc) 0,
+        0,
+
+        //-- iterator methods
+        (getiterfunc) PyObject_SelfIter,
+        (iternextfunc) SearchIterator_next,
+    };
+
 // Model **searchOneLevel(Model *)
+// Returns an iterator over the models, which generates them as they are asked for, so they
+// are not all kept at once. Only one such search can be in progress for a manager. If a sort
+// was requested, the models are all generated, and returned as a sorted list.
 DefinePyFunction(SBMManager, searchOneLevel) {
     PModel *start;
     PModel *pmodel;
@@ -779,6 +949,13 @@ DefinePyFunction(SBMManager, searchOneLevel) {
     }
     if (start->obj == NULL)
         onError("Model is NULL!");
+    if (!mgr->getSortAttr()) {
+        mgr->getSearch()->beginSearch(start->obj);
+        PSearchIterator *iter = PyObject_NEW(PSearchIterator, &TSearchIterator);
+        iter->manager = self;
+        Py_INCREF(self);
+        return (PyObject*) iter;
+    }
     models = mgr->getSearch()->search(start->obj);
     Model **model;
     long count = 0;
@@ -786,10 +963,8 @@ DefinePyFunction(SBMManager, searchOneLevel) {
     if (models)
         for (model = models; *model; model++)
             count++;
-    //-- sort them if sort was requested
-    if (mgr->getSortAttr()) {
-        Report::sort(models, count, mgr->getSortAttr(), (Direction) mgr->getSortDirection());
-    }
+    //-- sort them
+    Report::sort(models, count, mgr->getSortAttr(), (Direction) mgr->getSortDirection());
     //-- make a PyList
     PyObject *list = PyList_New(count);
     int i;
@@ -928,6 +1103,70 @@ DefinePyFunction(SBMManager, computeL2Statistics) {
     return Py_None;
 }
 
+// void fitModels(Model *models[], int threadCount)
+// Fit the models in parallel, for their fitted H. The GIL is released while fitting.
+DefinePyFunction(SBMManager, fitModels) {
+    PyObject *Plist;
+    int threadCount;
+    PyArg_ParseTuple(args, "O!i", &PyList_Type, &Plist, &threadCount);
+    long count = PyList_Size(Plist);
+    Model **models = new Model*[count];
+    for (long i = 0; i < count; i++) {
+        PyObject *Pmodel = PyList_GetItem(Plist, i);
+        if (!PyObject_TypeCheck(Pmodel, &TModel)) {
+            delete[] models;
+            onError("fitModels: list must contain only models");
+        }
+        models[i] = ObjRef(Pmodel, Model);
+    }
+    SBMManager *mgr = ObjRef(self, SBMManager);
+    Py_BEGIN_ALLOW_THREADS
+    mgr->fitModels(models, count, threadCount, SBMManager::IPF);
+    Py_END_ALLOW_THREADS
+    delete[] models;
+    Py_INCREF(Py_None);
+    return Py_None;
+}
+
+// list selectBest(Model *models[], int width, const char *sortName, const char *direction)
+// returns the best models of the list, as chosen by ManagerBase::selectBest
+DefinePyFunction(SBMManager, selectBest) {
+    PyObject *Plist;
+    int width;
+    const char *sortName, *dir;
+    PyArg_ParseTuple(args, "O!iss", &PyList_Type, &Plist, &width, &sortName, &dir);
+    Direction direction;
+    if (strcasecmp(dir, "ascending") == 0)
+        direction = Direction::Ascending;
+    else if (strcasecmp(dir, "descending") == 0)
+        direction = Direction::Descending;
+    else
+        onError("Invalid sort direction");
+    long count = PyList_Size(Plist);
+    Model **models = new Model*[count];
+    for (long i = 0; i < count; i++) {
+        PyObject *Pmodel = PyList_GetItem(Plist, i);
+        if (!PyObject_TypeCheck(Pmodel, &TModel)) {
+            delete[] models;
+            onError("selectBest: list must contain only models");
+        }
+        models[i] = ObjRef(Pmodel, Model);
+    }
+    if (width < 0)
+        width = 0;
+    long *best = new long[width + 1];
+    long bestCount = ObjRef(self, SBMManager)->selectBest(models, count, width, sortName, direction, best);
+    PyObject *Pbest = PyList_New(bestCount);
+    for (long i = 0; i < bestCount; i++) {
+        PyObject *Pmodel = PyList_GetItem(Plist, best[i]);
+        Py_INCREF(Pmodel);
+        PyList_SetItem(Pbest, i, Pmodel);
+    }
+    delete[] best;
+    delete[] models;
+    return Pbest;
+}
+
 // void computePearsonStatistics(Model *model)
 DefinePyFunction(SBMManager, computePearsonStatistics) {
     PyObject *Pmodel;
@@ -976,6 +1215,19 @@ DefinePyFunction(SBMManager, computeIncrementalAlpha) {
     return Py_None;
 }
 
+// void computeModelStatistics(Model *model, int groups)
+DefinePyFunction(SBMManager, computeModelStatistics) {
+    PyObject *Pmodel;
+    int groups;
+    PyArg_ParseTuple(args, "O!i", &TModel, &Pmodel, &groups);
+    Model *model = ObjRef(Pmodel, Model);
+    if (model == NULL)
+        onError("Model is NULL!");
+    ObjRef(self, SBMManager)->computeModelStatistics(model, groups);
+    Py_INCREF(Py_None);
+    return Py_None;
+}
+
 // void compareProgenitors(Model *model, Model *newProgen)
 DefinePyFunction(SBMManager, compareProgenitors) {
     PyObject *Pmodel, *Pprogen;
@@ -1188,6 +1440,31 @@ DefinePyFunction(SBMManager, getMemUsage) {
     return Py_BuildValue("d", used);
 }
 
+//void setTableCacheLimit(double bytes)
+// Byte budget for the projection tables of the relation cache; 0 means no limit.
+DefinePyFunction(SBMManager, setTableCacheLimit) {
+    double bytes;
+    PyArg_ParseTuple(args, "d", &bytes);
+    ObjRef(self, SBMManager)->getRelCache()->setMaxTableBytes((long long) bytes);
+    Py_INCREF(Py_None);
+    return Py_None;
+}
+
+//double getTableCacheLimit()
+DefinePyFunction(SBMManager, getTableCacheLimit) {
+    PyArg_ParseTuple(args, "");
+    return Py_BuildValue("d", (double) ObjRef(self, SBMManager)->getRelCache()->getMaxTableBytes());
+}
+
+//dict getTableCacheStats()
+// Hits, misses and evictions of projection tables, and the tables currently kept.
+DefinePyFunction(SBMManager, getTableCacheStats) {
+    PyArg_ParseTuple(args, "");
+    RelCache *cache = ObjRef(self, SBMManager)->getRelCache();
+    return Py_BuildValue("{s:L,s:L,s:L,s:L,s:L}", "hits", cache->getHits(), "misses", cache->getMisses(),
+            "evictions", cache->getEvictions(), "tables", cache->getTableCount(), "bytes", cache->getTableBytes());
+}
+
 //long printBasicStatistics()
 DefinePyFunction(SBMManager, printBasicStatistics) {
     PyArg_ParseTuple(args, "");
@@ -1214,14 +1491,17 @@ static struct PyMethodDef SBMManager_methods[] = { PyMethodDef(SBMManager, initF
         PyMethodDef(SBMManager, computeDF), PyMethodDef(SBMManager, computeH), PyMethodDef(SBMManager, computeT),
         PyMethodDef(SBMManager, computeInformationStatistics), PyMethodDef(SBMManager, computeDFStatistics),
         PyMethodDef(SBMManager, computeL2Statistics), PyMethodDef(SBMManager, computePearsonStatistics),
+        PyMethodDef(SBMManager, fitModels), PyMethodDef(SBMManager, selectBest),
         PyMethodDef(SBMManager, computeDependentStatistics), PyMethodDef(SBMManager, computeBPStatistics),
         PyMethodDef(SBMManager, computeIncrementalAlpha), PyMethodDef(SBMManager, compareProgenitors),
+        PyMethodDef(SBMManager, computeModelStatistics),
         PyMethodDef(SBMManager, setSearchDirection), PyMethodDef(SBMManager, printFitReport),
         PyMethodDef(SBMManager, getOption), PyMethodDef(SBMManager, getOptionList),
         PyMethodDef(SBMManager, Report), PyMethodDef(SBMManager, makeFitTable),
         PyMethodDef(SBMManager, isDirected), PyMethodDef(SBMManager, printOptions),
         PyMethodDef(SBMManager, deleteModelFromCache), PyMethodDef(SBMManager, deleteTablesFromCache),
         PyMethodDef(SBMManager, computePercentCorrect), PyMethodDef(SBMManager, getSampleSz), PyMethodDef(SBMManager, getMemUsage),
+        PyMethodDef(SBMManager, setTableCacheLimit), PyMethodDef(SBMManager, getTableCacheLimit), PyMethodDef(SBMManager, getTableCacheStats),
         PyMethodDef(SBMManager, printBasicStatistics), PyMethodDef(SBMManager, hasTestData), { NULL, NULL, 0 } };
 
 /****** Basic Type Operations ******/
@@ -1701,30 +1981,76 @@ DefinePyFunction(Report, writeReport) {
     return Py_None;
 }
 
-// void printResiduals(Model *model)
+//-- The file a report is written to: stdout if none is given, the file of a Python file object,
+//-- or a file descriptor, which is duplicated so that closing the file leaves it open. Returns
+//-- NULL for anything else; owned is set if the file is to be closed when the report is done.
+static FILE *reportFile(PyObject *Pfile, bool *owned) {
+    *owned = false;
+    if (Pfile == NULL || Pfile == Py_None)
+        return stdout;
+    if (PyFile_Check(Pfile))
+        return PyFile_AsFile(Pfile);
+    if (!PyInt_Check(Pfile))
+        return NULL;
+    int fd = dup((int) PyInt_AsLong(Pfile));
+    if (fd < 0)
+        return NULL;
+    FILE *file = fdopen(fd, "w");
+    if (file == NULL) {
+        close(fd);
+        return NULL;
+    }
+    //-- anything already written to stdout comes first, if this is the same file
+    fflush(stdout);
+    *owned = true;
+    return file;
+}
+
+static void reportDone(FILE *file, bool owned) {
+    if (owned)
+        fclose(file);
+    else
+        fflush(file);
+}
+
+// void printResiduals(Model *model, int skipTrainedTable, int skipIVItables, file = stdout)
 DefinePyFunction(Report, printResiduals) {
     PyObject *Pmodel;
+    PyObject *Pfile = NULL;
     int skipTrainedTable;
     int skipIVItables;
-    PyArg_ParseTuple(args, "O!ii", &TModel, &Pmodel, &skipTrainedTable, &skipIVItables);
+    bool owned;
+    if (!PyArg_ParseTuple(args, "O!ii|O", &TModel, &Pmodel, &skipTrainedTable, &skipIVItables, &Pfile))
+        return NULL;
     Model *model = ObjRef(Pmodel, Model);
+    FILE *fd = reportFile(Pfile, &owned);
+    if (fd == NULL)
+        onError("printResiduals: file must be a file object or a file descriptor");
 
-    ObjRef(self, Report)->printResiduals(stdout, model, skipTrainedTable, skipIVItables);
+    ObjRef(self, Report)->printResiduals(fd, model, skipTrainedTable, skipIVItables);
+    reportDone(fd, owned);
     Py_INCREF(Py_None);
     return Py_None;
 }
 
-// void printConditional_DV(Model *model)
+// void printConditional_DV(Model *model, int calcExpectedDV, char *classTarget, file = stdout)
 DefinePyFunction(Report, printConditional_DV) {
     PyObject *Pmodel;
+    PyObject *Pfile = NULL;
     int calcExpectedDV;
     char* classTarget;
     bool bCalcExpectedDV = false;
-    PyArg_ParseTuple(args, "O!is", &TModel, &Pmodel, &calcExpectedDV, &classTarget);
+    bool owned;
+    if (!PyArg_ParseTuple(args, "O!is|O", &TModel, &Pmodel, &calcExpectedDV, &classTarget, &Pfile))
+        return NULL;
     if (calcExpectedDV != 0)
         bCalcExpectedDV = true;
     Model *model = ObjRef(Pmodel, Model);
-    ObjRef(self, Report)->printConditional_DV(stdout, model, bCalcExpectedDV, classTarget);
+    FILE *fd = reportFile(Pfile, &owned);
+    if (fd == NULL)
+        onError("printConditional_DV: file must be a file object or a file descriptor");
+    ObjRef(self, Report)->printConditional_DV(fd, model, bCalcExpectedDV, classTarget);
+    reportDone(fd, owned);
     Py_INCREF(Py_None);
     return Py_None;
 }
@@ -1937,6 +2263,13 @@ void initoccam() {
     d = PyModule_GetDict(m);
     ErrorObject = Py_BuildValue("s", "occam.error");
     PyDict_SetItemString(d, "error", ErrorObject);
+    //-- the statistic groups for computeModelStatistics
+    PyDict_SetItemString(d, "L2_STATISTICS", PyInt_FromLong(ManagerBase::L2_STATISTICS));
+    PyDict_SetItemString(d, "DEPENDENT_STATISTICS", PyInt_FromLong(ManagerBase::DEPENDENT_STATISTICS));
+    PyDict_SetItemString(d, "BP_STATISTICS", PyInt_FromLong(ManagerBase::BP_STATISTICS));
+    PyDict_SetItemString(d, "PERCENT_CORRECT", PyInt_FromLong(ManagerBase::PERCENT_CORRECT));
+    PyDict_SetItemString(d, "PEARSON_STATISTICS", PyInt_FromLong(ManagerBase::PEARSON_STATISTICS));
+    PyDict_SetItemString(d, "INCREMENTAL_ALPHA", PyInt_FromLong(ManagerBase::INCREMENTAL_ALPHA));
     if (PyErr_Occurred())
         Py_FatalError("cannot initialize module occam");
 }
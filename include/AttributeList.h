@@ -10,19 +10,30 @@
 
 /**
  * AttributeList - associated with models and relations, an attribute carries a name and a numeric value.
+ * Attribute names are interned: each distinct name gets a small integer ID, shared by all lists,
+ * and each list keeps its values in slots indexed by ID. The functions taking a name look up its
+ * ID; code which uses an attribute many times can look the ID up once and use it instead.
  */
 class AttributeList {
     public:
-        // initialize empty attribute list
+        // initialize empty attribute list, with room for attributes of IDs below size
         AttributeList(int size);
         ~AttributeList();
         long size();
         void reset();
 
-        // Add an attribute. Names are not copied so the name argument must point to a
-        // permanent string. If an attribute by this name already exists, it is replaced.
+        // Get the ID for an attribute name. Case is ignored, as is anything from a "$" on (this
+        // is formatting info). If add is set, an ID is given to a name which doesn't have one yet;
+        // otherwise -1 is returned for it.
+        static int getAttributeId(const char *name, bool add = true);
+
+        // Add an attribute. If an attribute by this name already exists, it is replaced.
         void setAttribute(const char *name, double value);
+        void setAttribute(int id, double value);
+        // Get an attribute, or -1 if it isn't set.
         double getAttribute(const char *name);
+        double getAttribute(int id);
+        // The index of an attribute is its ID, or -1 if it isn't set.
         int getAttributeIndex(const char *name);
         int getAttributeCount();
         double getAttributeByIndex(int index);
@@ -31,10 +42,15 @@ class AttributeList {
         void dump();
 
     private:
-        const char** names;
-        double *values;
+        bool isSet(int id) {
+            return id >= 0 && id < slotCount && (setBits[id >> 6] >> (id & 63) & 1);
+        }
+        void growSlots(int id);
+
+        double *values; // indexed by attribute ID
+        unsigned long long *setBits; // which of the values are set
+        int slotCount;
         int attrCount;
-        int maxAttrCount;
 };
 
 #endif
@@ -48,6 +48,7 @@ const double PROB_MIN = 1e-36;
 #define ATTRIBUTE_T_FROM_H "t_h"
 #define ATTRIBUTE_IPF_ITERATIONS "ipf_iterations"
 #define ATTRIBUTE_IPF_ERROR "ipf_error"
+#define ATTRIBUTE_IPF_SAVED "ipf_saved"
 #define ATTRIBUTE_PROCESSED "processed"
 #define ATTRIBUTE_IND_H "h_ind_vars"
 #define ATTRIBUTE_DEP_H "h_dep_vars"
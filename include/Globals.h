@@ -10,12 +10,22 @@
 
 #include "Types.h"
 
-extern class VariableList* sort_var_list;
-extern int sort_count;
-extern int* sort_vars;
-extern KeySegment** sort_keys;
-extern class Table* sort_table;
-
-int sortKeys(const void*, const void*);
+//-- comparator for ordering tuples by the printed values of their variables, as
+//-- used in reports. The tuples are given by index, either into a table or into an
+//-- array of keys. All the state is carried in the object, so that sorts can run
+//-- on several threads (or for several managers) at once. Equal tuples are ordered
+//-- by index, which makes the order the same as that of a stable sort.
+class KeyValueOrder {
+    public:
+        KeyValueOrder(class VariableList *varList, int count, int *vars, KeySegment **keys, class Table *table);
+        bool operator()(int i1, int i2) const;
+    private:
+        class VariableList *varList;
+        int count;
+        int *vars;
+        KeySegment **keys;
+        class Table *table;
+        int keysize;
+};
 
 #endif
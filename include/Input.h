@@ -21,5 +21,20 @@
 int ocReadFile(FILE *fd, class Options *options,
 	Table **indata, Table **testdata, VariableList **vars);
 
+/**
+ * Binary data files. ocWriteBinaryFile saves the options, variables and data (and test
+ * data, if any) read from an input file, so that later runs can load them with
+ * ocReadBinaryFile, which maps the tuples directly into the tables without parsing.
+ * The file is only readable on machines with the same byte order and key layout.
+ * ocIsBinaryFile checks for a binary file, leaving the file at its start.
+ * ocReadBinaryFile returns the number of data lines read from the original file,
+ * or 0 if the file couldn't be read.
+ */
+bool ocIsBinaryFile(FILE *fd);
+int ocReadBinaryFile(FILE *fd, class Options *options,
+	Table **indata, Table **testdata, VariableList **vars);
+bool ocWriteBinaryFile(const char *fname, class Options *options,
+	Table *indata, Table *testdata, VariableList *vars, int dataLines);
+
 #endif
 
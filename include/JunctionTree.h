@@ -0,0 +1,79 @@
+/*
+ * Copyright © 1990 The Portland State University OCCAM Project Team
+ * [This program is licensed under the GPL version 3 or later.]
+ * Please see the file LICENSE in the source
+ * distribution of this software for license terms.
+ */
+
+#ifndef ___JunctionTree
+#define ___JunctionTree
+
+#include <vector>
+
+class Model;
+class VariableList;
+
+/**
+ * JunctionTree.h - fits a variable-based model without building the table of its full
+ * state space. The graph of the model's relations (variables joined when they share a
+ * relation) is triangulated, and its cliques are joined into a junction tree. The fit of
+ * the model then factors as the product of its clique marginals over the product of its
+ * separator marginals, so IPF can be done on the clique tables alone: each relation is
+ * fit in a clique which contains it, and the change is passed on to the rest of the tree
+ * through the separators. This gives the same fit (and the same H) as IPF on the full
+ * table, in space and time proportional to the clique tables. It only helps when the
+ * cliques are small, i.e., when the loops in the model are narrow.
+ */
+class JunctionTree {
+    public:
+        // build the tree for the model. If a clique would have more than maxStates
+        // states, building stops and isValid() returns false.
+        JunctionTree(Model *model, VariableList *vars, double maxStates);
+        ~JunctionTree();
+
+        bool isValid() { return valid; }
+        int getCliqueCount() { return (int) cliques.size(); }
+
+        // fit the model by IPF, stopping when no relation is off by more than maxDev, or
+        // after maxIterations passes. The model's projections must already have been made.
+        // The fit starts from the same table as makeFitTableIPF without a warm start, so it
+        // stops at the same point. Returns the number of passes, counted as for
+        // makeFitTableIPF, and sets error to the largest difference in the last pass.
+        int fit(double maxDev, double maxIterations, double *error);
+
+        // the entropy of the fit, in bits: the sum of the entropies of the cliques,
+        // less the sum of the entropies of the separators
+        double entropy();
+
+    private:
+        struct Clique {
+            std::vector<int> vars;
+            std::vector<double> values;
+        };
+        struct Separator {
+            int cliques[2];
+            std::vector<int> index[2]; // cell of each clique -> cell of the separator
+            std::vector<double> values;
+        };
+        struct Margin {
+            int clique;
+            std::vector<int> index; // cell of the clique -> cell of the relation
+            std::vector<double> target;
+            std::vector<double> proj;
+        };
+
+        long long stateCount(const std::vector<int> &vars);
+        void makeIndex(const std::vector<int> &from, const std::vector<int> &to, std::vector<int> &index);
+        void distribute(int clique);
+        double adjust(Margin &margin);
+
+        VariableList *varList;
+        Model *model;
+        bool valid;
+        std::vector<Clique> cliques;
+        std::vector<Separator> separators;
+        std::vector<std::vector<int> > cliqueSeparators; // separators of each clique
+        std::vector<Margin> margins; // one per relation
+};
+
+#endif
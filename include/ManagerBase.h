@@ -61,6 +61,12 @@ class ManagerBase {
             AUTO, IPF, ALGEBRAIC
         };
 
+        // groups of model statistics, for computeModelStatistics; these are or'ed together
+        enum StatisticGroup {
+            L2_STATISTICS = 1, DEPENDENT_STATISTICS = 2, BP_STATISTICS = 4, PERCENT_CORRECT = 8,
+            PEARSON_STATISTICS = 16, INCREMENTAL_ALPHA = 32
+        };
+
 
         // create an ManagerBase object, supplying it with a variable list and a table
         // of input data.  Typically an application will read the input data and variable
@@ -112,6 +118,13 @@ class ManagerBase {
         // delete a model from the model cache
         virtual bool deleteModelFromCache(Model *model);
 
+        // Statistics cache (see the "stats-cache" option). loadCachedStatistics sets any
+        // statistics cached for the model which it doesn't have yet, and returns true if
+        // the attribute attr was among them. saveCachedStatistics stores the model's
+        // statistics. Both do nothing if there is no cache.
+        bool loadCachedStatistics(Model *model, const char *attr = NULL);
+        void saveCachedStatistics(Model *model);
+
 
         // Make a fit table. This function uses the IPF algorithm. The fit table is
         // linked to the model.  If the model already has a fit table, the function
@@ -119,6 +132,40 @@ class ManagerBase {
         virtual void fitTestAlgebraic(Model *model, Table* algTable, double missingCard, const FitIntersectMap& map);
         virtual bool makeFitTable(Model *model);
         virtual bool makeFitTableIPF(Model *model);
+        bool makeFitTableIPF(Model *model, Table *&fit, Table *&work, Table *proj, bool allowWarmStart = true);
+
+        // With the "ipf-warm-start" option, a copy of each variable-based model's IPF fit is kept
+        // with the model (see Model::getFitTable), and IPF for a model with loops starts from
+        // its progenitor's fit rather than from a uniform table, when the model contains the
+        // progenitor (so the progenitor's fit is in the model's family, and IPF still converges
+        // to the model's fit). Algebraic fits only cover the observed states, so they are not
+        // kept. The searches delete the kept fits once a level is done with them.
+        Table *getWarmStartTable(Model *model);
+        void keepFitTable(Model *model, Table *fit);
+
+        // With the "ipf-junction-tree" option, a variable-based model is fit by IPF on the
+        // cliques of a junction tree (see JunctionTree.h) rather than on its full state space,
+        // when no clique has more states than the option's value. This sets the model's fit H
+        // and IPF attributes, and returns false if the junction tree can't be used. No fit
+        // table is made, so statistics which need one still use makeFitTable.
+        bool fitJunctionTree(Model *model);
+
+        // Compute the fitted H for a set of models (typically, the new models from one
+        // level of a search), fitting them in parallel on threadCount threads (<= 0 means
+        // one per processor). Only models whose H needs IPF (as decided by method, as for
+        // computeH) are fit; the rest are left for computeH. All shared state (projections,
+        // caches) is updated up front on the calling thread, and each worker fits with its
+        // own scratch tables, so results don't depend on the number of threads.
+        void fitModels(Model **models, long count, int threadCount, HMethod method = AUTO);
+
+        // Select the best of a set of models (typically, the new models from one level of a
+        // search): up to width of them, in order of the sortName attribute (highest first if
+        // direction is Descending), with ties in order of name. A model equivalent to one
+        // already selected (see Model::isEquivalentTo) is skipped. The indices of the
+        // selected models are put in best, which must have room for width of them, and
+        // their count is returned.
+        long selectBest(Model **models, long count, long width, const char *sortName, Direction direction,
+                long *best);
         virtual bool makeFitTableAlgebraic(Model *model);
 
         // Expand a single tuple into all values of all missing variables, recursively
@@ -126,11 +173,19 @@ class ManagerBase {
                 int currentMissingVar);
 
         void makeOrthoExpansion(Relation *rel, Table *table);
+        // The same, from the given projection of the relation, which is only read
+        void makeOrthoExpansion(Relation *rel, Table *relTable, Table *outTable);
         void makeSbExpansion(Relation *rel, Table *table);
 
         // Process relations and intersections, as need for DF and H computation
         void doIntersectionProcessing(Model *model, ocIntersectProcessor *proc);
 
+        // Get the inclusion-exclusion terms of a model. They are computed once and kept
+        // with the model. If the model's progenitor has its terms, and the model contains
+        // the progenitor, only the terms for the model's new relations are computed.
+        // Intersections of pairs of relations are looked up in a memo.
+        IntersectTerms *getIntersectTerms(Model *model);
+
         // Compute degrees of freedom of a model.  This involves computing degrees
         // of freedom of the constituent relations, minus the first order overlaps,
         // plus the second order overlaps, etc. This also computes entropy, though
@@ -158,6 +213,17 @@ class ManagerBase {
         //-- compares a new progenitor to an existing one, so the best is kept
         void compareProgenitors(Model *model, Model *newProgen);
 
+        //-- the statistics groups of computeModelStatistics, which the VB and SB managers compute
+        virtual void computeL2Statistics(Model *model) = 0;
+        virtual void computeDependentStatistics(Model *model) = 0;
+        virtual void computeBPStatistics(Model *model) = 0;
+        virtual void computePercentCorrect(Model *model) = 0;
+        virtual void computePearsonStatistics(Model *model) = 0;
+
+        //-- compute the groups of statistics given (or'ed StatisticGroup values) for a model,
+        //-- making its projections and fit only once for all of them
+        void computeModelStatistics(Model *model, int groups);
+
         // Sets the direction in which search is occurring, which is mostly used for information.
         // 0 = up, 1 = down.  This doesn't actually control the direction of search, but it's
         // useful for determining other things, such as DDF.
@@ -178,6 +244,10 @@ class ManagerBase {
         virtual int getUseInverseNotation() {
             return useInverseNotation;
         }
+        //-- the method used for DDF (see VBMManager::setDDFMethod)
+        virtual int getDDFMethod() {
+            return 0;
+        }
         void setValuesAreFunctions(int flag);
         bool getValuesAreFunctions() {
             return valuesAreFunctions;
@@ -273,6 +343,9 @@ class ManagerBase {
         Model* projectedModel(Relation* projectTo, Model* model);
 
     protected:
+        Relation *intersectRelations(Relation *rel1, Relation *rel2);
+        void addIntersectTerms(std::vector<Relation*> &rels, int sign, IntersectTerms &terms);
+
         Model *topRef;
         Model *bottomRef;
         Model *refModel;
@@ -284,18 +357,21 @@ class ManagerBase {
         Table *inputData;
         Table *testData;
         double inputH;
+        class StatsCache *statsCache;
         class RelCache *relCache;
+        bool holdTables; // if set, projection tables are kept even if over the cache budget, and their use isn't tracked
         class ModelCache *modelCache;
         class Options *options;
         Table *fitTable1;
         Table *fitTable2;
+        Model *fitTableModel; // the model fitted in fitTable1, if any
+        bool shareFit; // if set, makeFitTable reuses fitTable1 when it holds the model's fit
+        double bottomRefP2; // Pearson X2 of the bottom reference, once computed
         Table *projTable;
         int dataLines;
         int *DVOrder;
         int useInverseNotation;
-        VarIntersect *intersectArray;
-        int intersectCount;
-        int intersectMax;
+        map<std::pair<Relation*, Relation*>, Relation*> intersectMemo; // NULL if no common variables
         double functionConstant;
         double negativeConstant;
         bool valuesAreFunctions;
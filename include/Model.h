@@ -10,6 +10,7 @@
 
 #include "ModelCache.h"
 #include "Relation.h"
+#include "VarIntersect.h"
 
 /**
  * Model - defines a model as a list of Relations.
@@ -32,6 +33,10 @@ class Model {
         Table *getFitTable();
         void setFitTable(Table *tbl);
         void deleteFitTable();
+        // the model's inclusion-exclusion terms, kept by ManagerBase::getIntersectTerms.
+        // The model takes ownership of the terms.
+        IntersectTerms *getIntersectTerms();
+        void setIntersectTerms(IntersectTerms *terms);
         void deleteRelationLinks();
 
         // copy relation references (but not the objects)
@@ -47,6 +52,11 @@ class Model {
         // get a printable name for the relation, using the variable abbreviations
         const char *getPrintName(int useInverse = 0);
 
+        // a hash of the model's relations, and a check that two models have the same
+        // relations. The model cache matches models with these.
+        unsigned long long getHashKey();
+        bool isSameAs(Model *other);
+
         // set, get hash chain linkages
         Model *getHashNext() {
             return hashNext;
@@ -104,8 +114,11 @@ class Model {
         int relationCount;
         int maxRelationCount;
         class Table *fitTable;
+        IntersectTerms *intersectTerms;
         class AttributeList *attributeList;
         Model *hashNext;
+        unsigned long long hashKey; // hash of the relations, if hashKeyValid
+        bool hashKeyValid;
         char *printName;
         char *inverseName;
         int **structMatrix;
@@ -11,12 +11,13 @@
 /**
  * ModelCache.h - defines the model cache.  This provides a way to reuse model
  * objects.
- * the cache matches on the printName for the model, which uniquely identifies the
- * set of relations.
+ * the cache matches on the relations of the model (Model::getHashKey and
+ * Model::isSameAs), so no print names are needed. The hash table doubles as the
+ * cache grows.
  * There must be a separate model cache for each different problem instance.
  *
  */
-#define MODELCACHE_HASHSIZE 1001
+#define MODELCACHE_HASHSIZE 1024 // initial number of hash chains (a power of 2)
 class ModelCache {
     public:
 	//-- construct an empty model cache
@@ -35,14 +36,18 @@ class ModelCache {
 	//-- returns true if successful, false if not found.
 	bool deleteModel(class Model *model);
 
-	//-- findModel - find a model in the cache.  Null is returned if the given
-	//-- model doesn't exist.
-	class Model *findModel(const char *name);
+	//-- findModel - find the model in the cache with the same relations as the
+	//-- given one.  Null is returned if there is none.
+	class Model *findModel(class Model *model);
 
 	void dump();
 
     private:
+	void growHash();
+
 	class Model **hash;
+	long hashSize;
+	long modelCount;
 };
 
 #endif
@@ -34,10 +34,7 @@ class Options {
 
 	//-- set options based on command arguments or an input file
 	void setOptions(int argc, char **argv);
-	bool readOptions(FILE *fd);
-
-	//-- line reader function; for use by other input services
-	static bool getLine(FILE *fd, char *line, int *lineno);
+	bool readOptions(class LineReader *reader);
 
 	//-- set individual options
 	bool setOptionString(ocOptionDef *def, const char *value);
@@ -51,6 +48,10 @@ class Options {
 	bool getOptionString(const char *name, void **next, const char **value);
 	bool getOptionFloat(const char *name, void **next, double *nvalue);
 
+	//-- iterate over all settings, in the order they were made (same use of next
+	//-- as getOptionString)
+	bool getNextOption(void **next, const char **name, const char **value);
+
 	//-- write options to a file
 	void write(FILE *fd=NULL, bool printHTML=false, bool skipNominal=false);
 
@@ -62,5 +63,52 @@ class Options {
 	//-- pointer to default option (for file names on command line)
 };
 
-#endif
+/**
+ * Reads the lines of an input file, for the options and for other input services. The file
+ * is read in large blocks, and split into lines in the buffer. Comments (from "#" to the end
+ * of the line), leading and trailing whitespace, and blank lines are skipped. A line may end
+ * with CR, LF, or both.
+ */
+class LineReader {
+    public:
+	LineReader(FILE *fd);
+	//-- read the lines of text in memory instead. A line longer than MAXLINE then ends
+	//-- the text, rather than being an error, so the caller can report it (atEnd() is
+	//-- false after it).
+	LineReader(const char *text, long length);
+	~LineReader();
+
+	//-- get the next line, of at most MAXLINE characters. lineno counts the lines read,
+	//-- including blank ones. Returns false at the end of the file.
+	bool getLine(char *line, int *lineno);
+
+	//-- true once the end of the file has been reached (like feof(), it is set by trying
+	//-- to read past the end, so it isn't set yet after a final newline)
+	bool atEnd() { return endReached; }
 
+	//-- get the unread text in the buffer, up to the end of its last line break (reading
+	//-- more of the file first, if there is room). At the end of the file, this is all of
+	//-- the rest. Returns the length, which is 0 if no line break is in the buffer. The
+	//-- lines of the text can be read with other LineReaders (which may be on other
+	//-- threads), and then passed over here with skip().
+	long getText(const char **text);
+	void skip(long length) { pos += length; }
+
+	//-- the position of the next unread character in the text
+	long getPosition() { return pos; }
+
+    private:
+	bool fill();
+	long findBreak(long from);
+
+	FILE *fd;
+	char *buffer;
+	long size;	// size of the buffer
+	long pos;	// next unread character in the buffer
+	long end;	// end of the characters read into the buffer
+	bool fileEnded;	// the whole file has been read into the buffer
+	bool endReached;
+	bool ownsBuffer;
+};
+
+#endif
@@ -12,12 +12,17 @@
  * RelCache.h - defines the relation cache.  This provides a way to reuse relation
  * objects, since once constructed a relation object can be used by any model
  * containing that relation.
- * the cache matches on the mask for the relation, which uniquely identifies the
- * set of variables in the relation.
+ * the cache matches on the structure of the relation (Relation::getHashKey and
+ * Relation::isSameAs), which identifies the set of variables in the relation, and
+ * their states for state-based relations. The hash table doubles as the cache grows.
  * There must be a separate relation cache for each different problem instance.
  *
+ * The cache also tracks the projection tables of its relations, in least-recently-used
+ * order. If a byte budget is set, the least recently used tables are deleted to stay
+ * within it; a deleted projection is recomputed by ManagerBase::makeProjection when
+ * it is next needed.
  */
-#define RELCACHE_HASHSIZE 1001
+#define RELCACHE_HASHSIZE 1024 // initial number of hash chains (a power of 2)
 class RelCache {
     public:
 	//-- construct an empty relation cache
@@ -31,18 +36,66 @@ class RelCache {
 	//-- delete projection tables from all relations in cache
 	void deleteTables();
 
+	//-- addTable - start tracking a newly made projection table (a miss);
+	//-- useTable - mark a relation's table as most recently used (a hit)
+	void addTable(class Relation *rel);
+	void useTable(class Relation *rel);
+
+	//-- trimTables - delete least recently used tables until the total is within the
+	//-- budget, but never the keepCount most recently used ones (those in use).
+	void trimTables(int keepCount);
+
+	//-- byte budget for projection tables; zero means no limit
+	void setMaxTableBytes(long long bytes) {
+	    maxTableBytes = bytes;
+	}
+	long long getMaxTableBytes() {
+	    return maxTableBytes;
+	}
+
+	//-- usage counters
+	long long getTableBytes() {
+	    return tableBytes;
+	}
+	long long getTableCount() {
+	    return tableCount;
+	}
+	long long getHits() {
+	    return hits;
+	}
+	long long getMisses() {
+	    return misses;
+	}
+	long long getEvictions() {
+	    return evictions;
+	}
+
 	//-- addRelation - put a new relation in the cache. If a matching relation already
 	//-- exists, an error is returned.
 	bool addRelation(class Relation *rel);
 
-	//-- findRelation - find a relation in the cache.  Null is returned if the given
-	//-- relation doesn't exist.
-	class Relation *findRelation(const char *name);
+	//-- findRelation - find the relation in the cache with the same structure as the
+	//-- given one.  Null is returned if there is none.
+	class Relation *findRelation(class Relation *rel);
 
 	void dump();
 
     private:
+	void unlinkTable(class Relation *rel);
+	bool isTracked(class Relation *rel);
+	void growHash();
+
 	class Relation **hash;
+	long hashSize;
+	long relationCount;
+	class Relation *tableHead; // most recently used table
+	class Relation *tableTail; // least recently used table
+	long long tableBytes;
+	long long tableCount;
+	long long maxTableBytes;
+	long long hits;
+	long long misses;
+	long long evictions;
 };
 
 #endif
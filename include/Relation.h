@@ -54,6 +54,14 @@ class Relation {
         // find a variable and return its index
         int findVariable(int varid);
 
+        // see if the relation has a variable, using the variable bitset
+        bool hasVariable(int varid);
+
+        // get the variables as a bitset, with bit (i % 64) of word (i / 64) set if
+        // variable i is in the relation. getVarBitWords() is the number of words.
+        unsigned long long *getVarBits();
+        int getVarBitWords();
+
         // return number of variables in relation
         int getVariableCount();
 
@@ -68,6 +76,12 @@ class Relation {
         // deletes the projection table to recover storage
         void deleteTable();
 
+        // sets/gets the index of the projection tuple matching each tuple of the input
+        // data (-1 if none), for computations which visit the data a relation at a time.
+        // The relation takes ownership; the index is deleted with the table.
+        void setDataIndex(long long *index);
+        long long *getDataIndex();
+
         // sets/gets the state constraints for the relation
         void setStateConstraints(class StateConstraint *constraints);
         StateConstraint *getStateConstraints();
@@ -81,6 +95,12 @@ class Relation {
         // see if one relation contains another
         bool contains(Relation *other);
 
+        // a hash of the structure of the relation (its variables, and for state-based
+        // relations, their states), and a check that two relations have the same
+        // structure. Relations are the same exactly when their print names are.
+        unsigned long long getHashKey();
+        bool isSameAs(Relation *other);
+
         // see if all variables are independent or all dependent
         bool isIndependentOnly();
         bool isDependentOnly();
@@ -111,6 +131,20 @@ class Relation {
             hashNext = next;
         }
 
+        // set, get linkages for the relation cache's list of projection tables
+        Relation *getTablePrev() {
+            return tablePrev;
+        }
+        void setTablePrev(Relation *prev) {
+            tablePrev = prev;
+        }
+        Relation *getTableNext() {
+            return tableNext;
+        }
+        void setTableNext(Relation *next) {
+            tableNext = next;
+        }
+
         // get the attribute list for the relation
         class AttributeList *getAttributeList() {
             return attributeList;
@@ -131,6 +165,8 @@ class Relation {
 
     private:
         void buildMask(); // build the variable mask from the list of variables
+        void buildVarBits(); // build the variable bitset from the list of variables
+        int getPrintedState(int index); // state of a variable, as it shows in the print name
 
         VariableList *varList; // variable list associated with this relation
         int *vars; // array of variable indices
@@ -139,9 +175,15 @@ class Relation {
         int varCount; // number of vars in relation
         int maxVarCount; // size of vars array
         class Table *table;
+        long long *dataIndex; // input data tuple -> projection tuple
         class StateConstraint *stateConstraints; // state constraints
         Relation *hashNext; // linkage for storing relations in a hash table
+        Relation *tablePrev, *tableNext; // linkage for the relation cache's table list
         KeySegment *mask; // mask has zero for variables in this rel, 1's elsewhere
+        unsigned long long *varBits; // bitset of the variables in this rel
+        int varBitWords; // number of words in varBits
+        unsigned long long hashKey; // structural hash, if hashKeyValid
+        bool hashKeyValid;
         class AttributeList *attributeList;
         char *printName;
         char *inverseName;
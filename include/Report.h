@@ -32,8 +32,38 @@ class dv_Data{
     int *rule_index;
 };
 
-int sortKeys(const void *d1, const void *d2);
-int sortCompare(const void *k1, const void *k2);
+/**
+ * ReportBuffer - collects the text of a report table in a large buffer, and writes it to the
+ * file in blocks, rather than a few fields per call. Anything written to the file directly
+ * must come after a flush(); the buffer is also flushed when it is deleted.
+ */
+class ReportBuffer {
+    public:
+        ReportBuffer(FILE *fd);
+        ~ReportBuffer();
+        void print(const char *format, ...);
+        void flush();
+
+    private:
+        FILE *fd;
+        char *buffer;
+        long used;
+};
+
+//-- comparator for ordering models by an attribute, in the given direction. Models with
+//-- equal values are ordered by level, following the direction of the search. As with
+//-- KeyValueOrder, all the state is carried in the object rather than in globals.
+class ModelOrder {
+    public:
+        ModelOrder(const char *attr, Direction sortDir, Direction searchDir);
+        bool operator()(class Model *m1, class Model *m2) const;
+    private:
+        int attrId; // the ID of the attribute (see AttributeList)
+        int levelId;
+        Direction sortDir;
+        Direction searchDir;
+};
+
 void orderIndices(const char **stringArray, int len, int *order);
 	
 class Report {
@@ -117,7 +147,7 @@ class Report {
     char* alloc_dv_header();
 
 
-    void printTableRow(FILE* fd, bool blue, VariableList* vl, int var_count, Relation* rel, double value, KeySegment* refkey, double refvalue, double iviValue, double adjustConstant, double sample_size, bool printLift, bool printCalc);
+    void printTableRow(ReportBuffer& out, char* keystr, bool blue, VariableList* vl, int var_count, Relation* rel, double value, KeySegment* refkey, double refvalue, double iviValue, double adjustConstant, double sample_size, bool printLift, bool printCalc);
     void printTable(FILE* fd, Relation* rel, Table* fit_table, Table* input_table, Table* indep_table, double adjustConstant, double sample_size, bool printLift, bool printCalc);
     
     void printTestData(FILE* fd, Relation* rel, Table* fit_table, Table* indep_table, double adjustConstant, int keysize, bool printCalc, bool printLift);
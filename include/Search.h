@@ -8,6 +8,7 @@
 #ifndef ___Search
 #define ___Search
 #include "SearchBase.h"
+#include <unordered_set>
 
 class SearchFullDown : public SearchBase {
     public:
@@ -41,12 +42,29 @@ class SearchLooplessDown : public SearchBase {
 
 class SearchSbFullUp : public SearchBase {
     public:
-	SearchSbFullUp() {};
-	virtual ~SearchSbFullUp() {};
+	SearchSbFullUp(): startModel(0), choices(0), varIndices(0), stateIndices(0), dvState(0), dvStateCount(0),
+	        generating(false) {};
+	virtual ~SearchSbFullUp();
 	Model **search(Model *start);
+	void beginSearch(Model *start);
+	Model *nextModel();
 	static SearchBase *make() { return new SearchSbFullUp(); }
-    void recurseDirected(Model *start, int cur_var, int cur_index, int *var_indices, int *state_indices, int &models_found, Model **model_list);
-    bool addToCache(Model *model, int &models_found, Model **model_list);
+
+    protected:
+	Model *makeCandidate();
+	bool advance();
+
+	//-- The candidates are generated one at a time, by counting through the possible new
+	//-- relations like an odometer: each IV is either left out of the relation or in it
+	//-- with one of its states, and the DV is in every relation.
+	Model *startModel;	// model being searched from
+	int *choices;	// state of each variable in the next relation, or -1 if it is left out
+	int *varIndices;
+	int *stateIndices;
+	int dvState;	// state of the DV in the next relation
+	int dvStateCount;
+	bool generating;
+	std::unordered_set<Model*> returned; // models already returned from this search
 };
 
 class SearchSbLooplessUp : public SearchBase {
@@ -20,6 +20,12 @@ class SearchBase {
     virtual ~SearchBase();
 
     virtual Model **search(Model *start);
+    // Generate the models of search(start) one at a time: after beginSearch(start), each call
+    // of nextModel() returns the next model, or NULL when there are no more. Only one search
+    // at a time can be generated this way. By default the models are all found by search(),
+    // and then handed out.
+    virtual void beginSearch(Model *start);
+    virtual Model *nextModel();
     bool isDirected() { return directed; }
     bool makeProjection() { return projection; }
     ManagerBase *getManager() { return manager; }
@@ -33,6 +39,8 @@ class SearchBase {
     ManagerBase *manager;
     bool directed;	// system is directed (has dependent variables)
     bool projection; // create a projection table for all new relations
+    Model **pending; // models from search(), for nextModel()
+    long pendingIndex;
 };
 
 class SearchFactory {
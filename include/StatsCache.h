@@ -0,0 +1,52 @@
+/*
+ * Copyright © 1990 The Portland State University OCCAM Project Team
+ * [This program is licensed under the GPL version 3 or later.]
+ * Please see the file LICENSE in the source
+ * distribution of this software for license terms.
+ */
+
+#ifndef ___StatsCache
+#define ___StatsCache
+
+#include <map>
+#include <string>
+
+/**
+ * StatsCache.h - defines the statistics cache. This keeps the computed statistics of
+ * models in a file, so that later runs on the same data can reuse them instead of
+ * fitting the models again.
+ * Entries are keyed by a hash of the data (variables, training and test data), a hash
+ * of the settings that affect the statistics (reference model, IPF parameters, etc.),
+ * and the model name. The file is a text file with one entry per line, and new entries
+ * are appended, so several runs can share it; a later entry replaces an earlier one.
+ * Only statistics which depend on nothing but the model, data and settings are kept
+ * (not, for instance, the search level or incremental alpha).
+ */
+class StatsCache {
+    public:
+	//-- open the cache file at path (creating it if needed), and load the entries for
+	//-- the given data hash.
+	StatsCache(const char *path, unsigned long long dataHash);
+	~StatsCache();
+
+	//-- load - set any statistics cached for the model which it doesn't have yet.
+	//-- Returns the number of statistics set.
+	int load(const char *settingsKey, class Model *model);
+
+	//-- save - add the model's statistics to the cache, if any are new.
+	void save(const char *settingsKey, class Model *model);
+
+	//-- hash functions for building the keys (64-bit FNV-1a). The hash argument is
+	//-- the hash so far, so data can be hashed in pieces.
+	static unsigned long long hash(const void *data, long long length,
+		unsigned long long hash = 14695981039346656037ULL);
+	static unsigned long long hash(const char *str, unsigned long long hash = 14695981039346656037ULL);
+
+    private:
+	typedef std::map<const char*, double> StatList;
+	std::map<std::string, StatList> entries; // keyed by "settings<tab>model name"
+	char *path;
+	char dataKey[17];
+};
+
+#endif
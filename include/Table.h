@@ -13,6 +13,7 @@
 #include "Globals.h"
 #include <stdlib.h>
 #include <stdio.h>
+#include <algorithm>
 
 /*
  * Table - defines a data table, which is a collection of tuples. The tuples are stored
@@ -36,6 +37,11 @@ class Table {
         void insertTuple(KeySegment *key, double value, long long index); // insert in given spot
         void sumTuple(KeySegment *key, double value); // add (or) this value to matching tuple
 
+        //-- bulk accumulation. Tuples are appended with addTuple (duplicates allowed), and
+        //-- sortAndMerge is called once at the end. This avoids the sorted insert done by
+        //-- sumTuple, which is quadratic when loading many distinct tuples.
+        void sortAndMerge(); // sort tuples by key, and sum (or) tuples with matching keys
+
         //-- key and value access functions
         double getValue(long long index);
         void setValue(long long index, double value);
@@ -45,6 +51,10 @@ class Table {
         //-- find the given key. If matchOnly is true, -1 is returned on no match.
         //-- if matchOnly is false, the position of the next higher tuple is returned
         long long indexOf(KeySegment *key, bool matchOnly = true); //
+        //-- for each tuple of the given table, get the value of the tuple with the same key in
+        //-- this one (0 if there isn't one). The tables are stepped through together, in key
+        //-- order, rather than searching this one for each key.
+        void getMatchingValues(Table *keys, double *values);
         long long getTupleCount() {
             return tupleCount;
         }
@@ -55,6 +65,11 @@ class Table {
         void sort(); // sort tuples by key
         void reset(int keysize); // reset table to empty, but reuse the storage
 
+        //-- tuples can be written to a file, and later mapped from it (see Input.h).
+        //-- offset is the position of the first tuple in the file.
+        bool writeTuples(FILE *fd);
+        bool mapTuples(int fd, long long offset, long long count);
+
         // dump debug output
         void dump(bool detail = false);
 
@@ -71,11 +86,17 @@ class Table {
         double getLowestValue();
 
     private:
+        void radixSort(); // sort() for large tables
+        void compareSort(); // sort() for small tables
+        void unmapTuples(); // move mapped tuples to allocated storage
+
         void* data; // storage for all keys and values
         int keysize; // number of key segments in the key for each tuple
         long long tupleCount; // number of tuples in the tuple array
         long long maxTupleCount; // the total size of the data member, in terms of tuples
         TableType type; // one of INFO_TYPE, SET_TYPE
+        void *mapBase; // if the tuples are mapped from a file, the start of the mapping
+        size_t mapBytes; // and its length
 };
 
 template <typename F>
@@ -85,32 +106,23 @@ void tableIteration(Table* input_table, VariableList* varlist, Relation* rel,
     long long dataCount = input_table->getTupleCount();
     int *key_order = new int[dataCount];
     for (long long i = 0; i < dataCount; i++) { key_order[i] = i; }
-    sort_var_list = varlist;
-    sort_count = var_count;
-    sort_vars = nullptr;
-    sort_keys = nullptr;
-    sort_table = input_table;
-    qsort(key_order, dataCount, sizeof(int), sortKeys);
+    std::sort(key_order, key_order + dataCount, KeyValueOrder(varlist, var_count, nullptr, nullptr, input_table));
     if (fit_table == NULL) { fit_table = input_table; }
     if (indep_table == NULL) { indep_table = fit_table; }
+    double *values = new double[dataCount];
+    double *ivivalues = new double[dataCount];
+    fit_table->getMatchingValues(input_table, values);
+    indep_table->getMatchingValues(input_table, ivivalues);
 
 
     for (long long order_i = 0; order_i < dataCount; order_i++) {
         int i = key_order[order_i];
         KeySegment* refkey = input_table->getKey(i);
         double refvalue = input_table->getValue(i);
-       
-       
-        long long vindex = fit_table->indexOf(refkey, true);
-        double value = vindex == -1 ? 0.0 : fit_table->getValue(vindex);
-        
-        long long iviindex = indep_table->indexOf(refkey, true);
-        double ivivalue = iviindex == -1 ? 0.0 : indep_table->getValue(iviindex);
-         
-        // disabled debug output
-        //printf("VI: %d, V: %g, IVII: %d, IVIV: %g\n", vindex, value, iviindex, ivivalue);
-        action(rel, value, refkey, refvalue, ivivalue);
+        action(rel, values[i], refkey, refvalue, ivivalues[i]);
     }
+    delete[] values;
+    delete[] ivivalues;
     delete[] key_order;
 }
 
@@ -121,12 +133,7 @@ void tableKVIteration(Table* table, VariableList* varlist, long var_count, F act
     char* keystr = new char[var_count * MAXABBREVLEN + 1];
     int *key_order = new int[dataCount];
     for (long long i = 0; i < dataCount; i++) { key_order[i] = i; }
-    sort_var_list = varlist;
-    sort_count = var_count;
-    sort_vars = nullptr;
-    sort_keys = nullptr;
-    sort_table = table;
-    qsort(key_order, dataCount, sizeof(int), sortKeys);
+    std::sort(key_order, key_order + dataCount, KeyValueOrder(varlist, var_count, nullptr, nullptr, table));
     for (long long order_i = 0; order_i < dataCount; order_i++) {
         int i = key_order[order_i];
         KeySegment* key = table->getKey(i);
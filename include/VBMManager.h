@@ -73,6 +73,9 @@ public:
     double computeUnexplainedInformation(Model *model);
     double computeDDF(Model *model);
     void setDDFMethod(int method);
+    int getDDFMethod() {
+        return DDFMethod;
+    }
 
     void setUseInverseNotation(int flag);
     int getUseInverseNotation() {
@@ -9,6 +9,8 @@
 #define ___VarIntersect
 
 #include "Relation.h"
+#include <utility>
+#include <vector>
 
 struct VarIntersect {
         int startIndex; // the highest numbered relation index this intersection term represents
@@ -20,4 +22,9 @@ struct VarIntersect {
         }
 };
 
+//-- the inclusion-exclusion terms of a model: each distinct intersection of its relations
+//-- (including the relations themselves), with the net number of times it is added
+//-- (positive) or subtracted (negative)
+typedef std::vector<std::pair<Relation*, int> > IntersectTerms;
+
 #endif
@@ -10,6 +10,8 @@
 
 #include "Constants.h"
 #include "Types.h"
+#include <string>
+#include <unordered_map>
 
 class Variable { // internal use only - see VariableList
     public:
@@ -22,6 +24,7 @@ class Variable { // internal use only - see VariableList
         char name[MAXNAMELEN + 1]; // long name of variable (max 32 chars)
         char abbrev[MAXABBREVLEN + 1]; // abbreviated name for variable
         char* valmap[MAXCARDINALITY]; // maps input file values to nominal values
+        std::unordered_map<std::string, int> *valueIndex; // reverse of valmap, for lookups
         bool rebin; //is rebinning required for this variable
         char * oldnew[2][MAXCARDINALITY];
         int old_card;
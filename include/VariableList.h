@@ -66,6 +66,12 @@ class VariableList {
         //-- if the value map is full, meaning that the cardinality information for the
         //-- variable is incorrect.
         int getVarValueIndex(int varindex, const char *value);
+        //-- same, for a value which has already been separated from its line
+        int getVarValueIndex(int varindex, const char *value, int length);
+        //-- look up the value index, without adding the value: -1 if it hasn't been seen (or
+        //-- no value of the variable has been looked up yet). Since this doesn't change the
+        //-- variable, several threads can use it at once.
+        int findVarValueIndex(int varindex, const char *value, int length);
 
         //-- get the printable variable value from a given value index
         const char *getVarValue(int varindex, int valueindex);
@@ -85,7 +91,7 @@ class VariableList {
 
         //Anjali
         //get the new rebinning value for an old one
-        int getNewValue(int, char*, char*);
+        int getNewValue(int, const char*, char*);
 
     private:
         Variable *vars;
@@ -33,4 +33,12 @@ int ocCompareVariables(int varCount1, int *var1, int varCount2, int *var2);
 bool ocContainsVariables(int varCount1, int *var1, int varCount2, int *var2);
 bool ocContainsStates(int var_count1, int *var1, int *states1, int var_count2, int *var2, int *states2);
 
+/**
+ * Variable sets as bitsets, 64 variables to a word. ocVarBitWords gives the number of
+ * words for varCount variables. A shorter bitset is treated as zero past its end.
+ */
+int ocVarBitWords(int varCount);
+bool ocContainsBits(int words1, const unsigned long long *bits1, int words2, const unsigned long long *bits2);
+bool ocIntersectsBits(int words1, const unsigned long long *bits1, int words2, const unsigned long long *bits2);
+
 #endif
@@ -44,6 +44,7 @@ constexpr attrDesc attrDescriptions[] = {
     { ATTRIBUTE_T_FROM_H, "T(H)", "%12.4f" }, 
     { ATTRIBUTE_IPF_ITERATIONS, "IPF Iter", "%7.0f" }, 
     { ATTRIBUTE_IPF_ERROR, "IPF Err", "%12.8g" }, 
+    { ATTRIBUTE_IPF_SAVED, "IPF Saved", "%7.0f" }, 
     { ATTRIBUTE_PROCESSED, "Proc", "%2.0" }, 
     { ATTRIBUTE_IND_H, "H(Ind)", "%12.4f" }, 
     { ATTRIBUTE_DEP_H, "H(Dep)", "%12.4f" }, 
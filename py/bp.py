@@ -34,8 +34,8 @@ from ocutils import ocUtils
 # alpha
 # beta
 # level
-# p2		-- note that the Pearson statistics aren't
-# p2		-- computed by default because they are expensive
+# p2		-- note that the Pearson statistics are only
+# p2		-- computed if one of them is listed
 # p2_alpha
 # p2_alpha
 # p2_beta
@@ -5,11 +5,16 @@
 # distribution of this software for license terms.
 
 # coding=utf8
-import sys, re, occam, time, heapq, ocGraph
+import sys, re, occam, time, ocGraph
 
 totalgen=0
 totalkept=0
 maxMemoryToUse = 8 * 2**30
+# default budget for the manager's projection tables during a search; least recently
+# used tables are dropped (and recomputed if needed) to stay under it
+tableCacheLimit = maxMemoryToUse / 2
+# number of new models in a search level which are fitted and compared at a time
+searchBatchSize = 1000
 
 class ocUtils:
     # Separator styles for reporting
@@ -24,6 +29,7 @@ class ocUtils:
             self.__manager = occam.VBMManager()
         else:           
             self.__manager = occam.SBMManager()
+        self.__stateBased = man != "VB"
         self.__hide_intermediate_output = False
         self.__report = self.__manager.Report()
         self.__DDFMethod = 0
@@ -36,6 +42,7 @@ class ocUtils:
         self.__skipTrainedModelTable = 1
         self.__skipIVITables = 1
         self.__searchWidth = 3
+        self.__searchThreads = 1
         self.__searchLevels = 7
         self.searchDir = "default"
         self.__searchFilter = "loopless"
@@ -54,6 +61,7 @@ class ocUtils:
         self.__BPStatistics = 0
         self.__PercentCorrect = 0
         self.__IncrementalAlpha = 0
+        self.__PearsonStatistics = 0
         self.__NoIPF = 0
         
         self.graphs = {}
@@ -98,6 +106,8 @@ class ocUtils:
             self.__PercentCorrect = 1
         if re.search('incr_alpha', reportAttributes):
             self.__IncrementalAlpha = 1
+        if re.search('p2', reportAttributes):
+            self.__PearsonStatistics = 1
 
     def setReportSeparator(self, format):
         occam.setHTMLMode(format == ocUtils.HTMLFORMAT)
@@ -156,6 +166,12 @@ class ocUtils:
             width = 1
         self.__searchWidth = width
 
+    def setSearchThreads(self, searchThreads):
+        threads = int(round(float(searchThreads)))
+        if threads <= 0:
+            threads = 1
+        self.__searchThreads = threads
+
     def setSearchLevels(self, searchLevels):
         levels = int(round(float(searchLevels)))
         if levels < 0:  # zero is OK here
@@ -241,53 +257,51 @@ class ocUtils:
             self.__manager.computeL2Statistics(model)
             self.__manager.computeDependentStatistics(model)
  
-    # this function generates the parents/children of the given model, and for
-    # any which haven't been seen before puts them into the newModel list
-    # this function also computes the LR statistics (H, LR, DF, etc.) as well
-    # as the dependent statistics (dH, %dH, etc.)
-    def processModel(self, level, newModelsHeap, model):
-        addCount = 0
-        generatedModels = self.__manager.searchOneLevel(model)
-        for newModel in generatedModels:
-            if newModel.get("processed") <= 0.0 :
-                newModel.processed = 1.0
-                newModel.level = level
-                newModel.setProgenitor(model)
-                self.computeSortStatistic(newModel)
-    # need a fix here (or somewhere) to check for (and remove) models that have the same DF as the progenitor
-                # decorate model with a key for sorting, & push onto heap
-                key = newModel.get(self.sortName)
-                if self.__searchSortDir == "descending":
-                    key = -key
-                heapq.heappush(newModelsHeap, ([key, newModel.get("name")] , newModel))     # appending the model name makes sort alphabet-consistent
-                addCount += 1
-            else:
-                if self.__IncrementalAlpha:
-                    # this model has been made already, but this progenitor might lead to a better Incr.Alpha
-                    # so we ask the manager to check on that, and save the best progenitor
-                    self.__manager.compareProgenitors(newModel, model)
-        return addCount
+    # the statistics that don't need a fitted distribution; for these there is
+    # nothing to gain by fitting the level's models ahead of time
+    def sortStatisticNeedsFit(self):
+        return self.sortName not in ("df", "ddf", "bp_t", "bp_information", "bp_alpha", "pct_correct_data")
 
-            
     # This function processes models from one level, and return models for the next level.
+    # The parents/children of each old model are generated, and those which haven't been seen
+    # before are new models for this level. Models that were already generated are put on the
+    # progenitors list, so that their progenitor can be compared once statistics are available.
+    # The new models are taken a batch at a time (so a state-based search, which can generate
+    # very many of them, needn't have them all in memory): the models of a batch are fitted
+    # together (possibly on several threads), then the LR statistics (H, LR, DF, etc.) and the
+    # dependent statistics (dH, %dH, etc.) are computed for each of them in the order they were
+    # generated, and only the best searchWidth models so far keep their fit tables.
     def processLevel(self, level, oldModels, clear_cache_flag):
-        # start a new heap
-        newModelsHeap = []
-        fullCount = 0
-        for model in oldModels:
-            fullCount += self.processModel(level, newModelsHeap, model)
-        # if searchWidth < heapsize, pop off searchWidth and add to bestModels
+        levelModels = []
         bestModels = []
-        lastKey = ['','']
-        while len(newModelsHeap) > 0:
-            # make sure that we're adding unique models to the list (mostly for state-based)
-            key, candidate = heapq.heappop(newModelsHeap)
-            if (len(bestModels) < self.__searchWidth): # or key[0] == lastKey[0]:      # comparing keys allows us to select more than <width> models,
-                if True not in [n.isEquivalentTo(candidate) for n in bestModels]:   # in the case of ties
-                    bestModels.append(candidate)
-                    lastKey = key
-            else:
-                break
+        newModels = []
+        progenitors = []
+        for model in oldModels:
+            for newModel in self.__manager.searchOneLevel(model):
+                if newModel.get("processed") <= 0.0 :
+                    newModel.processed = 1.0
+                    newModel.level = level
+                    newModel.setProgenitor(model)
+                    newModels.append(newModel)
+                    if len(newModels) >= searchBatchSize:
+                        bestModels = self.processBatch(bestModels, newModels)
+                        levelModels.extend(newModels)
+                        newModels = []
+                elif self.__IncrementalAlpha:
+                    progenitors.append((newModel, model))
+        bestModels = self.processBatch(bestModels, newModels)
+        levelModels.extend(newModels)
+    # need a fix here (or somewhere) to check for (and remove) models that have the same DF as the progenitor
+        for newModel, model in progenitors:
+            # this model has been made already, but this progenitor might lead to a better Incr.Alpha
+            # so we ask the manager to check on that, and save the best progenitor
+            self.__manager.compareProgenitors(newModel, model)
+        # Comparing progenitors can change the statistics of models from any batch, and state-based
+        # models chosen batch by batch can differ from those chosen at once (see processBatch), so
+        # then the best models are chosen again, from all the new models of the level.
+        if progenitors or (self.__stateBased and len(levelModels) > searchBatchSize):
+            bestModels = self.__manager.selectBest(levelModels, self.__searchWidth, self.sortName, self.__searchSortDir)
+        fullCount = len(levelModels)
         truncCount = len(bestModels)
         self.totalgen  = fullCount + self.totalgen
         self.totalkept = truncCount + self.totalkept
@@ -295,11 +309,39 @@ class ocUtils:
         if not self.__hide_intermediate_output:
             print '%d new models, %ld kept; %ld total models, %ld total kept; %ld kb memory used; ' % (fullCount, truncCount, self.totalgen+1, self.totalkept+1, memUsed/1024),
         sys.stdout.flush()
-        if clear_cache_flag:
-            for item in newModelsHeap:
-                self.__manager.deleteModelFromCache(item[1])
+        keptModels = set(id(model) for model in bestModels)
+        for model in levelModels:
+            if id(model) in keptModels:
+                continue
+            if clear_cache_flag:
+                self.__manager.deleteModelFromCache(model)
+            else:
+                model.deleteFitTable()
         return bestModels
 
+    # This function computes the statistics of a batch of new models, and returns the best
+    # searchWidth models of the batch and of the best models so far. The others' fit tables
+    # are deleted.
+    def processBatch(self, bestModels, newModels):
+        if self.sortStatisticNeedsFit():
+            self.__manager.fitModels(newModels, self.__searchThreads)
+        for newModel in newModels:
+            self.computeSortStatistic(newModel)
+        # keep the best searchWidth models, skipping any which are equivalent to one already kept
+        # (mostly for state-based). Ties are broken by model name, so the sort is alphabet-consistent.
+        # The models kept so far come first, as they were generated first. For variable-based
+        # models the result is the same as choosing from all the models at once. State-based
+        # equivalence (containment with the same DF) isn't transitive, so a model dropped in an
+        # earlier batch for being equivalent to one that is later pushed out isn't reconsidered,
+        # and the models kept can differ from those a single selection would keep; processLevel
+        # then chooses again from all the models of the level.
+        candidates = bestModels + newModels
+        keptModels = self.__manager.selectBest(candidates, self.__searchWidth, self.sortName, self.__searchSortDir)
+        keptIds = set(id(model) for model in keptModels)
+        for model in candidates:
+            if id(model) not in keptIds:
+                model.deleteFitTable()
+        return keptModels
 
     # This function returns the name of the search strategy to use based on
     # the searchMode and loopless settings above
@@ -395,14 +437,16 @@ class ocUtils:
             self.__manager.setSearchDirection(0)
         if printOptions: self.printOptions(1)
         self.__manager.printBasicStatistics()
-        self.__manager.computeL2Statistics(start)
-        self.__manager.computeDependentStatistics(start)
+        groups = occam.L2_STATISTICS | occam.DEPENDENT_STATISTICS
         if self.__BPStatistics:
-            self.__manager.computeBPStatistics(start)
+            groups |= occam.BP_STATISTICS
         if self.__PercentCorrect and self.__manager.isDirected():
-            self.__manager.computePercentCorrect(start)
+            groups |= occam.PERCENT_CORRECT
+        if self.__PearsonStatistics:
+            groups |= occam.PEARSON_STATISTICS
         if self.__IncrementalAlpha:
-            self.__manager.computeIncrementalAlpha(start)
+            groups |= occam.INCREMENTAL_ALPHA
+        self.__manager.computeModelStatistics(start, groups)
         start.level = 0
         self.__report.addModel(start)
         self.__nextID = 1
@@ -416,6 +460,8 @@ class ocUtils:
             return
         # process each level, up to the number of levels indicated. Each of the best models
         # is added to the report generator for later output
+        if self.__manager.getTableCacheLimit() <= 0:
+            self.__manager.setTableCacheLimit(tableCacheLimit)
         if self.__HTMLFormat: print '<pre>'
         print "Searching levels:"
         start_time = time.time()
@@ -430,25 +476,35 @@ class ocUtils:
             print '%.1f seconds, %.1f total' % (current_time - last_time, current_time - start_time)
             sys.stdout.flush()
             last_time = current_time
+            groups = 0
+            if not self.__NoIPF:
+                groups |= occam.L2_STATISTICS | occam.DEPENDENT_STATISTICS
+            if self.__BPStatistics:
+                groups |= occam.BP_STATISTICS
+            if self.__PercentCorrect:
+                groups |= occam.PERCENT_CORRECT
+            if self.__PearsonStatistics:
+                groups |= occam.PEARSON_STATISTICS
+            if self.__IncrementalAlpha:
+                groups |= occam.INCREMENTAL_ALPHA
             for model in newModels:
                 # Make sure all statistics are calculated. This won't do anything if we did it already.
-                if not self.__NoIPF:
-                    self.__manager.computeL2Statistics(model)
-                    self.__manager.computeDependentStatistics(model)
-                if self.__BPStatistics:
-                    self.__manager.computeBPStatistics(model)
-                if self.__PercentCorrect:
-                    self.__manager.computePercentCorrect(model)
-                if self.__IncrementalAlpha:
-                    self.__manager.computeIncrementalAlpha(model)
+                # They are computed together, so the model is fit only once.
+                self.__manager.computeModelStatistics(model, groups)
                 self.__nextID += 1
                 model.setID(self.__nextID)
                 #model.deleteFitTable()  #recover fit table memory
                 self.__report.addModel(model)
+            # the fits kept for warm-starting IPF (see "ipf-warm-start") are only needed
+            # for the next level
+            for model in oldModels:
+                model.deleteFitTable()
             oldModels = newModels
             # if the list is empty, stop. Also, only do one step for chain search
             if self.__searchFilter == "chain" or len(oldModels) == 0:
                 break
+        for model in oldModels:
+            model.deleteFitTable()
         if self.__HTMLFormat: print '</pre><br>'
         else: print ""
 
@@ -476,12 +532,14 @@ class ocUtils:
             self.__manager.setSearchDirection(0)
         if printOptions: self.printOptions(1)
         self.__manager.printBasicStatistics()
-        self.__manager.computeL2Statistics(start)
-        self.__manager.computeDependentStatistics(start)
+        groups = occam.L2_STATISTICS | occam.DEPENDENT_STATISTICS
         if self.__PercentCorrect and self.__manager.isDirected():
-            self.__manager.computePercentCorrect(start)
+            groups |= occam.PERCENT_CORRECT
+        if self.__PearsonStatistics:
+            groups |= occam.PEARSON_STATISTICS
         if self.__IncrementalAlpha:
-            self.__manager.computeIncrementalAlpha(start)
+            groups |= occam.INCREMENTAL_ALPHA
+        self.__manager.computeModelStatistics(start, groups)
         start.level = 0
         self.__report.addModel(start)
         self.__nextID = 1
@@ -493,6 +551,8 @@ class ocUtils:
         except:
             print "ERROR: UNDEFINED SEARCH TYPE " + self.sbSearchType()
             return
+        if self.__manager.getTableCacheLimit() <= 0:
+            self.__manager.setTableCacheLimit(tableCacheLimit)
         if self.__HTMLFormat: print '<pre>'
         print "Searching levels:"
         start_time = time.time()
@@ -506,17 +566,21 @@ class ocUtils:
             current_time = time.time()
             print '%.1f seconds, %.1f total' % (current_time - last_time, current_time - start_time)
             last_time = current_time
+            groups = 0
+            if not self.__NoIPF:
+                groups |= occam.L2_STATISTICS | occam.DEPENDENT_STATISTICS
+            if self.__BPStatistics:
+                groups |= occam.BP_STATISTICS
+            if self.__PercentCorrect:
+                groups |= occam.PERCENT_CORRECT
+            if self.__PearsonStatistics:
+                groups |= occam.PEARSON_STATISTICS
+            if self.__IncrementalAlpha:
+                groups |= occam.INCREMENTAL_ALPHA
             for model in newModels:
                 # Make sure all statistics are calculated. This won't do anything if we did it already.
-                if not self.__NoIPF:
-                    self.__manager.computeL2Statistics(model)
-                    self.__manager.computeDependentStatistics(model)
-                if self.__BPStatistics:
-                    self.__manager.computeBPStatistics(model)
-                if self.__PercentCorrect:
-                    self.__manager.computePercentCorrect(model)
-                if self.__IncrementalAlpha:
-                    self.__manager.computeIncrementalAlpha(model)
+                # They are computed together, so the model is fit only once.
+                self.__manager.computeModelStatistics(model, groups)
                 self.__nextID += 1
                 model.setID(self.__nextID)
                 model.deleteFitTable()  #recover fit table memory
@@ -802,6 +866,9 @@ class ocUtils:
         option = self.__manager.getOption("optimize-search-width")
         if option != "":
             self.__searchWidth = int(float(option))
+        option = self.__manager.getOption("search-threads")
+        if option != "":
+            self.setSearchThreads(option)
         option = self.__manager.getOption("reference-model")
         if option != "":
             self.__refModel = option
@@ -50,7 +50,7 @@ util.initFromCommandLine(sys.argv[0:2])	# initialize with the data file
 # h, t, df, ddf, loops [1=loops, 0=no loops]
 # information, unexplained, ipf_iterations, lr, alpha, beta, level, aic, bic
 # cond_h, cond_dh, cond_pct_dh, cond_df, cond_ddf, p2, p2_alpha, p2_beta
-# (Note that the Pearson statistics aren't computed by default because they are expensive.)
+# (Note that the Pearson statistics are only computed if one of them is listed, since they need a fit of each model.)
 # To force a particular attribute to be printed as an integer, append "$I" to the name (e.g., Level$I)
 
 # Set separator between report fields.  [1=tab, 2=comma, 3=space fill, 4=HTML]
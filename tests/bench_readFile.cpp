@@ -0,0 +1,218 @@
+// tests/bench_readFile.cpp
+// Benchmark for reading a data file: LineReader, which reads the file in large blocks and
+// splits it into lines in its buffer, against the fgetc loop it replaced, and the time for
+// ocReadFile to load the whole file, with one thread and with several. The file has 20
+// variables, no frequencies, and a comment every 1000 lines; most values first appear in
+// the second half of the file.
+//
+// usage: bench_readFile [lines...]   (default: 1000000 4000000)
+#include <chrono>
+#include <cctype>
+#include <cstdio>
+#include <cstdlib>
+#include <cstring>
+#include <random>
+#include <thread>
+#include <unistd.h>
+#include "../include/Key.h"
+#include "../include/Input.h"
+#include "../include/Options.h"
+#include "../include/Table.h"
+#include "../include/VariableList.h"
+
+// the previous implementation of Options::getLine (the trim here is Options.cpp's)
+static void trim(char *line) {
+    char *cp1, *cp2;
+    if ((cp2 = strchr(line, '#')) != NULL)
+        *cp2 = '\0';
+    cp1 = cp2 = line;
+    while (*cp2 && isspace(*cp2))
+        cp2++;
+    if (cp1 != cp2) {
+        while (*cp2)
+            (*cp1++) = (*cp2++);
+        *cp1 = '\0';
+    }
+    cp1 = line + strlen(line);
+    while (cp1 > line && isspace(*(--cp1)))
+        *cp1 = '\0';
+}
+
+static bool oldGetLine(FILE *fd, char *line, int *lineno) {
+    int count;
+    char current;
+    line[0] = '\0';
+    while (true) {
+        count = 0;
+        while (count < MAXLINE) {
+            current = (char) fgetc(fd);
+            if ((count == 0) && feof(fd))
+                break;
+            if ((current == '\r') || (current == '\n') || feof(fd)) {
+                line[count++] = '\n';
+                break;
+            } else if (current == '#') {
+                while ((current != '\r') && (current != '\n') && !feof(fd))
+                    current = (char) fgetc(fd);
+                if (count == 0)
+                    continue;
+                line[count++] = '\n';
+                break;
+            } else {
+                line[count++] = current;
+            }
+        }
+        if (count > 0) {
+            line[count++] = '\0';
+            (*lineno)++;
+            trim(line);
+            if (line[0] == '\0' || line[0] == '\n')
+                continue;
+            return true;
+        } else
+            break;
+    }
+    return false;
+}
+
+static double seconds(std::chrono::steady_clock::time_point start) {
+    return std::chrono::duration<double>(std::chrono::steady_clock::now() - start).count();
+}
+
+//-- a checksum of the lines, to compare the readers
+static unsigned long long hashLine(unsigned long long hash, const char *line) {
+    for (; *line; line++)
+        hash = (hash ^ (unsigned char) *line) * 1099511628211ULL;
+    return hash * 31;
+}
+
+//-- read the file with ocReadFile, on the given number of threads
+static Table *readFile(const char *fileName, int threads, VariableList **vars, long *dataLines) {
+    FILE *fd = fopen(fileName, "r");
+    Options options;
+    options.addOptionName("action", "", "", false);
+    options.addOptionValue(options.findOptionByName("action"), "$", "");
+    options.addOptionName("nominal", "", "", true);
+    options.addOptionValue(options.findOptionByName("nominal"), "$", "");
+    options.addOptionName("no-frequency", "", "", false);
+    options.addOptionName("read-threads", "", "", false);
+    options.addOptionValue(options.findOptionByName("read-threads"), "#", "");
+    options.setOptionFloat(options.findOptionByName("read-threads"), threads);
+    Table *input = NULL, *test = NULL;
+    *dataLines = ocReadFile(fd, &options, &input, &test, vars);
+    fclose(fd);
+    return input;
+}
+
+//-- check that two reads of the file gave the same tables and value indices
+static bool sameRead(Table *input1, VariableList *vars1, Table *input2, VariableList *vars2) {
+    if (input1->getTupleCount() != input2->getTupleCount())
+        return false;
+    for (long long i = 0; i < input1->getTupleCount(); i++) {
+        if (Key::compareKeys(input1->getKey(i), input2->getKey(i), input1->getKeySize()) != 0
+                || input1->getValue(i) != input2->getValue(i))
+            return false;
+    }
+    for (int v = 0; v < vars1->getVarCount(); v++) {
+        for (int k = 0; k < vars1->getVariable(v)->cardinality; k++) {
+            if (strcmp(vars1->getVarValue(v, k), vars2->getVarValue(v, k)) != 0)
+                return false;
+        }
+    }
+    return true;
+}
+
+int main(int argc, char **argv) {
+    long lineCounts[16] = { 1000000, 4000000 };
+    int countCount = 2;
+    if (argc > 1) {
+        countCount = argc - 1 < 16 ? argc - 1 : 16;
+        for (int i = 0; i < countCount; i++) lineCounts[i] = atol(argv[i + 1]);
+    }
+    const int varCount = 20;
+    char fileName[] = "/tmp/bench_readFileXXXXXX";
+    int tempFd = mkstemp(fileName);
+    if (tempFd < 0) {
+        printf("Error: can't create temporary file\n");
+        return 1;
+    }
+    close(tempFd);
+    static char line[MAXLINE + 1];
+    int threads = std::thread::hardware_concurrency();
+    if (threads < 4)
+        threads = 4;
+
+    std::mt19937 rng(12345);
+    printf("lines\tfgetc (s)\tLineReader (s)\tspeedup\tocReadFile (s)\t%d threads (s)\n", threads);
+    for (int ci = 0; ci < countCount; ci++) {
+        long lineCount = lineCounts[ci];
+        FILE *fd = fopen(fileName, "w");
+        fprintf(fd, ":action\nfit\n\n:no-frequency\n\n:nominal\n");
+        for (int v = 0; v < varCount; v++)
+            fprintf(fd, "v%d,%d,%d,%c\n", v, 2 + v % 4, v == 0 ? 2 : 1, 'A' + v);
+        fprintf(fd, "\n:data\n");
+        for (long l = 0; l < lineCount; l++) {
+            if (l % 1000 == 0)
+                fprintf(fd, "# block %ld\n", l / 1000);
+            for (int v = 0; v < varCount; v++) {
+                int cardinality = 2 + v % 4;
+                int value = (int) (rng() % (l < lineCount / 2 ? 2 : cardinality));
+                fprintf(fd, v ? " %d" : "%d", cardinality - 1 - value);
+            }
+            fputc('\n', fd);
+        }
+        fclose(fd);
+
+        int lineno = 0;
+        unsigned long long oldHash = 0, newHash = 0;
+        auto start = std::chrono::steady_clock::now();
+        fd = fopen(fileName, "r");
+        while (oldGetLine(fd, line, &lineno))
+            oldHash = hashLine(oldHash, line);
+        fclose(fd);
+        double oldTime = seconds(start);
+
+        lineno = 0;
+        start = std::chrono::steady_clock::now();
+        fd = fopen(fileName, "r");
+        {
+            LineReader reader(fd);
+            while (reader.getLine(line, &lineno))
+                newHash = hashLine(newHash, line);
+        }
+        fclose(fd);
+        double newTime = seconds(start);
+        if (oldHash != newHash) {
+            printf("Error: the readers' lines differ\n");
+            return 1;
+        }
+
+        long dataLines;
+        VariableList *vars = NULL;
+        start = std::chrono::steady_clock::now();
+        Table *input = readFile(fileName, 1, &vars, &dataLines);
+        double readTime = seconds(start);
+        if (dataLines != lineCount) {
+            printf("Error: read %ld data lines, not %ld\n", dataLines, lineCount);
+            return 1;
+        }
+
+        VariableList *threadVars = NULL;
+        start = std::chrono::steady_clock::now();
+        Table *threadInput = readFile(fileName, threads, &threadVars, &dataLines);
+        double threadTime = seconds(start);
+        if (dataLines != lineCount || !sameRead(input, vars, threadInput, threadVars)) {
+            printf("Error: the data read on %d threads differs\n", threads);
+            return 1;
+        }
+        printf("%ld\t%.3f\t%.3f\t%.1fx\t%.3f\t%.3f\n", lineCount, oldTime, newTime, oldTime / newTime, readTime,
+                threadTime);
+        fflush(stdout);
+        delete input;
+        delete vars;
+        delete threadInput;
+        delete threadVars;
+    }
+    unlink(fileName);
+    return 0;
+}
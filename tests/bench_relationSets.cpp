@@ -0,0 +1,248 @@
+// tests/bench_relationSets.cpp
+// Benchmark for the variable bitsets of Relation: ocHasLoops (GYO reduction on bitsets)
+// against the VarList-based version it replaced, and Relation::contains against
+// ocContainsVariables on the sorted variable lists. Half of the models are random
+// (nearly all have loops), half are trees of relations (no loops).
+//
+// usage: bench_relationSets [varcount...]   (default: 50 100 200)
+#include <chrono>
+#include <cstdio>
+#include <cstdlib>
+#include <cstring>
+#include <random>
+#include <vector>
+#include "../include/Math.h"
+#include "../include/Model.h"
+#include "../include/Relation.h"
+#include "../include/VariableList.h"
+#include "../include/_Core.h"
+
+// the previous implementation of ocHasLoops() for variable-based models
+struct VarList {
+        int varCount;
+        int *vars;
+        VarList() :
+                varCount(0), vars(0) {
+        }
+        ~VarList() {
+            if (vars)
+                delete[] vars;
+        }
+        void setVars(int *newVars) {
+            if (vars)
+                delete[] vars;
+            vars = newVars;
+        }
+};
+
+static void VLCopy(VarList &from, VarList &to) {
+    if (to.varCount < from.varCount) {
+        to.setVars(new int[from.varCount]);
+    }
+    to.varCount = from.varCount;
+    if (to.varCount > 0)
+        memcpy(to.vars, from.vars, to.varCount * sizeof(int));
+}
+
+static void VLComplement(VarList &v1, VarList &v2) {
+    if (v1.varCount == 0 || v1.varCount == 0)
+        return;
+    int *newvars = new int[v1.varCount];
+    int count = 0, i, j;
+    for (i = 0; i < v1.varCount; i++) {
+        for (j = 0; j < v2.varCount; j++) {
+            if (v2.vars[j] == v1.vars[i])
+                break;
+        }
+        if (j >= v2.varCount) {
+            newvars[count++] = v1.vars[i];
+        }
+    }
+    v1.setVars(newvars);
+    v1.varCount = count;
+}
+
+static bool VLContains(VarList &v1, VarList &v2) {
+    if (v1.varCount < v2.varCount)
+        return false;
+    return ocContainsVariables(v1.varCount, v1.vars, v2.varCount, v2.vars);
+}
+
+static bool varListHasLoops(Model *model) {
+    int i, j, relcount;
+    relcount = model->getRelationCount();
+    VarList *rels = new VarList[relcount];
+    for (i = 0; i < relcount; i++) {
+        Relation *relation = model->getRelation(i);
+        rels[i].varCount = relation->getVariableCount();
+        rels[i].setVars(new int[rels[i].varCount]);
+        relation->copyVariables(rels[i].vars, rels[i].varCount);
+    }
+    for (;;) {
+        bool change = false;
+        for (i = 0; i < relcount; i++) {
+            VarList newList;
+            VLCopy(rels[i], newList);
+            for (j = 0; j < relcount; j++) {
+                if (j != i)
+                    VLComplement(newList, rels[j]);
+            }
+            if (newList.varCount > 0) {
+                VLComplement(rels[i], newList);
+                change = true;
+            }
+        }
+        for (i = 0; i < relcount; i++) {
+            for (j = 0; j < relcount; j++) {
+                if (i != j && rels[i].varCount > 0 && rels[j].varCount > 0 && VLContains(rels[i], rels[j])) {
+                    change = true;
+                    rels[j].varCount = 0;
+                }
+            }
+        }
+        if (!change)
+            break;
+    }
+    int remaining = 0;
+    for (i = 0; i < relcount; i++) {
+        if (rels[i].varCount > 0)
+            remaining++;
+    }
+    delete[] rels;
+    return remaining > 1;
+}
+
+static double seconds(std::chrono::steady_clock::time_point start) {
+    return std::chrono::duration<double>(std::chrono::steady_clock::now() - start).count();
+}
+
+static Relation *makeRelation(VariableList *vars, std::vector<int> &relVars, std::vector<Relation*> &all) {
+    Relation *rel = new Relation(vars, relVars.size());
+    Relation::sort(relVars.data(), relVars.size());
+    for (size_t k = 0; k < relVars.size(); k++)
+        rel->addVariable(relVars[k]);
+    all.push_back(rel);
+    return rel;
+}
+
+int main(int argc, char **argv) {
+    int varCounts[16] = { 50, 100, 200 };
+    int countCount = 3;
+    if (argc > 1) {
+        countCount = argc - 1 < 16 ? argc - 1 : 16;
+        for (int i = 0; i < countCount; i++) varCounts[i] = atoi(argv[i + 1]);
+    }
+    const int modelCount = 200;
+    const int passes = 5;
+
+    std::mt19937 rng(12345);
+    printf("vars\tmodels\tloops\tVarList loops (s)\tbitset loops (s)\tspeedup\tint contains (s)\tbitset contains (s)\tspeedup\n");
+    for (int ci = 0; ci < countCount; ci++) {
+        int varCount = varCounts[ci];
+        VariableList vars(varCount);
+        char name[16], abbrev[16];
+        for (int v = 0; v < varCount; v++) {
+            snprintf(name, sizeof(name), "v%d", v);
+            snprintf(abbrev, sizeof(abbrev), "%c%c", 'A' + v / 26 % 26, 'a' + v % 26);
+            vars.addVariable(name, abbrev, 2);
+        }
+
+        std::vector<Relation*> all;
+        std::vector<Model*> models;
+        for (int m = 0; m < modelCount; m++) {
+            Model *model = new Model(varCount);
+            std::vector<int> relVars;
+            if (m % 2 == 0) {
+                //-- random relations of 2 to 5 variables
+                for (int r = 0; r < varCount / 3; r++) {
+                    relVars.clear();
+                    int size = 2 + rng() % 4;
+                    while ((int) relVars.size() < size) {
+                        int v = rng() % varCount;
+                        bool found = false;
+                        for (size_t k = 0; k < relVars.size(); k++) found = found || relVars[k] == v;
+                        if (!found) relVars.push_back(v);
+                    }
+                    model->addRelation(makeRelation(&vars, relVars, all), false);
+                }
+            } else {
+                //-- a tree: each new variable joins one or two variables of an earlier relation
+                relVars.push_back(0);
+                relVars.push_back(1);
+                std::vector<Relation*> tree(1, makeRelation(&vars, relVars, all));
+                for (int v = 2; v < varCount; v++) {
+                    Relation *parent = tree[rng() % tree.size()];
+                    relVars.clear();
+                    relVars.push_back(v);
+                    int first = rng() % parent->getVariableCount();
+                    relVars.push_back(parent->getVariable(first));
+                    if (rng() % 2)
+                        relVars.push_back(parent->getVariable((first + 1) % parent->getVariableCount()));
+                    tree.push_back(makeRelation(&vars, relVars, all));
+                }
+                for (Relation *rel : tree)
+                    model->addRelation(rel, false);
+            }
+            models.push_back(model);
+        }
+
+        auto start = std::chrono::steady_clock::now();
+        int oldLoops = 0;
+        for (int p = 0; p < passes; p++)
+            for (Model *model : models) oldLoops += varListHasLoops(model);
+        double oldTime = seconds(start);
+
+        start = std::chrono::steady_clock::now();
+        int newLoops = 0;
+        for (int p = 0; p < passes; p++)
+            for (Model *model : models) newLoops += ocHasLoops(model);
+        double newTime = seconds(start);
+
+        for (Model *model : models) {
+            if (varListHasLoops(model) != ocHasLoops(model)) {
+                printf("Error: loop checks differ for model %s\n", model->getPrintName());
+                return 1;
+            }
+        }
+
+        //-- containment, for every ordered pair of relations in each model
+        start = std::chrono::steady_clock::now();
+        long oldContains = 0;
+        for (Model *model : models) {
+            int relCount = model->getRelationCount();
+            for (int i = 0; i < relCount; i++) {
+                Relation *rel1 = model->getRelation(i);
+                for (int j = 0; j < relCount; j++) {
+                    Relation *rel2 = model->getRelation(j);
+                    oldContains += ocContainsVariables(rel1->getVariableCount(), rel1->getVariables(),
+                            rel2->getVariableCount(), rel2->getVariables());
+                }
+            }
+        }
+        double oldContainsTime = seconds(start);
+
+        start = std::chrono::steady_clock::now();
+        long newContains = 0;
+        for (Model *model : models) {
+            int relCount = model->getRelationCount();
+            for (int i = 0; i < relCount; i++) {
+                Relation *rel1 = model->getRelation(i);
+                for (int j = 0; j < relCount; j++)
+                    newContains += rel1->contains(model->getRelation(j));
+            }
+        }
+        double newContainsTime = seconds(start);
+        if (oldContains != newContains) {
+            printf("Error: containment checks differ (%ld, %ld)\n", oldContains, newContains);
+            return 1;
+        }
+
+        printf("%d\t%d\t%d\t%.3f\t%.3f\t%.1fx\t%.3f\t%.3f\t%.1fx\n", varCount, modelCount, newLoops / passes,
+                oldTime, newTime, oldTime / newTime, oldContainsTime, newContainsTime,
+                oldContainsTime / newContainsTime);
+        fflush(stdout);
+        for (Model *model : models) delete model;
+        for (Relation *rel : all) delete rel;
+    }
+    return 0;
+}
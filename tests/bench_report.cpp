@@ -0,0 +1,131 @@
+// tests/bench_report.cpp
+// Benchmark for the fit reports of a model of many cells: looking up the fit value of each
+// input tuple with Table::getMatchingValues (the tables stepped through together, in key
+// order), against the indexOf per tuple it replaced, and the time to write the residuals
+// and conditional DV tables to /dev/null. The data has 12 variables of 3 values, with no
+// frequencies; the last is the DV for the conditional DV table, and the residuals are for
+// the same data, taken as neutral.
+//
+// usage: bench_report [lines...]   (default: 200000 1000000)
+#include <chrono>
+#include <cstdio>
+#include <cstdlib>
+#include <random>
+#include <unistd.h>
+#include "../include/Model.h"
+#include "../include/Report.h"
+#include "../include/Table.h"
+#include "../include/VBMManager.h"
+
+static double seconds(std::chrono::steady_clock::time_point start) {
+    return std::chrono::duration<double>(std::chrono::steady_clock::now() - start).count();
+}
+
+static const int varCount = 12;
+
+//-- write the data file, the last variable the DV if directed; the data depends only on the seed
+static void writeData(const char *fileName, long lineCount, bool directed, unsigned seed) {
+    std::mt19937 rng(seed);
+    FILE *fd = fopen(fileName, "w");
+    fprintf(fd, ":action\nfit\n\n:no-frequency\n\n:nominal\n");
+    for (int v = 0; v < varCount; v++) {
+        bool dv = directed && v == varCount - 1;
+        fprintf(fd, "v%d,3,%d,%c\n", v, dv ? 2 : 1, dv ? 'Z' : 'A' + v);
+    }
+    fprintf(fd, "\n:data\n");
+    for (long l = 0; l < lineCount; l++) {
+        //-- the last variable follows the first, mostly
+        int first = (int) (rng() % 3);
+        for (int v = 0; v < varCount; v++) {
+            int value = v == 0 ? first : (v == varCount - 1 && rng() % 4) ? first : (int) (rng() % 3);
+            fprintf(fd, v ? " %d" : "%d", value);
+        }
+        fputc('\n', fd);
+    }
+    fclose(fd);
+}
+
+//-- read the data file, and make the fit table of the model
+static VBMManager *fitModel(const char *program, char *fileName, const char *modelName, Model **model) {
+    VBMManager *mgr = new VBMManager();
+    char *args[] = { (char *) program, fileName };
+    mgr->initFromCommandLine(2, args);
+    mgr->setRefModel("bottom");
+    *model = mgr->makeModel(modelName, true);
+    mgr->makeFitTable(*model);
+    return mgr;
+}
+
+int main(int argc, char **argv) {
+    long lineCounts[16] = { 200000, 1000000 };
+    int countCount = 2;
+    if (argc > 1) {
+        countCount = argc - 1 < 16 ? argc - 1 : 16;
+        for (int i = 0; i < countCount; i++) lineCounts[i] = atol(argv[i + 1]);
+    }
+    char fileName[] = "/tmp/bench_reportXXXXXX";
+    int tempFd = mkstemp(fileName);
+    if (tempFd < 0) {
+        printf("Error: can't create temporary file\n");
+        return 1;
+    }
+    close(tempFd);
+    FILE *null = fopen("/dev/null", "w");
+
+    printf("lines\tcells\tindexOf (s)\tmatching (s)\tspeedup\tresiduals (s)\tconditional DV (s)\n");
+    for (int ci = 0; ci < countCount; ci++) {
+        long lineCount = lineCounts[ci];
+        Model *model;
+        writeData(fileName, lineCount, false, 12345 + ci);
+        VBMManager *mgr = fitModel(argv[0], fileName, "ABCDEFL:GHIJKL", &model);
+        Table *input = mgr->getInputData();
+        Table *fit = mgr->getFitTable();
+        long long tupleCount = input->getTupleCount();
+
+        double *oldValues = new double[tupleCount];
+        auto start = std::chrono::steady_clock::now();
+        for (long long i = 0; i < tupleCount; i++) {
+            long long index = fit->indexOf(input->getKey(i), true);
+            oldValues[i] = index == -1 ? 0.0 : fit->getValue(index);
+        }
+        double oldTime = seconds(start);
+
+        double *values = new double[tupleCount];
+        start = std::chrono::steady_clock::now();
+        fit->getMatchingValues(input, values);
+        double newTime = seconds(start);
+        for (long long i = 0; i < tupleCount; i++) {
+            if (values[i] != oldValues[i]) {
+                printf("Error: the values differ at %lld\n", i);
+                return 1;
+            }
+        }
+
+        Report *report = new Report(mgr);
+        report->setSeparator(3);
+        start = std::chrono::steady_clock::now();
+        report->printResiduals(null, model, false, false);
+        double residualsTime = seconds(start);
+        delete report;
+        delete mgr;
+
+        writeData(fileName, lineCount, true, 12345 + ci);
+        mgr = fitModel(argv[0], fileName, "IV:ABCDEFZ:GHIJKZ", &model);
+        report = new Report(mgr);
+        report->setSeparator(3);
+        start = std::chrono::steady_clock::now();
+        report->printConditional_DV(null, model, false, (char *) "");
+        double conditionalTime = seconds(start);
+
+        printf("%ld\t%lld\t%.3f\t%.3f\t%.1fx\t%.3f\t%.3f\n", lineCount, tupleCount, oldTime, newTime,
+                oldTime / newTime, residualsTime, conditionalTime);
+        fflush(stdout);
+        delete[] oldValues;
+        delete[] values;
+        delete report;
+        delete mgr;
+    }
+    fclose(null);
+    unlink(fileName);
+    return 0;
+}
@@ -0,0 +1,158 @@
+// tests/bench_reportSort.cpp
+// Benchmark for Report::sort on many models, with attribute names interned to IDs, against
+// the AttributeList it replaced (a linear scan of the names, comparing them without case,
+// after copying the name to strip any "$" formatting). Each model gets the attributes a
+// search gives it, in the same order.
+//
+// usage: bench_reportSort [modelcount...]   (default: 100000)
+#include <chrono>
+#include <cstdio>
+#include <cstdlib>
+#include <cstring>
+#include <random>
+#include <vector>
+#include "../include/AttributeList.h"
+#include "../include/Constants.h"
+#include "../include/Model.h"
+#include "../include/Report.h"
+
+// the previous implementation of AttributeList
+class OldAttributeList {
+    public:
+        OldAttributeList(int size) {
+            attrCount = 0;
+            maxAttrCount = size;
+            names = new const char*[maxAttrCount];
+            values = new double[maxAttrCount];
+        }
+        ~OldAttributeList() {
+            delete[] names;
+            delete[] values;
+        }
+        void setAttribute(const char *name, double value) {
+            int index = findName(name);
+            if (index >= 0) {
+                values[index] = value;
+                return;
+            }
+            if (attrCount >= maxAttrCount) {
+                const char **newNames = new const char*[maxAttrCount * 2];
+                double *newValues = new double[maxAttrCount * 2];
+                memcpy(newNames, names, attrCount * sizeof(char*));
+                memcpy(newValues, values, attrCount * sizeof(double));
+                delete[] names;
+                delete[] values;
+                names = newNames;
+                values = newValues;
+                maxAttrCount *= 2;
+            }
+            names[attrCount] = name;
+            values[attrCount++] = value;
+        }
+        double getAttribute(const char *name) {
+            int index = findName(name);
+            return (index >= 0) ? values[index] : -1.0;
+        }
+
+    private:
+        int findName(const char *name) {
+            const char *cp = strchr(name, '$');
+            int len = (cp == 0) ? strlen(name) : cp - name;
+            char *name2 = new char[len + 1];
+            strncpy(name2, name, len);
+            name2[len] = '\0';
+            int match = -1;
+            for (int i = 0; i < attrCount; i++) {
+                if (strcasecmp(name2, names[i]) == 0) {
+                    match = i;
+                    break;
+                }
+            }
+            delete[] name2;
+            return match;
+        }
+        const char **names;
+        double *values;
+        int attrCount;
+        int maxAttrCount;
+};
+
+// the previous comparison of Report::sort, for a descending sort during an ascending search
+static const char *oldSortAttr;
+static int oldSortCompare(const void *k1, const void *k2) {
+    OldAttributeList *m1 = *((OldAttributeList**) k1);
+    OldAttributeList *m2 = *((OldAttributeList**) k2);
+    double a1 = m1->getAttribute(oldSortAttr);
+    double a2 = m2->getAttribute(oldSortAttr);
+    double l1 = m1->getAttribute("Level");
+    double l2 = m2->getAttribute("Level");
+    int levelPref = (l1 > l2) ? -1 : (l1 < l2) ? 1 : 0;
+    return (a1 > a2) ? -1 : (a1 < a2) ? 1 : levelPref;
+}
+
+static double seconds(std::chrono::steady_clock::time_point start) {
+    return std::chrono::duration<double>(std::chrono::steady_clock::now() - start).count();
+}
+
+int main(int argc, char **argv) {
+    long modelCounts[16] = { 100000 };
+    int countCount = 1;
+    if (argc > 1) {
+        countCount = argc - 1 < 16 ? argc - 1 : 16;
+        for (int i = 0; i < countCount; i++) modelCounts[i] = atol(argv[i + 1]);
+    }
+    //-- the attributes set on a model during a search, in about the order they are set
+    const char *attrNames[] = { ATTRIBUTE_PROCESSED, ATTRIBUTE_LEVEL, ATTRIBUTE_DF, ATTRIBUTE_ALG_H,
+            ATTRIBUTE_H, ATTRIBUTE_LOOPS, ATTRIBUTE_T, ATTRIBUTE_EXPLAINED_I, ATTRIBUTE_UNEXPLAINED_I,
+            ATTRIBUTE_DDF, ATTRIBUTE_LR, ATTRIBUTE_ALPHA, ATTRIBUTE_BETA, ATTRIBUTE_AIC, ATTRIBUTE_BIC,
+            ATTRIBUTE_COND_H, ATTRIBUTE_COND_DH, ATTRIBUTE_COND_PCT_DH, ATTRIBUTE_INCR_ALPHA,
+            ATTRIBUTE_PROG_ID, ATTRIBUTE_PCT_CORRECT_DATA, ATTRIBUTE_PCT_COVERAGE };
+    const int attrCount = sizeof(attrNames) / sizeof(attrNames[0]);
+    const char *sortNames[] = { ATTRIBUTE_EXPLAINED_I, ATTRIBUTE_BIC, "ddf$I" };
+
+    std::mt19937 rng(12345);
+    printf("models\tattribute\told sort (s)\tnew sort (s)\tspeedup\n");
+    for (int ci = 0; ci < countCount; ci++) {
+        long modelCount = modelCounts[ci];
+        std::vector<Model*> models(modelCount);
+        std::vector<OldAttributeList*> oldModels(modelCount);
+        for (long m = 0; m < modelCount; m++) {
+            models[m] = new Model(1);
+            oldModels[m] = new OldAttributeList(6);
+            for (int a = 0; a < attrCount; a++) {
+                //-- few distinct values, so ties are broken by level
+                double value = a == 1 ? (double) (rng() % 8) : (double) (rng() % 1000) / 10;
+                models[m]->setAttribute(attrNames[a], value);
+                oldModels[m]->setAttribute(attrNames[a], value);
+            }
+        }
+        for (const char *sortName : sortNames) {
+            std::vector<Model*> sorted(models);
+            std::vector<OldAttributeList*> oldSorted(oldModels);
+
+            auto start = std::chrono::steady_clock::now();
+            oldSortAttr = sortName;
+            qsort(oldSorted.data(), modelCount, sizeof(OldAttributeList*), oldSortCompare);
+            double oldTime = seconds(start);
+
+            start = std::chrono::steady_clock::now();
+            Report::sort(sorted.data(), modelCount, sortName, Direction::Descending);
+            double newTime = seconds(start);
+
+            for (long m = 0; m < modelCount; m++) {
+                if (sorted[m]->getAttribute(sortName) != oldSorted[m]->getAttribute(sortName)
+                        || sorted[m]->getAttribute("Level") != oldSorted[m]->getAttribute("Level")) {
+                    printf("Error: sorts differ at %ld for %s\n", m, sortName);
+                    return 1;
+                }
+            }
+            printf("%ld\t%s\t%.3f\t%.3f\t%.1fx\n", modelCount, sortName, oldTime, newTime, oldTime / newTime);
+            fflush(stdout);
+        }
+        for (long m = 0; m < modelCount; m++) {
+            delete models[m];
+            delete oldModels[m];
+        }
+    }
+    return 0;
+}
@@ -0,0 +1,98 @@
+// tests/bench_tableSort.cpp
+// Benchmark for Table::sort, comparing it against the qsort-based sort it replaced.
+// Each table looks like a projection: random data over 40 variables, projected onto
+// a subset of them (the other variables are DONT_CARE in every key).
+//
+// usage: bench_tableSort [tuples...]   (default: 100000 1000000 10000000)
+#include <chrono>
+#include <cstdio>
+#include <cstdlib>
+#include <cstring>
+#include <random>
+#include "../include/Key.h"
+#include "../include/Table.h"
+#include "../include/VariableList.h"
+
+static int qsortKeySize;
+static int qsortCompare(const void *k1, const void *k2) {
+    return Key::compareKeys((KeySegment *)k1, (KeySegment *)k2, qsortKeySize);
+}
+
+// the previous implementation of Table::sort(), working on a copy of the tuples
+static void qsortTable(Table *table, char *tuples, size_t tupleBytes) {
+    long long count = table->getTupleCount();
+    int keysize = table->getKeySize();
+    for (long long i = 0; i < count; i++) {
+        memcpy(tuples + i * tupleBytes, table->getKey(i), keysize * sizeof(KeySegment));
+        double value = table->getValue(i);
+        memcpy(tuples + i * tupleBytes + keysize * sizeof(KeySegment), &value, sizeof(double));
+    }
+    qsortKeySize = keysize;
+    qsort(tuples, count, tupleBytes, qsortCompare);
+}
+
+static double seconds(std::chrono::steady_clock::time_point start) {
+    return std::chrono::duration<double>(std::chrono::steady_clock::now() - start).count();
+}
+
+int main(int argc, char **argv) {
+    const int varCount = 40;
+    VariableList vars(varCount);
+    char name[16], abbrev[16];
+    for (int v = 0; v < varCount; v++) {
+        snprintf(name, sizeof(name), "v%d", v);
+        snprintf(abbrev, sizeof(abbrev), "%c%c", 'A' + v / 26, 'a' + v % 26);
+        vars.addVariable(name, abbrev, 3 + v % 3);
+    }
+    int keysize = vars.getKeySize();
+    size_t tupleBytes = keysize * sizeof(KeySegment) + sizeof(double);
+
+    long long sizes[16] = { 100000, 1000000, 10000000 };
+    int sizeCount = 3;
+    if (argc > 1) {
+        sizeCount = argc - 1 < 16 ? argc - 1 : 16;
+        for (int i = 0; i < sizeCount; i++) sizes[i] = atoll(argv[i + 1]);
+    }
+    int projVarCounts[] = { 8, 16, 32 };
+
+    std::mt19937 rng(12345);
+    KeySegment *key = new KeySegment[keysize];
+    int indices[varCount], values[varCount];
+    printf("tuples\tproj vars\tqsort (s)\tTable::sort (s)\tspeedup\n");
+    for (int si = 0; si < sizeCount; si++) {
+        long long n = sizes[si];
+        char *tuples = new char[n * tupleBytes];
+        for (int projVars : projVarCounts) {
+            // every other variable, then fill in from the start
+            int count = 0;
+            for (int v = 0; v < varCount && count < projVars; v += 2) indices[count++] = v;
+            for (int v = 1; v < varCount && count < projVars; v += 2) indices[count++] = v;
+            Table table(keysize, n);
+            for (long long i = 0; i < n; i++) {
+                for (int j = 0; j < count; j++) values[j] = rng() % vars.getVariable(indices[j])->cardinality;
+                Key::buildKey(key, keysize, &vars, indices, values, count);
+                table.addTuple(key, 1.0);
+            }
+
+            auto start = std::chrono::steady_clock::now();
+            qsortTable(&table, tuples, tupleBytes);
+            double qsortTime = seconds(start);
+
+            start = std::chrono::steady_clock::now();
+            table.sort();
+            double sortTime = seconds(start);
+
+            for (long long i = 0; i < n; i++) {
+                if (Key::compareKeys(table.getKey(i), (KeySegment *)(tuples + i * tupleBytes), keysize) != 0) {
+                    printf("Error: sorted tables differ at tuple %lld\n", i);
+                    return 1;
+                }
+            }
+            printf("%lld\t%d\t%.3f\t%.3f\t%.1fx\n", n, projVars, qsortTime, sortTime, qsortTime / sortTime);
+            fflush(stdout);
+        }
+        delete[] tuples;
+    }
+    delete[] key;
+    return 0;
+}
@@ -0,0 +1,73 @@
+#include <gtest/gtest.h>
+#include <cstdio>
+#include <string>
+#include <vector>
+#include "../include/Constants.h"
+#include "../include/Model.h"
+#include "../include/SearchBase.h"
+#include "../include/VBMManager.h"
+
+// Run a full-up search of the given data, fitting each level's models on the given number
+// of threads, and return a line for every model found: its level, name, and statistics.
+static std::vector<std::string> runSearch(const char *fileName, int threads, int levels, long width) {
+    std::vector<std::string> lines;
+    VBMManager *mgr = new VBMManager();
+    char *args[] = { (char *) "test_fitModels", (char *) fileName };
+    mgr->initFromCommandLine(2, args);
+    mgr->setSearch("full-up");
+    mgr->setRefModel("bottom");
+    mgr->setSortAttr("information");
+    mgr->setSearchDirection(Direction::Ascending);
+    Model *start = mgr->getBottomRefModel();
+    mgr->computeL2Statistics(start);
+    mgr->computeDependentStatistics(start);
+
+    std::vector<Model*> kept(1, start);
+    char line[1000];
+    for (int level = 1; level <= levels; level++) {
+        std::vector<Model*> next;
+        for (size_t k = 0; k < kept.size(); k++) {
+            Model **models = mgr->getSearch()->search(kept[k]);
+            if (models == NULL)
+                continue;
+            long count = 0;
+            while (models[count])
+                count++;
+            for (long i = 0; i < count; i++) {
+                if (models[i]->getProgenitor() == NULL)
+                    models[i]->setProgenitor(kept[k]);
+            }
+            mgr->fitModels(models, count, threads);
+            for (long i = 0; i < count; i++) {
+                mgr->computeInformationStatistics(models[i]);
+                snprintf(line, sizeof(line), "%d %s %.12g %.12g", level, models[i]->getPrintName(),
+                        models[i]->getAttribute(ATTRIBUTE_H), models[i]->getAttribute(ATTRIBUTE_EXPLAINED_I));
+                lines.push_back(line);
+            }
+            long best[width];
+            long bestCount = mgr->selectBest(models, count, width, "information", Direction::Descending, best);
+            for (long b = 0; b < bestCount; b++)
+                next.push_back(models[best[b]]);
+            delete[] models;
+        }
+        kept = next;
+    }
+    delete mgr;
+    return lines;
+}
+
+// A search fitting its models on several threads finds the same models, with the same
+// statistics, as one fitting them on one thread.
+TEST(FitModelsTest, ThreadsMatchSingleThread) {
+    std::vector<std::string> single = runSearch("./examples/bw21t08.in", 1, 3, 3);
+    std::vector<std::string> threaded = runSearch("./examples/bw21t08.in", 4, 3, 3);
+    ASSERT_FALSE(single.empty());
+    ASSERT_EQ(single.size(), threaded.size());
+    for (size_t i = 0; i < single.size(); i++)
+        EXPECT_EQ(single[i], threaded[i]);
+}
+
+int main(int argc, char **argv) {
+    ::testing::InitGoogleTest(&argc, argv);
+    return RUN_ALL_TESTS();
+}
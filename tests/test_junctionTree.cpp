@@ -0,0 +1,59 @@
+#include <gtest/gtest.h>
+#include "../include/Constants.h"
+#include "../include/Model.h"
+#include "../include/VBMManager.h"
+
+struct FitResult {
+    double h, lr, iterations;
+};
+
+// Fit the model of the data, with the given IPF options, and return its statistics.
+static FitResult fitModel(const char *fileName, const char *modelName, const char *junctionTree,
+        const char *maxDev) {
+    VBMManager *mgr = new VBMManager();
+    char *args[4] = { (char *) "test_junctionTree" };
+    int argc = 1;
+    if (junctionTree)
+        args[argc++] = (char *) junctionTree;
+    if (maxDev)
+        args[argc++] = (char *) maxDev;
+    args[argc++] = (char *) fileName;
+    mgr->initFromCommandLine(argc, args);
+    mgr->setRefModel("bottom");
+    Model *model = mgr->makeModel(modelName, true);
+    mgr->computeL2Statistics(model);
+    FitResult result = { model->getAttribute(ATTRIBUTE_H), model->getAttribute(ATTRIBUTE_LR),
+            model->getAttribute(ATTRIBUTE_IPF_ITERATIONS) };
+    delete mgr;
+    return result;
+}
+
+static const char *loopModels[] = { "IV:HD:HG", "IV:HDG:HTM", "IV:HA:HW:HE", NULL };
+
+// Fitting on a junction tree stops at the same point as IPF on the full table, at the
+// default convergence tolerance.
+TEST(JunctionTreeTest, MatchesFullTableAtDefaultTolerance) {
+    for (const char **name = loopModels; *name; name++) {
+        FitResult full = fitModel("./examples/lhs3b.in", *name, NULL, NULL);
+        FitResult tree = fitModel("./examples/lhs3b.in", *name, "--ipf-junction-tree=100000", NULL);
+        EXPECT_NEAR(full.h, tree.h, 1e-9) << *name;
+        EXPECT_NEAR(full.lr, tree.lr, 1e-6) << *name;
+        EXPECT_EQ(full.iterations, tree.iterations) << *name;
+    }
+}
+
+// And the same with a tight tolerance, where many more passes are needed.
+TEST(JunctionTreeTest, MatchesFullTableAtTightTolerance) {
+    for (const char **name = loopModels; *name; name++) {
+        FitResult full = fitModel("./examples/lhs3b.in", *name, NULL, "--ipf-maxdev=1e-8");
+        FitResult tree = fitModel("./examples/lhs3b.in", *name, "--ipf-junction-tree=100000", "--ipf-maxdev=1e-8");
+        EXPECT_NEAR(full.h, tree.h, 1e-9) << *name;
+        EXPECT_NEAR(full.lr, tree.lr, 1e-6) << *name;
+        EXPECT_EQ(full.iterations, tree.iterations) << *name;
+    }
+}
+
+int main(int argc, char **argv) {
+    ::testing::InitGoogleTest(&argc, argv);
+    return RUN_ALL_TESTS();
+}
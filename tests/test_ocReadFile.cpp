@@ -1,6 +1,9 @@
 #include <gtest/gtest.h>
 #include <fstream>
+#include <string.h>
+#include <unistd.h>
 #include "../include/Input.h" // Include the necessary headers for ocReadFile and other dependencies
+#include "../include/Key.h"
 #include "../include/Options.h"
 #include "../include/VariableList.h"
 
@@ -76,6 +79,71 @@ TEST_F(OcReadFileTest, ReadFile) {
     delete vars;
 }
 
+// Test case for writing and reading back a binary data file
+TEST_F(OcReadFileTest, BinaryFile) {
+    FILE *file = fopen("./tests/data/readFile.txt", "r");
+    ASSERT_NE(file, nullptr) << "Failed to open file";
+    Options options;
+    Table *indata = nullptr;
+    Table *testdata = nullptr;
+    VariableList *vars = nullptr;
+    EXPECT_FALSE(ocIsBinaryFile(file));
+    int result = ocReadFile(file, &options, &indata, &testdata, &vars);
+    fclose(file);
+
+    // Write the binary file, and read it back
+    char binaryName[] = "/tmp/test_ocReadFileXXXXXX";
+    close(mkstemp(binaryName));
+    ASSERT_TRUE(ocWriteBinaryFile(binaryName, &options, indata, testdata, vars, result));
+    FILE *binary = fopen(binaryName, "r");
+    ASSERT_NE(binary, nullptr) << "Failed to open binary file";
+    EXPECT_TRUE(ocIsBinaryFile(binary));
+    Options binaryOptions;
+    Table *binaryIndata = nullptr;
+    Table *binaryTestdata = nullptr;
+    VariableList *binaryVars = nullptr;
+    EXPECT_EQ(ocReadBinaryFile(binary, &binaryOptions, &binaryIndata, &binaryTestdata, &binaryVars), result);
+    fclose(binary);
+    unlink(binaryName);
+
+    // The options, variables and tuples should all match
+    void *next = nullptr, *binaryNext = nullptr;
+    const char *name, *value, *binaryOption, *binaryValue;
+    while (options.getNextOption(&next, &name, &value)) {
+        if (strcmp(name, "datafile") == 0) continue;
+        ASSERT_TRUE(binaryOptions.getNextOption(&binaryNext, &binaryOption, &binaryValue));
+        EXPECT_STREQ(name, binaryOption);
+        EXPECT_STREQ(value, binaryValue);
+    }
+    ASSERT_EQ(binaryVars->getVarCount(), vars->getVarCount());
+    for (int i = 0; i < vars->getVarCount(); i++) {
+        Variable *var = vars->getVariable(i), *binaryVar = binaryVars->getVariable(i);
+        EXPECT_STREQ(var->abbrev, binaryVar->abbrev);
+        EXPECT_EQ(var->cardinality, binaryVar->cardinality);
+        EXPECT_EQ(var->mask, binaryVar->mask);
+        for (int j = 0; j < var->cardinality; j++)
+            EXPECT_STREQ(vars->getVarValue(i, j), binaryVars->getVarValue(i, j));
+    }
+    ASSERT_EQ(binaryIndata->getTupleCount(), indata->getTupleCount());
+    for (long long i = 0; i < indata->getTupleCount(); i++) {
+        EXPECT_EQ(Key::compareKeys(indata->getKey(i), binaryIndata->getKey(i), indata->getKeySize()), 0);
+        EXPECT_EQ(indata->getValue(i), binaryIndata->getValue(i));
+    }
+    EXPECT_EQ(binaryTestdata == nullptr, testdata == nullptr);
+
+    // The mapped table must still be changeable
+    binaryIndata->normalize();
+    binaryIndata->addTuple(indata->getKey(0), 1.0);
+    EXPECT_EQ(binaryIndata->getTupleCount(), indata->getTupleCount() + 1);
+
+    delete indata;
+    delete testdata;
+    delete vars;
+    delete binaryIndata;
+    delete binaryTestdata;
+    delete binaryVars;
+}
+
 // Main function to run the tests
 int main(int argc, char **argv) {
     ::testing::InitGoogleTest(&argc, argv);
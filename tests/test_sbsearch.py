@@ -0,0 +1,48 @@
+# coding=utf-8
+# tests/test_sbsearch.py
+# Tests of state-based searches run through the Python interface (py/sbsearch.py). Each
+# search runs in its own interpreter, since a crash in the extension would end the tests.
+# Run from the top directory, with the extension built:
+#
+#   PYTHONPATH=cpp:py python2 tests/test_sbsearch.py
+import re
+import subprocess
+import sys
+import unittest
+
+# run py/sbsearch.py with the given arguments, taking the new models of a level batchSize at a
+# time (see ocutils.processLevel), and return its exit status and output
+def runSBSearch(args, batchSize=None):
+    script = "import sys, ocutils; sys.argv = %r; " % (["py/sbsearch.py"] + args)
+    if batchSize is not None:
+        script += "ocutils.searchBatchSize = %d; " % batchSize
+    script += "execfile('py/sbsearch.py')"
+    process = subprocess.Popen([sys.executable, "-c", script], stdout=subprocess.PIPE,
+                               stderr=subprocess.STDOUT)
+    output = process.communicate()[0]
+    return process.returncode, output
+
+
+class SBSearchTest(unittest.TestCase):
+    # the models of a search are handed to Python one at a time, and dropped once used;
+    # the search should still run to the end
+    def testSearchRunsToCompletion(self):
+        status, output = runSBSearch(["examples/search.in", "3", "4", "all"])
+        self.assertEqual(status, 0, output)
+        self.assertTrue("search: " in output, output)
+
+    # the models kept at each level, and so the report, don't depend on how many of the
+    # level's models are compared at a time
+    def testBatchSizeDoesNotChangeResult(self):
+        # the progress lines and the run times differ from run to run
+        varying = re.compile(r"seconds|memory used|^start:|^search:")
+        reports = []
+        for batchSize in (1, 100000):
+            status, output = runSBSearch(["examples/search.in", "3", "4", "all"], batchSize)
+            self.assertEqual(status, 0, output)
+            reports.append([line for line in output.splitlines() if not varying.search(line)])
+        self.assertEqual(reports[0], reports[1])
+
+
+if __name__ == "__main__":
+    unittest.main()